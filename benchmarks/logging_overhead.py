@@ -0,0 +1,139 @@
+"""
+Logging overhead benchmark: requests per second through a FastAPI route
+that logs like the application's routes and repositories do (an INFO line
+in the handler, DEBUG lines in the repository calls, an exception logged
+and handled on a share of requests), with logging switched off, through
+the application's queued logger, and with a StreamHandler writing on the
+request path (the old setup). Output goes to /dev/null, so what is
+measured is the cost on the calling side. Also reports how deep the log
+queue got and how many records the sampling filter dropped.
+
+    python -m benchmarks.logging_overhead --requests 5000 --rounds 3 --sampling 10
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import threading
+import time
+
+os.environ.setdefault("ENV", "benchmark")
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/benchmark")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from scrape.core.logger import LogHandler, SamplingFilter, get_logger  # noqa: E402
+
+logger = get_logger("benchmarks.logging_overhead")
+repo_logger = get_logger("scrape.db.repositories.benchmark")
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/products/{product_id}")
+    async def get_product(product_id: int):
+        logger.info("Getting product: %s", product_id)
+        repo_logger.debug("Fetching product by id: %s", product_id)
+        repo_logger.debug("Fetching latest price for product: %s", product_id)
+        if product_id % 50 == 0:
+            try:
+                raise LookupError(product_id)
+            except LookupError as e:
+                repo_logger.exception("Error: %s", e)
+        return {"id": product_id, "name": "Infinix Hot 40i", "price": 129900.0}
+
+    return app
+
+
+async def drive(app: FastAPI, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(200):
+            await client.get(f"/products/{i}")
+        started = time.perf_counter()
+        for i in range(requests):
+            await client.get(f"/products/{i}")
+        return time.perf_counter() - started
+
+
+class QueueDepth(threading.Thread):
+    def __init__(self) -> None:
+        super().__init__(daemon=True)
+        self.stop = threading.Event()
+        self.peak = 0
+
+    def run(self) -> None:
+        while not self.stop.is_set():
+            self.peak = max(self.peak, LogHandler.log_queue.qsize())
+            time.sleep(0.0005)
+
+
+def configure(mode: str, devnull) -> None:
+    app_logger = LogHandler.logger
+    queue_handler = LogHandler.queue_handler
+    listener_handler = LogHandler.listener.handlers[0]
+    listener_handler.setStream(devnull)
+
+    app_logger.disabled = mode == "off"
+    app_logger.setLevel(logging.DEBUG)
+    if mode == "inline":
+        inline = logging.StreamHandler(devnull)
+        inline.setFormatter(listener_handler.formatter)
+        app_logger.handlers = [inline]
+    else:
+        app_logger.handlers = [queue_handler]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--sampling", type=int, default=0,
+                        help="keep one in N repository DEBUG records (0: keep all)")
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+    app = build_app()
+    queue_handler = LogHandler.queue_handler
+    sampling = None
+    if args.sampling:
+        sampling = SamplingFilter({"scrape.db.repositories": args.sampling})
+        queue_handler.addFilter(sampling)
+
+    # Modes interleaved and the best round kept, to keep machine noise out
+    modes = ("off", "queued", "inline")
+    best = {mode: float("inf") for mode in modes}
+    peak_depth = 0
+    for _ in range(args.rounds):
+        for mode in modes:
+            configure(mode, devnull)
+            depth = QueueDepth()
+            depth.start()
+            best[mode] = min(best[mode], asyncio.run(drive(app, args.requests)))
+            depth.stop.set()
+            depth.join()
+            peak_depth = max(peak_depth, depth.peak)
+
+    baseline = best["off"] / args.requests * 1e6
+    for mode in modes:
+        per_request = best[mode] / args.requests * 1e6
+        line = (
+            f"{mode:>7}: {args.requests / best[mode]:8.0f} req/s, "
+            f"{per_request:7.1f} us/request ({per_request - baseline:+.1f} us)"
+        )
+        if mode == "queued":
+            line += f", peak queue depth {peak_depth}"
+        print(line)
+
+    if sampling:
+        # Two repository DEBUG lines per request go through the filter
+        kept = sum(1 + (count - 1) // args.sampling for count in sampling.counters.values())
+        seen = sum(sampling.counters.values())
+        print(f"sampling: {seen - kept} of {seen} DEBUG records dropped, "
+              f"{len(sampling.counters)} templates tracked")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Login burst benchmark: latency of an unrelated, trivial endpoint while a
+burst of password verifications is in flight, with bcrypt run inline on the
+event loop (the old behaviour) versus through AuthPassword's worker pool.
+
+    python -m benchmarks.login_burst --logins 40 --rounds 12
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("ENV", "benchmark")
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/benchmark")
+
+import bcrypt  # noqa: E402
+from scrape.services.auth.auth_service import AuthPassword  # noqa: E402
+
+PING_INTERVAL = 0.005
+
+
+async def unrelated_endpoint() -> None:
+    await asyncio.sleep(0)
+
+
+async def ping(stop: asyncio.Event, latencies: list) -> None:
+    # Open loop: each request is due at a fixed time and its latency is
+    # measured from then, so requests delayed by a blocked loop count.
+    start = time.perf_counter()
+    k = 0
+    while not stop.is_set():
+        due = start + k * PING_INTERVAL
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        await unrelated_endpoint()
+        latencies.append(time.perf_counter() - due)
+        k += 1
+
+
+async def inline_login(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+async def pooled_login(password: str, hashed: str) -> bool:
+    try:
+        return await AuthPassword().verify_password(password, hashed)
+    except Exception:
+        return False  # rejected by admission control
+
+
+async def run(login, logins: int, hashed: str) -> dict:
+    stop = asyncio.Event()
+    latencies: list = []
+    pinger = asyncio.create_task(ping(stop, latencies))
+    await asyncio.sleep(0.1)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login("correct horse", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await pinger
+    latencies.sort()
+    return {
+        "logins": sum(1 for r in results if r),
+        "logins_per_sec": logins / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=12)
+    args = parser.parse_args()
+
+    hashed = bcrypt.hashpw(b"correct horse", bcrypt.gensalt(rounds=args.rounds)).decode("utf-8")
+
+    for name, login in (("inline", inline_login), ("pooled", pooled_login)):
+        result = asyncio.run(run(login, args.logins, hashed))
+        print(
+            f"{name:>7}: {result['logins']}/{args.logins} ok, "
+            f"{result['logins_per_sec']:.1f} logins/s, unrelated endpoint "
+            f"p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms, "
+            f"max {result['max_ms']:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Scraped-item normalization benchmark: items/sec through the old path (each
+scraper's own price regex, then `clean_products`) and through
+`normalize_products`, over the same raw items.
+
+The items mix what the Amazon and Jumia scrapers hand over: dollar and
+naira prices, thousands separators, European formats, price ranges,
+multi-buy offers, tracking query strings, stray whitespace, missing
+fields and scraper error entries. The old path is reproduced here as it
+was, and the run also counts the items on which the two paths end up
+with different prices.
+
+    python -m benchmarks.normalization
+    python -m benchmarks.normalization --items 200000 --seconds 3
+"""
+
+import argparse
+import os
+import random
+import re
+import time
+from typing import Dict, List
+
+os.environ.setdefault("ENV", "benchmark")
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/benchmark")
+
+from scrape.services.wrangling.normalizer import normalize_products  # noqa: E402
+
+# Price text as found on the pages, filled in with a random amount
+PRICE_FORMATS = [
+    lambda r: f"${r.uniform(1, 3000):,.2f}",
+    lambda r: f"${r.randint(1, 99)}",
+    lambda r: f"₦ {r.randint(1000, 2000000):,}",
+    lambda r: f"₦ {(low := r.randint(1000, 90000)):,} - ₦ {low + r.randint(500, 9000):,}",
+    lambda r: f"{r.uniform(1, 3000):,.2f} €".replace(",", " ").replace(".", ","),
+    lambda r: f"£{r.uniform(1, 500):.2f}",
+    lambda r: f"USD {r.uniform(1, 500):.2f}",
+    lambda r: f"{r.randint(2, 4)} for ${r.randint(5, 40)}",
+    lambda r: "",
+    lambda r: None,
+]
+
+
+def legacy_price(text):
+    """The selenium scrapers' parsing, applied to the raw text."""
+    if not text:
+        return None
+    cleaned = re.sub(r"[^\d.]", "", text.replace(",", ""))
+    try:
+        return float(cleaned) if cleaned else None
+    except ValueError:
+        return None
+
+
+def clean_products(raw_products: List[Dict]) -> List[Dict]:
+    """scrape.services.wrangling.cleaner.clean_products, before its removal."""
+    cleaned = []
+    for item in raw_products:
+        name = item.get("name", "").strip()
+        url = item.get("url", "").split("?")[0] if item.get("url") else None
+        price = item.get("price", None)
+
+        if name and url:
+            cleaned.append({
+                "name": name,
+                "url": url,
+                "price": price if isinstance(price, (int, float)) else None
+            })
+    return cleaned
+
+
+def make_items(count: int, seed: int = 3) -> list:
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        if rng.random() < 0.02:
+            items.append({"error": "Timeout waiting for #productTitle", "url": f"https://www.amazon.com/dp/{i}"})
+            continue
+        items.append({
+            "name": f"  Samsung Galaxy A{i % 90}  128GB\n4GB RAM  " if rng.random() < 0.97 else "",
+            "url": f"https://www.jumia.com.ng/product-{i}.html?ref=search&pos={i % 40}",
+            "price": rng.choice(PRICE_FORMATS)(rng),
+            "category": "  Phones & Tablets " if rng.random() < 0.8 else None,
+        })
+    return items
+
+
+def legacy(items: list) -> list:
+    scraped = [
+        item if "error" in item else {**item, "price": legacy_price(item["price"])}
+        for item in items
+    ]
+    return clean_products(scraped)
+
+
+def normalized(items: list) -> list:
+    return list(normalize_products(items))
+
+
+def rate(run, items: list, seconds: float) -> float:
+    """Items/sec of the fastest pass within `seconds`, to keep machine noise out."""
+    run(items)
+    best, deadline = float("inf"), time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        run(items)
+        best = min(best, time.perf_counter() - start)
+    return len(items) / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+
+    old = {row["url"]: row["price"] for row in legacy(items)}
+    new = {product.url: product.price for product in normalized(items)}
+    differ = sum(1 for url, price in new.items() if old.get(url) != price)
+
+    old_rate = rate(legacy, items, args.seconds)
+    new_rate = rate(normalized, items, args.seconds)
+    print(f"legacy regex + clean_products   {old_rate:12,.0f} items/s  ({len(old)} kept)")
+    print(f"normalize_products              {new_rate:12,.0f} items/s  ({len(new)} kept)")
+    print(f"prices that differ              {differ:12,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Prepared-statement fast path benchmark: ops/sec of a product-by-url lookup
+through `databases` (named parameters, SQLAlchemy compile per call) versus
+BaseRepository.fetch_one_prepared (positional parameters on the raw asyncpg
+connection).
+
+The client-side part (what `databases` does before a query reaches asyncpg)
+needs no server and always runs; the end-to-end part runs when --dsn points
+at a migrated database.
+
+    python -m benchmarks.prepared_statements --calls 20000
+    python -m benchmarks.prepared_statements --dsn postgresql://localhost/scraper --calls 5000
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("ENV", "benchmark")
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/benchmark")
+
+from databases import Database  # noqa: E402
+from databases.core import Connection  # noqa: E402
+from scrape.db.repositories.products.product import (  # noqa: E402
+    ProductRepository, GET_PRODUCT_BY_URL_QUERY
+)
+
+NAMED_QUERY = GET_PRODUCT_BY_URL_QUERY.replace("$1", ":url")
+URL = "https://www.amazon.com/benchmark-product"
+
+
+def client_overhead(calls: int) -> float:
+    """Seconds per call spent building and compiling the query in `databases`."""
+    db = Database("postgresql://localhost/benchmark")
+    connection = db._backend.connection()
+    start = time.perf_counter()
+    for _ in range(calls):
+        connection._compile(Connection._build_query(NAMED_QUERY, {"url": URL}))
+    return (time.perf_counter() - start) / calls
+
+
+async def ops_per_sec(call, calls: int, concurrency: int) -> float:
+    per_worker = calls // concurrency
+
+    async def worker():
+        for _ in range(per_worker):
+            await call()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return per_worker * concurrency / (time.perf_counter() - start)
+
+
+async def end_to_end(dsn: str, calls: int, concurrency: int) -> None:
+    db = Database(dsn, min_size=concurrency, max_size=concurrency)
+    await db.connect()
+    try:
+        repo = ProductRepository(db)
+
+        async def through_databases():
+            await db.fetch_one(NAMED_QUERY, values={"url": URL})
+
+        async def prepared():
+            await repo.fetch_one_prepared(GET_PRODUCT_BY_URL_QUERY, URL)
+
+        # Warm every pooled connection's statement cache first
+        await ops_per_sec(prepared, concurrency * 10, concurrency)
+        await ops_per_sec(through_databases, concurrency * 10, concurrency)
+
+        baseline = await ops_per_sec(through_databases, calls, concurrency)
+        fast = await ops_per_sec(prepared, calls, concurrency)
+        print(f"databases path   {baseline:10.0f} ops/s")
+        print(f"prepared path    {fast:10.0f} ops/s   ({fast / baseline:.2f}x)")
+    finally:
+        await db.disconnect()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--dsn", default=None)
+    args = parser.parse_args()
+
+    overhead = client_overhead(args.calls)
+    print(f"databases build+compile per call: {overhead * 1e6:.1f} us "
+          f"(~{1 / overhead:.0f} calls/s of pure client CPU), skipped by the prepared path")
+
+    if args.dsn:
+        asyncio.run(end_to_end(args.dsn, args.calls, args.concurrency))
+    else:
+        print("no --dsn given, skipping the end-to-end comparison")
+
+
+if __name__ == "__main__":
+    main()
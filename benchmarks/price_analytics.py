@@ -0,0 +1,152 @@
+"""
+Price analytics benchmark: the set-based price-drop and price-stats queries
+over 10k products x 1k observations, against the per-product loop they
+replace (one history fetch per product, statistics in Python).
+
+The data goes into a scratch schema that shadows the real tables through
+search_path, so the repository's own SQL runs unchanged. The schema is
+dropped afterwards unless --keep is given, in which case later runs reuse it.
+
+    python -m benchmarks.price_analytics --dsn postgresql://localhost/scraper
+    python -m benchmarks.price_analytics --dsn ... --products 1000 --observations 100
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("ENV", "benchmark")
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/benchmark")
+
+from databases import Database  # noqa: E402
+from scrape.db.repositories.products.price_history import PriceHistoryRepository  # noqa: E402
+from scrape.models.products.price_history import PriceStatsOrder  # noqa: E402
+
+SCHEMA = "bench_price_analytics"
+
+CREATE_SCHEMA = f"""
+    CREATE SCHEMA {SCHEMA};
+    CREATE TABLE {SCHEMA}.retailers (id uuid PRIMARY KEY, name text NOT NULL);
+    CREATE TABLE {SCHEMA}.products (
+        id uuid PRIMARY KEY, name text NOT NULL, url text NOT NULL, retailer_id uuid NOT NULL
+    );
+    CREATE TABLE {SCHEMA}.price_history (
+        id bigserial PRIMARY KEY, product_id uuid NOT NULL,
+        price numeric(10, 2) NOT NULL, created_at timestamptz NOT NULL
+    );
+"""
+
+# A random walk per product, one observation an hour up to now
+SEED = f"""
+    INSERT INTO {SCHEMA}.retailers VALUES (gen_random_uuid(), 'benchmark');
+    INSERT INTO {SCHEMA}.products
+        SELECT gen_random_uuid(), 'product ' || i, 'https://example.com/' || i,
+               (SELECT id FROM {SCHEMA}.retailers)
+        FROM generate_series(1, $1) AS i;
+    INSERT INTO {SCHEMA}.price_history (product_id, price, created_at)
+        SELECT p.id,
+               GREATEST(1, 100 + SUM(random() - 0.5) OVER (PARTITION BY p.id ORDER BY o)),
+               now() - make_interval(hours => $2 - o)
+        FROM {SCHEMA}.products p, generate_series(1, $2) AS o;
+    CREATE INDEX ON {SCHEMA}.price_history (product_id, created_at) INCLUDE (price);
+    ANALYZE {SCHEMA}.products, {SCHEMA}.price_history;
+"""
+
+
+async def seed(database: Database, products: int, observations: int) -> None:
+    async with database.connection() as connection:
+        raw = connection.raw_connection
+        exists = await raw.fetchval(
+            "SELECT count(*) FROM information_schema.schemata WHERE schema_name = $1", SCHEMA
+        )
+        if exists:
+            print(f"reusing schema {SCHEMA}")
+            return
+        start = time.perf_counter()
+        await raw.execute(CREATE_SCHEMA)
+        # Multi-statement strings cannot take parameters
+        for statement in SEED.split(";"):
+            if statement.strip():
+                sql = statement.replace("$1", str(products)).replace("$2", str(observations))
+                await raw.execute(sql)
+        print(f"seeded {products} x {observations} in {time.perf_counter() - start:.1f}s")
+
+
+async def per_product_loop(database: Database, sample: int, since: datetime) -> float:
+    """Seconds per product for the loop the set-based query replaces."""
+    async with database.connection() as connection:
+        raw = connection.raw_connection
+        ids = await raw.fetch(f"SELECT id FROM {SCHEMA}.products LIMIT $1", sample)
+        start = time.perf_counter()
+        for row in ids:
+            history = await raw.fetch(
+                f"SELECT price, created_at FROM {SCHEMA}.price_history "
+                "WHERE product_id = $1 ORDER BY created_at", row["id"]
+            )
+            prices = [float(h["price"]) for h in history]
+            current = prices[-1]
+            min(prices), max(prices)
+            sum(p <= current for p in prices) / len(prices)
+            returns = [
+                math.log(b / a) for a, b, h in zip(prices, prices[1:], history[1:])
+                if h["created_at"] >= since and a > 0 and b > 0
+            ]
+            statistics.stdev(returns) if len(returns) > 1 else None
+        return (time.perf_counter() - start) / len(ids)
+
+
+async def timed(call, runs: int) -> float:
+    await call()
+    start = time.perf_counter()
+    for _ in range(runs):
+        await call()
+    return (time.perf_counter() - start) / runs
+
+
+async def run(args) -> None:
+    database = Database(
+        args.dsn, min_size=1, max_size=2,
+        server_settings={"search_path": f"{SCHEMA},public"}
+    )
+    await database.connect()
+    try:
+        await seed(database, args.products, args.observations)
+        repo = PriceHistoryRepository(database)
+        since = datetime.now(timezone.utc) - timedelta(days=7)
+
+        drops = await timed(lambda: repo.get_price_drops(since=since, limit=50), args.runs)
+        stats = await timed(
+            lambda: repo.get_price_stats(
+                since=since, limit=100, order=PriceStatsOrder.VOLATILITY
+            ),
+            args.runs,
+        )
+        loop = await per_product_loop(database, args.baseline_sample, since)
+
+        print(f"price drops, {args.products} products        {drops * 1000:10.1f} ms")
+        print(f"price stats, {args.products} products        {stats * 1000:10.1f} ms")
+        print(f"per-product loop (extrapolated)   {loop * args.products * 1000:10.1f} ms "
+              f"({loop * args.products / stats:.1f}x the stats query)")
+    finally:
+        if not args.keep:
+            await database.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await database.disconnect()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dsn", required=True)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--observations", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--baseline-sample", type=int, default=500)
+    parser.add_argument("--keep", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
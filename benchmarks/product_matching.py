@@ -0,0 +1,143 @@
+"""
+Product matching benchmark: a full rebuild over synthetic listings, from
+product names to clusters, with recall and precision against the known
+groups and the number of pairs compared against all n^2 / 2.
+
+Every synthetic product is listed by two or three retailers. The listings
+have reordered tokens, spacing and case differences in units, and the
+odd dropped or added word, which is how Amazon and Jumia titles differ.
+Nothing touches a database: the repository is swapped for one that keeps
+signatures and matches in memory, so the timings are the matcher's own.
+
+    python -m benchmarks.product_matching
+    python -m benchmarks.product_matching --products 430000    # ~1M listings
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+from collections import defaultdict
+
+os.environ.setdefault("ENV", "benchmark")
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/benchmark")
+
+from scrape.core.configs import MATCH_BANDS, MATCH_NUM_PERM  # noqa: E402
+from scrape.services.matching import matcher  # noqa: E402
+from scrape.services.matching.minhash import MinHasher  # noqa: E402
+
+BRANDS = ["Samsung", "Tecno", "Infinix", "Xiaomi", "Apple", "Nokia", "Oppo", "Itel", "HP", "Lenovo"]
+LINES = ["Galaxy", "Spark", "Hot", "Redmi", "iPhone", "Camon", "Note", "Reno", "Pavilion", "IdeaPad"]
+COLORS = ["Black", "Blue", "Silver", "Gold", "Green", "White"]
+NOISE = ["Dual SIM", "Smartphone", "Renewed", "Official", "Fast Charging", "Unlocked", "4G LTE"]
+
+
+def make_listings(products: int, seed: int = 7) -> tuple:
+    rng = random.Random(seed)
+    retailers = [uuid.uuid4() for _ in range(3)]
+    rows, truth = [], []
+    for group in range(products):
+        brand = rng.randrange(len(BRANDS))
+        model = f"{LINES[brand]} {rng.choice('ABCDEFGHJKMNPRSTVXZ')}{rng.randint(1, 999)}"
+        storage, ram = rng.choice([32, 64, 128, 256, 512]), rng.choice([2, 3, 4, 6, 8, 12])
+        tokens = [BRANDS[brand], model, f"{storage}GB", f"{ram}GB RAM", rng.choice(COLORS)]
+        for retailer in rng.sample(retailers, rng.choice([2, 2, 3])):
+            listing = tokens[:]
+            rng.shuffle(listing[2:])
+            if rng.random() < 0.5:
+                listing[2] = listing[2].replace("GB", " GB")
+            if rng.random() < 0.4:
+                listing.append(rng.choice(NOISE))
+            if rng.random() < 0.2:
+                listing.pop(rng.randrange(2, len(listing)))
+            name = " ".join(listing)
+            rows.append({"id": uuid.uuid4(), "name": name.upper() if rng.random() < 0.1 else name,
+                         "retailer_id": retailer})
+            truth.append(group)
+    return rows, truth
+
+
+class InMemoryMatchRepository:
+    def __init__(self, rows: list, chunk_size: int) -> None:
+        self.rows = rows
+        self.chunk_size = chunk_size
+        self.signatures = 0
+        self.matches: list = []
+
+    async def stream_product_names(self, full: bool, chunk_size: int):
+        for start in range(0, len(self.rows), self.chunk_size):
+            yield self.rows[start:start + self.chunk_size]
+
+    async def save_signatures(self, records) -> None:
+        self.signatures += len(records)
+
+    async def replace_matches(self, matches) -> None:
+        self.matches = list(matches)
+
+
+def score(rows: list, truth: list, matches: list) -> tuple:
+    """Pairwise recall and precision of the clusters against the true groups."""
+    group_of = {row["id"]: group for row, group in zip(rows, truth)}
+    true_pairs = sum(n * (n - 1) // 2 for n in _sizes(truth))
+    clusters = defaultdict(list)
+    for product_id, cluster_id, _ in matches:
+        clusters[cluster_id].append(group_of[product_id])
+    found = correct = 0
+    for members in clusters.values():
+        found += len(members) * (len(members) - 1) // 2
+        correct += sum(n * (n - 1) // 2 for n in _sizes(members))
+    return correct / true_pairs, correct / found if found else 1.0
+
+
+def _sizes(groups: list) -> list:
+    counts = defaultdict(int)
+    for group in groups:
+        counts[group] += 1
+    return list(counts.values())
+
+
+async def run(args) -> None:
+    start = time.perf_counter()
+    rows, truth = make_listings(args.products)
+    print(f"generated {len(rows)} listings of {args.products} products "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    hasher = MinHasher(args.num_perm, args.bands)
+    repo = InMemoryMatchRepository(rows, args.chunk_size)
+
+    compared = []
+    candidate_pairs = matcher.candidate_pairs
+
+    def counting(*a, **kw):
+        pairs = candidate_pairs(*a, **kw)
+        compared.append(len(pairs))
+        return pairs
+
+    matcher.candidate_pairs = counting
+    start = time.perf_counter()
+    await matcher.rebuild(repo, hasher)
+    elapsed = time.perf_counter() - start
+    matcher.candidate_pairs = candidate_pairs
+
+    recall, precision = score(rows, truth, repo.matches)
+    all_pairs = len(rows) * (len(rows) - 1) // 2
+    print(f"{args.num_perm} slots, {args.bands} bands (threshold {hasher.threshold:.2f})")
+    print(f"rebuild                  {elapsed:10.1f} s  ({len(rows) / elapsed:,.0f} listings/s)")
+    print(f"pairs compared           {compared[0]:10,}  ({compared[0] / all_pairs:.2e} of all pairs)")
+    print(f"matched listings         {len(repo.matches):10,}")
+    print(f"recall / precision       {recall:10.3f} / {precision:.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--num-perm", type=int, default=MATCH_NUM_PERM)
+    parser.add_argument("--bands", type=int, default=MATCH_BANDS)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Product list serialization benchmark: rows/sec for pages of 10, 100 and
+1000 products, from database rows to response bytes.
+
+    model path    Product(**row) per row in the repository, then FastAPI's
+                  response_model validation and JSON rendering
+    orjson path   rows projected onto the response fields and encoded once
+    msgpack path  the same, for `Accept: application/msgpack`
+
+No database is needed: rows are dicts shaped like the asyncpg records the
+repository gets back (Decimal prices, UUIDs, aware datetimes). Each page
+size first checks that both JSON paths decode to the same document.
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --pages 10,100,1000 --seconds 2
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+os.environ.setdefault("ENV", "benchmark")
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/benchmark")
+
+import orjson  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+from scrape.api.responses import encode, project  # noqa: E402
+from scrape.models.products.product import Product, ProductList, PRODUCT_FIELDS  # noqa: E402
+
+RESPONSE_FIELD = create_model_field(name="Response_get_products", type_=ProductList, mode="serialization")
+
+
+def make_rows(count: int) -> list:
+    retailer_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": uuid.uuid4(),
+            "name": f"Benchmark product {i} with a realistically long listing title",
+            "url": f"https://www.amazon.com/dp/B0{i:08d}",
+            "price": Decimal(f"{10 + i % 500}.99"),
+            "category": "Electronics",
+            "retailer_id": retailer_id,
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+async def model_path(rows: list) -> bytes:
+    page = ProductList(products=[Product(**row) for row in rows], total=None, next_cursor=None)
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=page)
+    return JSONResponse(content).body
+
+
+async def orjson_path(rows: list) -> bytes:
+    return encode({"products": project(rows, PRODUCT_FIELDS), "total": None, "next_cursor": None})
+
+
+async def msgpack_path(rows: list) -> bytes:
+    return encode(
+        {"products": project(rows, PRODUCT_FIELDS), "total": None, "next_cursor": None},
+        msgpack_body=True,
+    )
+
+
+async def rows_per_sec(path, rows: list, seconds: float) -> float:
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        await path(rows)
+        calls += 1
+    return calls * len(rows) / (time.perf_counter() - start)
+
+
+async def run(pages: str, seconds: float) -> None:
+    print(f"{'page':>6} {'model rows/s':>14} {'orjson rows/s':>14} {'msgpack rows/s':>15} {'speedup':>8}")
+    for size in (int(p) for p in pages.split(",")):
+        rows = make_rows(size)
+        assert orjson.loads(await orjson_path(rows)) == orjson.loads(await model_path(rows))
+        baseline = await rows_per_sec(model_path, rows, seconds)
+        fast = await rows_per_sec(orjson_path, rows, seconds)
+        packed = await rows_per_sec(msgpack_path, rows, seconds)
+        print(f"{size:>6} {baseline:>14,.0f} {fast:>14,.0f} {packed:>15,.0f} {fast / baseline:>7.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", default="10,100,1000")
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.pages, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
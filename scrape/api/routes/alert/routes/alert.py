@@ -1,12 +1,17 @@
-from typing import List
+from typing import Optional
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from scrape.core.logger import logger
+from scrape.core.logger import get_logger
 from scrape.db.database import get_repository
+from scrape.db.pagination import TotalMode, InvalidCursorError
 from scrape.db.repositories.alert.alert import AlertRepository
+from scrape.models.alerts.alert import AlertList
 from scrape.models.users.user import UserInDB
+from scrape.services.alerts.alert_index import alert_index
 from scrape.services.auth.auth_service import get_current_user
 
+logger = get_logger(__name__)
+
 router = APIRouter()
 
 
@@ -32,6 +37,9 @@ async def create_alert(
                 status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
                 detail="Error creating alert"
             )
+
+        if not alert_id["is_triggered"]:
+            alert_index.add(alert_id["product_id"], alert_id["id"], alert_id["target_price"])
         return alert_id
     except Exception as e:
         logger.exception("Error creating alert. Exception: %s", e)
@@ -41,16 +49,25 @@ async def create_alert(
         ) from e
 
 
-@router.get("/", response_model=List[UUID])
+@router.get("/", response_model=AlertList)
 async def get_alerts(
-    limit: int = Query(10, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    total: TotalMode = TotalMode.NONE,
     repo: AlertRepository = Depends(get_repository(AlertRepository)),
     current_user: UserInDB = Depends(get_current_user),
-) -> List[UUID]:
+) -> AlertList:
     try:
         logger.info("Getting alerts")
-        alerts = await repo.get_alerts(user_id=current_user.id, limit=limit)
+        alerts = await repo.get_alerts(
+            user_id=current_user.id, limit=limit, cursor=cursor, total=total
+        )
         return alerts
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        ) from e
     except Exception as e:
         logger.exception("Error getting alerts. Exception: %s", e)
         raise HTTPException(
@@ -61,7 +78,7 @@ async def get_alerts(
 
 @router.delete("/{alert_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_alert(
-    alert_id: UUID = Query(...),
+    alert_id: UUID,
     repo: AlertRepository = Depends(get_repository(AlertRepository)),
     current_user: UserInDB = Depends(get_current_user),
 ):
@@ -76,6 +93,8 @@ async def delete_alert(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Alert not found"
             )
+
+        alert_index.remove(deleted["product_id"], deleted["id"])
         return
     except Exception as e:
         logger.exception("Error deleting alerts. Exception: %s", e)
@@ -0,0 +1,6 @@
+from fastapi import APIRouter
+from scrape.api.routes.analytics.routes.price_analytics import router as price_analytics_router
+
+
+router = APIRouter()
+router.include_router(price_analytics_router, prefix="/analytics", tags=["Price Analytics"])
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from scrape.core.logger import get_logger
+from scrape.db.database import get_read_repository
+from scrape.db.repositories.products.price_history import PriceHistoryRepository
+from scrape.models.products.price_history import PriceDrop, PriceStats, PriceStatsOrder
+
+logger = get_logger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/price-drops", response_model=List[PriceDrop])
+async def get_price_drops(
+    days: int = Query(7, ge=1, le=365, description="Window length in days"),
+    retailer_id: Optional[UUID] = None,
+    limit: int = Query(50, ge=1, le=1000),
+    repo: PriceHistoryRepository = Depends(get_read_repository(PriceHistoryRepository)),
+) -> List[PriceDrop]:
+    try:
+        logger.info("Getting the biggest price drops of the last %s days", days)
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        return await repo.get_price_drops(since=since, limit=limit, retailer_id=retailer_id)
+    except Exception as e:
+        logger.exception("Error getting price drops. Exception: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error getting price drops"
+        ) from e
+
+
+@router.get("/price-stats", response_model=List[PriceStats])
+async def get_price_stats(
+    days: int = Query(30, ge=1, le=365, description="Volatility window in days"),
+    order: PriceStatsOrder = PriceStatsOrder.VOLATILITY,
+    retailer_id: Optional[UUID] = None,
+    limit: int = Query(100, ge=1, le=5000),
+    repo: PriceHistoryRepository = Depends(get_read_repository(PriceHistoryRepository)),
+) -> List[PriceStats]:
+    try:
+        logger.info("Getting price stats ordered by %s", order.value)
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        return await repo.get_price_stats(
+            since=since, limit=limit, order=order, retailer_id=retailer_id
+        )
+    except Exception as e:
+        logger.exception("Error getting price stats. Exception: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error getting price stats"
+        ) from e
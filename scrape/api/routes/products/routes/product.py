@@ -1,23 +1,73 @@
+import math
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
-from scrape.core.logger import logger
-from scrape.db.database import get_repository
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from scrape.api.conditional import make_etag, is_not_modified, not_modified, set_validators
+from scrape.api.responses import (
+    ENCODED_VARY, ExportFormat, encoded_response, export_response, project
+)
+from scrape.core.configs import EXPORT_CHUNK_ROWS
+from scrape.core.logger import get_logger
+from scrape.db.database import get_repository, get_read_repository
+from scrape.db.pagination import TotalMode, InvalidCursorError
 from scrape.db.repositories.products.product import ProductRepository
-from scrape.models.products.product import ProductCreate, Product, ProductList
+from scrape.db.repositories.products.price_history import PriceHistoryRepository
+from scrape.db.repositories.products.product_match import ProductMatchRepository
+from scrape.models.products.product import (
+    ProductCreate, Product, ProductList, ProductSearchPage, PRODUCT_FIELDS
+)
+from scrape.models.products.product_match import ProductMatch
+from scrape.models.products.price_history import (
+    DownsampleMode, LatestPrice, PriceHistorySeries, PRICE_HISTORY_EXPORT_FIELDS
+)
+from scrape.services.wrangling.downsample import lttb
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 
+DEFAULT_HISTORY_WINDOW = timedelta(days=30)
+# LTTB picks from SQL pre-aggregated buckets, this many per output point
+LTTB_OVERSAMPLING = 4
+
 
-@router.get("/", response_model=ProductList)
+@router.get(
+    "/", response_model=ProductList,
+    responses={200: {"content": {"application/msgpack": {}}}},
+)
 async def get_products(
-    limit: int = 10,
-    offset: int = 0,
-    repo: ProductRepository = Depends(get_repository(ProductRepository)),
+    request: Request,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    total: TotalMode = TotalMode.ESTIMATE,
+    repo: ProductRepository = Depends(get_read_repository(ProductRepository)),
 ) -> ProductList:
     try:
         logger.info("Getting products")
-        products = await repo.get_products(limit=limit, offset=offset)
-        return products
+        version = await repo.get_products_version()
+        if version:
+            etag = make_etag("products", version["version"], limit, cursor, total.value)
+            if is_not_modified(request, etag, version["updated_at"]):
+                return not_modified(etag, version["updated_at"], vary=ENCODED_VARY)
+
+        # Rows are encoded as they come from the database; the response
+        # model above only documents the shape.
+        page = await repo.get_product_rows(limit=limit, cursor=cursor, total=total)
+        response = encoded_response(request, {
+            "products": project(page["products"], PRODUCT_FIELDS),
+            "total": page["total"],
+            "next_cursor": page["next_cursor"],
+        })
+        if version:
+            set_validators(response, etag, version["updated_at"])
+        return response
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        ) from e
     except Exception as e:
         logger.exception("Error getting products. Exception: %s", e)
         raise HTTPException(
@@ -26,19 +76,88 @@ async def get_products(
         ) from e
 
 
+# Registered before "/{product_id}" so "export" is not parsed as an ID.
+# Rows stream from a server-side cursor; an error after the first chunk
+# can only cut the download short, and is logged by the repository.
+@router.get("/export")
+async def export_products(
+    format: ExportFormat = ExportFormat.NDJSON,
+    repo: ProductRepository = Depends(get_read_repository(ProductRepository)),
+):
+    logger.info("Exporting products as %s", format.value)
+    return export_response(
+        repo.export_products(chunk_size=EXPORT_CHUNK_ROWS),
+        PRODUCT_FIELDS, format, "products"
+    )
+
+
+@router.get("/latest-prices", response_model=List[LatestPrice])
+async def get_latest_prices(
+    ids: List[UUID] = Query(..., max_length=1000, description="Product IDs"),
+    repo: PriceHistoryRepository = Depends(get_read_repository(PriceHistoryRepository)),
+) -> List[LatestPrice]:
+    try:
+        logger.info("Getting latest prices for %s products", len(ids))
+        return await repo.get_latest_prices(product_ids=ids)
+    except Exception as e:
+        logger.exception("Error getting latest prices. Exception: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error getting latest prices"
+        ) from e
+
+
+@router.get("/search", response_model=ProductSearchPage)
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    retailer_id: Optional[UUID] = None,
+    min_price: Optional[Decimal] = Query(None, ge=0),
+    max_price: Optional[Decimal] = Query(None, ge=0),
+    repo: ProductRepository = Depends(get_read_repository(ProductRepository)),
+) -> ProductSearchPage:
+    try:
+        logger.info("Searching products: %s", q)
+        return await repo.search_products(
+            q=q, limit=limit, cursor=cursor, retailer_id=retailer_id,
+            min_price=min_price, max_price=max_price
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        ) from e
+    except Exception as e:
+        logger.exception("Error searching products. Exception: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error searching products"
+        ) from e
+
+
 @router.get("/{product_id}", response_model=Product)
 async def get_product_by_id(
     product_id: UUID,
-    repo: ProductRepository = Depends(get_repository(ProductRepository)),
+    request: Request,
+    response: Response,
+    repo: ProductRepository = Depends(get_read_repository(ProductRepository)),
 ) -> Product:
     try:
         logger.info("Getting product by ID: %s", product_id)
+        updated_at = await repo.get_product_updated_at(product_id=product_id)
+        if updated_at:
+            etag = make_etag(product_id, updated_at.isoformat())
+            if is_not_modified(request, etag, updated_at):
+                return not_modified(etag, updated_at)
+
         product = await repo.get_product_by_id(product_id=product_id)
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Product not found"
             )
+        set_validators(response, make_etag(product_id, product.updated_at.isoformat()), product.updated_at)
         return product
     except HTTPException:
         raise
@@ -53,19 +172,132 @@ async def get_product_by_id(
         ) from e
 
 
+@router.get("/{product_id}/history", response_model=PriceHistorySeries)
+async def get_product_price_history(
+    product_id: UUID,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    bucket: Optional[int] = Query(None, ge=1, description="Bucket size in seconds"),
+    max_points: int = Query(500, ge=3, le=5000),
+    mode: DownsampleMode = DownsampleMode.BUCKET,
+    repo: PriceHistoryRepository = Depends(get_read_repository(PriceHistoryRepository)),
+    product_repo: ProductRepository = Depends(get_read_repository(ProductRepository)),
+) -> PriceHistorySeries:
+    try:
+        logger.info("Getting price history for product: %s", product_id)
+        end = end or datetime.now(timezone.utc)
+        start = start or end - DEFAULT_HISTORY_WINDOW
+        end = end if end.tzinfo else end.replace(tzinfo=timezone.utc)
+        start = start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+
+        if start >= end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="'from' must be before 'to'"
+            )
+
+        # The bucket width never drops below what keeps the series within
+        # the point budget, however long the requested range is.
+        span = (end - start).total_seconds()
+        budget = max_points * LTTB_OVERSAMPLING if mode == DownsampleMode.LTTB else max_points
+        bucket_seconds = max(bucket or 1, math.ceil(span / budget))
+
+        points = await repo.get_price_history_buckets(
+            product_id=product_id, start=start, end=end,
+            bucket_seconds=bucket_seconds, limit=budget
+        )
+
+        # An empty series is either a quiet window or an unknown product
+        if not points and not await product_repo.get_product_updated_at(product_id=product_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+
+        if mode == DownsampleMode.LTTB:
+            points = lttb(
+                points, max_points,
+                x=lambda p: p.timestamp.timestamp(),
+                y=lambda p: p.price
+            )
+
+        return PriceHistorySeries(
+            product_id=product_id, start=start, end=end,
+            bucket_seconds=bucket_seconds, mode=mode, points=points
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(
+            "Error getting price history for product: %s. Exception: %s",
+            product_id, e
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error getting price history"
+        ) from e
+
+
+@router.get("/{product_id}/history/export")
+async def export_product_price_history(
+    product_id: UUID,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    format: ExportFormat = ExportFormat.NDJSON,
+    repo: PriceHistoryRepository = Depends(get_read_repository(PriceHistoryRepository)),
+):
+    logger.info("Exporting price history for product: %s", product_id)
+    if start and not start.tzinfo:
+        start = start.replace(tzinfo=timezone.utc)
+    if end and not end.tzinfo:
+        end = end.replace(tzinfo=timezone.utc)
+    return export_response(
+        repo.export_price_history(
+            product_id=product_id, start=start, end=end, chunk_size=EXPORT_CHUNK_ROWS
+        ),
+        PRICE_HISTORY_EXPORT_FIELDS, format, f"price-history-{product_id}"
+    )
+
+
+@router.get("/{product_id}/matches", response_model=List[ProductMatch])
+async def get_product_matches(
+    product_id: UUID,
+    limit: int = Query(20, ge=1, le=100),
+    repo: ProductMatchRepository = Depends(get_read_repository(ProductMatchRepository)),
+) -> List[ProductMatch]:
+    try:
+        logger.info("Getting matches for product: %s", product_id)
+        return await repo.get_matches(product_id=product_id, limit=limit)
+    except Exception as e:
+        logger.exception("Error getting product matches. Exception: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error getting product matches"
+        ) from e
+
+
 @router.get("/url/{product_url}", response_model=Product)
 async def get_product_by_url(
     product_url: str,
+    request: Request,
+    response: Response,
     repo: ProductRepository = Depends(get_repository(ProductRepository)),
 ) -> Product:
     try:
         logger.info("Getting product by URL: %s", product_url)
+        updated_at = await repo.get_product_updated_at(product_url=product_url)
+        if updated_at:
+            etag = make_etag(product_url, updated_at.isoformat())
+            if is_not_modified(request, etag, updated_at):
+                return not_modified(etag, updated_at)
+
         product = await repo.get_product_by_url(product_url=product_url)
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Product not found"
             )
+        set_validators(response, make_etag(product_url, product.updated_at.isoformat()), product.updated_at)
         return product
     except HTTPException:
         raise
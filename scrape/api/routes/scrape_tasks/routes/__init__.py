@@ -0,0 +1,6 @@
+from fastapi import APIRouter
+from scrape.api.routes.scrape_tasks.routes.scrape_task import router as scrape_task_router
+
+
+router = APIRouter()
+router.include_router(scrape_task_router, prefix="/scrape-tasks", tags=["Scrape Tasks"])
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from scrape.core.logger import get_logger
+from scrape.db.database import get_read_repository
+from scrape.db.repositories.scrape_tasks.scrape_task import ScrapeTaskRepository
+from scrape.models.scrape_tasks.scrape_task import ScrapeTaskTiming, ScrapeCost
+from scrape.models.users.user import UserInDB
+from scrape.services.auth.auth_service import get_current_user
+
+logger = get_logger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/costs", response_model=List[ScrapeCost])
+async def get_scrape_costs(
+    days: int = Query(30, ge=1, le=365),
+    source: Optional[str] = None,
+    repo: ScrapeTaskRepository = Depends(get_read_repository(ScrapeTaskRepository)),
+    current_user: UserInDB = Depends(get_current_user),
+) -> List[ScrapeCost]:
+    try:
+        logger.info("Getting scrape costs for the last %s days", days)
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        return await repo.get_scrape_costs(since=since, source=source)
+    except Exception as e:
+        logger.exception("Error getting scrape costs. Exception: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error getting scrape costs"
+        ) from e
+
+
+@router.get("/{scrape_task_id}/timing", response_model=ScrapeTaskTiming)
+async def get_scrape_task_timing(
+    scrape_task_id: UUID,
+    repo: ScrapeTaskRepository = Depends(get_read_repository(ScrapeTaskRepository)),
+    current_user: UserInDB = Depends(get_current_user),
+) -> ScrapeTaskTiming:
+    try:
+        logger.info("Getting scrape task timing: %s", scrape_task_id)
+        task = await repo.get_scrape_task_timing(
+            scrape_task_id=scrape_task_id, user_id=current_user.id
+        )
+        if not task:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Scrape task not found"
+            )
+        return task
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(
+            "Error getting scrape task timing: %s. Exception: %s",
+            scrape_task_id, e
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error getting scrape task timing"
+        ) from e
@@ -1,21 +1,28 @@
-import asyncio
 from typing import List, Optional
 from pydantic import BaseModel
 from fastapi import APIRouter, Depends, HTTPException
-from scrape.core.logger import logger
-from scrape.db.database import get_repository
+from fastapi.responses import StreamingResponse
+from scrape.api.responses import encode_event, event_stream_response
+from scrape.core.logger import get_logger
+from scrape.db.database import get_repository, get_scrape_limiter
 from scrape.db.repositories.products.product import ProductRepository
 from scrape.db.repositories.retailers.retailer import RetailerRepository
 from scrape.db.repositories.products.price_history import PriceHistoryRepository
+from scrape.db.repositories.alert.alert import AlertRepository
+from scrape.db.repositories.notifications.outbox import NotificationOutboxRepository
+from scrape.db.repositories.scrape_tasks.scrape_task import ScrapeTaskRepository
+from scrape.db.scrape_slots import ScrapeLimiter, ScrapeSlotTimeout
 from scrape.services.scrapers.amazon_pyw_scraper import AmazonScraper
 from scrape.services.scrapers.selenium_amazon import AmazonScraper as SeleniumAmazonScraper
-from scrape.services.wrangling.cleaner import clean_products
-from scrape.models.products.product import ProductCreate
+from scrape.services.scrapers.stats import record_scrape_task
+from scrape.services.wrangling.normalizer import ProductNormalizer, normalize_products
+from scrape.services.ingestion.ingestion_service import ProductIngestion, ingest_products
+from scrape.services.ingestion.streaming import scrape_events
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 
-MAX_CONCURRENT_SCRAPES = 2
-scrape_semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCRAPES)
 
 class ScrapeRequest(BaseModel):
     query: str
@@ -28,10 +35,14 @@ async def selenium_scrape_endpoint(
     req: ScrapeRequest,
     product_repo: ProductRepository = Depends(get_repository(ProductRepository)),
     retailer_repo: RetailerRepository = Depends(get_repository(RetailerRepository)),
-    price_history_repo: PriceHistoryRepository = Depends(get_repository(PriceHistoryRepository))
+    price_history_repo: PriceHistoryRepository = Depends(get_repository(PriceHistoryRepository)),
+    alert_repo: AlertRepository = Depends(get_repository(AlertRepository)),
+    outbox_repo: NotificationOutboxRepository = Depends(get_repository(NotificationOutboxRepository)),
+    task_repo: ScrapeTaskRepository = Depends(get_repository(ScrapeTaskRepository)),
+    limiter: ScrapeLimiter = Depends(get_scrape_limiter)
 ):
     logger.info("Scraping Amazon search results for: %s", req.query)
-    async with scrape_semaphore:
+    async with limiter.slot("amazon"):
         scraper = SeleniumAmazonScraper(headless=req.headless)
         try:
             url = f"https://www.amazon.com/s?k={req.query}"
@@ -42,38 +53,23 @@ async def selenium_scrape_endpoint(
             if not retailer:
                 raise HTTPException(status_code=404, detail="Retailer not found")
 
-            raw_data = scraper.scrape_search_page(url, limit=20)
-            cleaned_data = clean_products(raw_data)
-
-            for product in cleaned_data:
-                product_data = ProductCreate(**product, retailer_id=retailer["id"])
-                is_created = await product_repo.create_product(
-                    product_data=product_data
-                )
-                
-                if is_created:
-                    await price_history_repo.create_price_history(
-                        product_id=is_created.id,
-                        price=product_data.price
-                    )
+            async with record_scrape_task(
+                task_repo, scraper.stats, retailer["id"], req.query
+            ) as task:
+                raw_data = scraper.scrape_search_page(url, limit=20)
 
-                if not is_created:
-                    logger.warning("Product already exists: %s", product_data.name)
-                    get_product = await product_repo.get_product_by_url(
-                        product_url=product_data.url
+                with scraper.stats.persist():
+                    products = await ingest_products(
+                        normalize_products(raw_data, currency="USD"), retailer["id"],
+                        product_repo, price_history_repo, alert_repo, outbox_repo
                     )
 
-                    if get_product:
-                        await price_history_repo.create_price_history(
-                            product_id=get_product.id,
-                            price=product_data.price
-                        )
-                    else:
-                        logger.warning("Product not found by URL: %s", product_data.url)
-                        continue
-
             logger.info("Scraped Amazon search results for: %s", req.query)
-            return {"scraped": len(cleaned_data), "products": cleaned_data}
+            return {
+                "scraped": len(products),
+                "products": products,
+                "task_id": task["id"] if task else None,
+            }
         except Exception as e:
             logger.exception("Error scraping Amazon: %s", e)
             raise HTTPException(status_code=500, detail="Server error") from e
@@ -86,14 +82,16 @@ async def scrape_endpoint(
     req: ScrapeRequest,
     product_repo: ProductRepository = Depends(get_repository(ProductRepository)),
     retailer_repo: RetailerRepository = Depends(get_repository(RetailerRepository)),
-    price_history_repo: PriceHistoryRepository = Depends(get_repository(PriceHistoryRepository))
+    price_history_repo: PriceHistoryRepository = Depends(get_repository(PriceHistoryRepository)),
+    alert_repo: AlertRepository = Depends(get_repository(AlertRepository)),
+    outbox_repo: NotificationOutboxRepository = Depends(get_repository(NotificationOutboxRepository)),
+    task_repo: ScrapeTaskRepository = Depends(get_repository(ScrapeTaskRepository)),
+    limiter: ScrapeLimiter = Depends(get_scrape_limiter)
 ):
     logger.info("Scraping Amazon search results for: %s", req.query)
-    async with scrape_semaphore:
+    async with limiter.slot("amazon"):
         scraper = AmazonScraper(proxies=req.proxies or [], headless=req.headless, max_retries=2)
         try:
-            raw_data = await scraper.scrape(req.query)
-            cleaned_data = clean_products(raw_data)
             retailer = await retailer_repo.get_retailer_by_url(
                 "https://www.amazon.com"
             )
@@ -101,40 +99,87 @@ async def scrape_endpoint(
             if not retailer:
                 raise HTTPException(status_code=404, detail="Retailer not found")
 
-            for product in cleaned_data:
-                product_data = ProductCreate(**product, retailer_id=retailer["id"])
-                is_created = await product_repo.create_product(
-                    product_data=product_data
-                )
-
-                if is_created:
-                    await price_history_repo.create_price_history(
-                        product_id=is_created.id,
-                        price=product_data.price
-                    )
+            async with record_scrape_task(
+                task_repo, scraper.stats, retailer["id"], req.query
+            ) as task:
+                raw_data = await scraper.scrape(req.query)
 
-                if not is_created:
-                    logger.warning("Product already exists: %s", product_data.name)
-                    get_product = await product_repo.get_product_by_url(
-                        product_url=product_data.url
+                with scraper.stats.persist():
+                    products = await ingest_products(
+                        normalize_products(raw_data, currency="USD"), retailer["id"],
+                        product_repo, price_history_repo, alert_repo, outbox_repo
                     )
 
-                    if get_product:
-                        await price_history_repo.create_price_history(
-                            product_id=get_product.id,
-                            price=product_data.price
-                        )
-                    else:
-                        logger.warning("Product not found by URL: %s", product_data.url)
-                        continue
-
             logger.info("Scraped Amazon search results for: %s", req.query)
-            return {"scraped": len(cleaned_data), "products": cleaned_data}
+            return {
+                "scraped": len(products),
+                "products": products,
+                "task_id": task["id"] if task else None,
+            }
         except Exception as e:
             logger.exception("Error scraping Amazon: %s", e)
             raise HTTPException(status_code=500, detail="Server error") from e
 
 
+@router.post("/playwright/stream", response_class=StreamingResponse)
+async def stream_scrape_endpoint(
+    req: ScrapeRequest,
+    product_repo: ProductRepository = Depends(get_repository(ProductRepository)),
+    retailer_repo: RetailerRepository = Depends(get_repository(RetailerRepository)),
+    price_history_repo: PriceHistoryRepository = Depends(get_repository(PriceHistoryRepository)),
+    alert_repo: AlertRepository = Depends(get_repository(AlertRepository)),
+    outbox_repo: NotificationOutboxRepository = Depends(get_repository(NotificationOutboxRepository)),
+    task_repo: ScrapeTaskRepository = Depends(get_repository(ScrapeTaskRepository)),
+    limiter: ScrapeLimiter = Depends(get_scrape_limiter)
+):
+    """
+    `/playwright` as server-sent events: each product is sent once it is
+    scraped and stored (events in scrape.services.ingestion.streaming),
+    after `progress` events for the queue and the start of the scrape.
+    Failures end the stream with an `error` event marked fatal.
+    """
+    logger.info("Streaming Amazon search results for: %s", req.query)
+    try:
+        retailer = await retailer_repo.get_retailer_by_url(
+            "https://www.amazon.com"
+        )
+    except Exception as e:
+        logger.exception("Error scraping Amazon: %s", e)
+        raise HTTPException(status_code=500, detail="Server error") from e
+
+    if not retailer:
+        raise HTTPException(status_code=404, detail="Retailer not found")
+
+    async def events():
+        yield encode_event("progress", {"stage": "queued"})
+        try:
+            async with limiter.slot("amazon"):
+                scraper = AmazonScraper(proxies=req.proxies or [], headless=req.headless, max_retries=2)
+                async with record_scrape_task(
+                    task_repo, scraper.stats, retailer["id"], req.query
+                ) as task:
+                    yield encode_event("progress", {
+                        "stage": "scraping", "task_id": task["id"] if task else None
+                    })
+                    ingestion = ProductIngestion(
+                        retailer["id"], product_repo, price_history_repo, alert_repo, outbox_repo
+                    )
+                    async for event, data in scrape_events(
+                        scraper.iter_products(req.query), ProductNormalizer(currency="USD"),
+                        ingestion, scraper.stats
+                    ):
+                        yield encode_event(event, data)
+
+            logger.info("Streamed Amazon search results for: %s", req.query)
+        except ScrapeSlotTimeout as e:
+            yield encode_event("error", {"detail": str(e), "fatal": True})
+        except Exception as e:
+            logger.exception("Error streaming Amazon scrape: %s", e)
+            yield encode_event("error", {"detail": "Server error", "fatal": True})
+
+    return event_stream_response(events())
+
+
 # @router.post("/")
 # async def scrape_amazon(
 #     query: str,
@@ -1,20 +1,28 @@
-import asyncio
 from typing import Optional
 from pydantic import BaseModel
 from fastapi import APIRouter, Depends, HTTPException, Query
-from scrape.core.logger import logger
-from scrape.db.database import get_repository
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from scrape.api.responses import encode_event, event_stream_response
+from scrape.core.logger import get_logger
+from scrape.db.database import get_repository, get_scrape_limiter
 from scrape.db.repositories.products.product import ProductRepository
 from scrape.db.repositories.retailers.retailer import RetailerRepository
 from scrape.db.repositories.products.price_history import PriceHistoryRepository
+from scrape.db.repositories.alert.alert import AlertRepository
+from scrape.db.repositories.notifications.outbox import NotificationOutboxRepository
+from scrape.db.repositories.scrape_tasks.scrape_task import ScrapeTaskRepository
+from scrape.db.scrape_slots import ScrapeLimiter, ScrapeSlotTimeout
 from scrape.services.scrapers.selenium_jumia import JumiaScraper
-from scrape.services.wrangling.cleaner import clean_products
-from scrape.models.products.product import ProductCreate
+from scrape.services.scrapers.stats import record_scrape_task
+from scrape.services.wrangling.normalizer import ProductNormalizer, normalize_products
+from scrape.services.ingestion.ingestion_service import ProductIngestion, ingest_products
+from scrape.services.ingestion.streaming import scrape_events
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 
-MAX_CONCURRENT_SCRAPES = 2
-scrape_semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCRAPES)
 
 class ScrapeRequest(BaseModel):
     query: str
@@ -26,11 +34,15 @@ async def scrape_jumia(
     query: str = Query(..., example="laptops"),
     product_repo: ProductRepository = Depends(get_repository(ProductRepository)),
     retailer_repo: RetailerRepository = Depends(get_repository(RetailerRepository)),
-    price_history_repo: PriceHistoryRepository = Depends(get_repository(PriceHistoryRepository))
+    price_history_repo: PriceHistoryRepository = Depends(get_repository(PriceHistoryRepository)),
+    alert_repo: AlertRepository = Depends(get_repository(AlertRepository)),
+    outbox_repo: NotificationOutboxRepository = Depends(get_repository(NotificationOutboxRepository)),
+    task_repo: ScrapeTaskRepository = Depends(get_repository(ScrapeTaskRepository)),
+    limiter: ScrapeLimiter = Depends(get_scrape_limiter)
 ):
     logger.info("Scraping Amazon search results for: %s", query)
     # https://www.jumia.com.ng/phones-tablets/
-    async with scrape_semaphore:
+    async with limiter.slot("jumia"):
         scraper = JumiaScraper(headless=True)
         try:
             url = f"https://www.jumia.com.ng/{query}"
@@ -41,40 +53,87 @@ async def scrape_jumia(
             if not retailer:
                 raise HTTPException(status_code=404, detail="Retailer not found")
 
-            raw_data = scraper.fetch_products(url, timeout=60)
-            cleaned_data = clean_products(raw_data)
-
-            for product in cleaned_data:
-                product_data = ProductCreate(**product, retailer_id=retailer["id"])
-                is_created = await product_repo.create_product(
-                    product_data=product_data
-                )
+            async with record_scrape_task(
+                task_repo, scraper.stats, retailer["id"], query
+            ) as task:
+                raw_data = scraper.fetch_products(url, timeout=60)
 
-                if is_created:
-                    await price_history_repo.create_price_history(
-                        product_id=is_created.id,
-                        price=product_data.price
+                with scraper.stats.persist():
+                    products = await ingest_products(
+                        normalize_products(raw_data, currency="NGN"), retailer["id"],
+                        product_repo, price_history_repo, alert_repo, outbox_repo
                     )
 
-                if not is_created:
-                    logger.warning("Product already exists: %s", product_data.name)
-                    get_product = await product_repo.get_product_by_url(
-                        product_url=product_data.url
-                    )
-
-                    if get_product:
-                        await price_history_repo.create_price_history(
-                            product_id=get_product.id,
-                            price=product_data.price
-                        )
-                    else:
-                        logger.warning("Product not found by URL: %s", product_data.url)
-                        continue
-
             logger.info("Scraped Amazon search results for: %s", query)
-            return {"scraped": len(cleaned_data), "products": cleaned_data}
+            return {
+                "scraped": len(products),
+                "products": products,
+                "task_id": task["id"] if task else None,
+            }
         except Exception as e:
             logger.exception("Error scraping Amazon search results for: %s", e)
             raise HTTPException(status_code=500, detail="Server error") from e
         finally:
             scraper.close()
+
+
+@router.post("/stream", response_class=StreamingResponse)
+async def stream_scrape_jumia(
+    query: str = Query(..., example="laptops"),
+    product_repo: ProductRepository = Depends(get_repository(ProductRepository)),
+    retailer_repo: RetailerRepository = Depends(get_repository(RetailerRepository)),
+    price_history_repo: PriceHistoryRepository = Depends(get_repository(PriceHistoryRepository)),
+    alert_repo: AlertRepository = Depends(get_repository(AlertRepository)),
+    outbox_repo: NotificationOutboxRepository = Depends(get_repository(NotificationOutboxRepository)),
+    task_repo: ScrapeTaskRepository = Depends(get_repository(ScrapeTaskRepository)),
+    limiter: ScrapeLimiter = Depends(get_scrape_limiter)
+):
+    """
+    `/` as server-sent events, like `/amazon/playwright/stream`. Selenium
+    blocks, so the driver runs on the threadpool, one listing item per call.
+    """
+    logger.info("Streaming Jumia search results for: %s", query)
+    try:
+        retailer = await retailer_repo.get_retailer_by_url(
+            "https://www.jumia.com.ng"
+        )
+    except Exception as e:
+        logger.exception("Error scraping Jumia: %s", e)
+        raise HTTPException(status_code=500, detail="Server error") from e
+
+    if not retailer:
+        raise HTTPException(status_code=404, detail="Retailer not found")
+
+    async def events():
+        yield encode_event("progress", {"stage": "queued"})
+        try:
+            async with limiter.slot("jumia"):
+                scraper = await run_in_threadpool(JumiaScraper, headless=True)
+                try:
+                    async with record_scrape_task(
+                        task_repo, scraper.stats, retailer["id"], query
+                    ) as task:
+                        yield encode_event("progress", {
+                            "stage": "scraping", "task_id": task["id"] if task else None
+                        })
+                        ingestion = ProductIngestion(
+                            retailer["id"], product_repo, price_history_repo, alert_repo, outbox_repo
+                        )
+                        items = iterate_in_threadpool(
+                            scraper.iter_products(f"https://www.jumia.com.ng/{query}", timeout=60)
+                        )
+                        async for event, data in scrape_events(
+                            items, ProductNormalizer(currency="NGN"), ingestion, scraper.stats
+                        ):
+                            yield encode_event(event, data)
+                finally:
+                    await run_in_threadpool(scraper.close)
+
+            logger.info("Streamed Jumia search results for: %s", query)
+        except ScrapeSlotTimeout as e:
+            yield encode_event("error", {"detail": str(e), "fatal": True})
+        except Exception as e:
+            logger.exception("Error streaming Jumia scrape: %s", e)
+            yield encode_event("error", {"detail": "Server error", "fatal": True})
+
+    return event_stream_response(events())
@@ -1,23 +1,29 @@
 import secrets
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from scrape.core.logger import logger
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from scrape.core.logger import get_logger
+from scrape.db.pagination import TotalMode, InvalidCursorError
 from scrape.db.repositories.users.user import UserRepository as UsersRepo
 from scrape.models.users.user import (
-    User, UserResponse, UserUpdateRequest,
+    User, UserResponse, UserList, UserUpdateRequest,
     UserPasswordUpdateRequest, UserInDB,
     ForgotPasswordRequest, ResetPasswordRequest
 )
 from scrape.services.auth.auth_service import (
     get_current_user, AuthPassword, AppJWTBearer
 )
-from scrape.services.email.email_service import reset_password_send_email
+from scrape.services.auth.principal_cache import principal_cache
+from scrape.services.email.email_service import password_reset_notification
+from scrape.db.repositories.notifications.outbox import NotificationOutboxRepository
 from scrape.db.database import get_repository
 from scrape.models.users.token import AuthToken
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import datetime, timezone, timedelta
 from scrape.core.configs import ACCESS_TOKEN_EXPIRE_MINS
 
+logger = get_logger(__name__)
+
 router = APIRouter()
 
 
@@ -55,26 +61,31 @@ async def create_user(
         ) from e
 
 
-@router.get("/", response_model=list[UserResponse])
+@router.get("/", response_model=UserList)
 async def get_all_users(
-    limit: int = 10,
-    offset: int = 0,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    total: TotalMode = TotalMode.NONE,
     user_repo: UsersRepo = Depends(get_repository(UsersRepo)),
     current_user: UserInDB = Depends(get_current_user)
 ):
     try:
-        logger.info("Getting all users, limit: %s, offset: %s", limit, offset)
+        logger.info("Getting all users, limit: %s, cursor: %s", limit, cursor)
         if not current_user.is_superuser or not current_user.is_admin:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Forbidden, user is not admin or superuser"
             )
-        users = await user_repo.get_all_users(limit, offset)
-
-        if not users:
-            return []
+        users = await user_repo.get_all_users(limit=limit, cursor=cursor, total=total)
 
         return users
+    except HTTPException:
+        raise
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        ) from e
     except Exception as e:
         logger.exception("Error: %s", e)
         raise HTTPException(
@@ -151,6 +162,8 @@ async def delete_user_by_id(
                 detail="User not found"
             )
 
+        principal_cache.invalidate(user_id)
+
         return
     except HTTPException:
         raise
@@ -167,6 +180,7 @@ async def forgot_password(
     payload: ForgotPasswordRequest,
     request: Request,
     user_repo: UsersRepo = Depends(get_repository(UsersRepo)),
+    outbox_repo: NotificationOutboxRepository = Depends(get_repository(NotificationOutboxRepository)),
 ):
     try:
         logger.info("Forgot password email: %s", payload.email)
@@ -176,20 +190,21 @@ async def forgot_password(
 
         token = secrets.token_urlsafe(32)
         expires_at = datetime.now(timezone.utc) + timedelta(minutes=30)
-
-        await user_repo.reset_password_token(
-            user_id=user.id, token=token,
-            expires_at=expires_at
-        )
-
         base_url = str(request.base_url).rstrip("/")
         reset_link = f"{base_url}/v1/scraper/users/reset-password/confirm?token={token}"
-        await reset_password_send_email(
-            to=user.email,
-            subject="Password Reset Request",
-            body=f"Click here to reset your password: {reset_link}"
-        )
+
+        async with user_repo.db.transaction():
+            await user_repo.reset_password_token(
+                user_id=user.id, token=token,
+                expires_at=expires_at
+            )
+            await outbox_repo.enqueue([
+                password_reset_notification(to=user.email, reset_link=reset_link)
+            ])
+
         return {"message": "Password reset email sent"}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("Error: %s", e)
         raise HTTPException(
@@ -204,7 +219,7 @@ async def reset_password_confirm(
     user_repo: UsersRepo = Depends(get_repository(UsersRepo)),
 ):
     try:
-        logger.info("Confirming reset password token: %s", token)
+        logger.info("Confirming reset password token")
         result = await user_repo.get_reset_password_token(token=token)
 
         if not result:
@@ -213,9 +228,10 @@ async def reset_password_confirm(
         now = datetime.now(timezone.utc)
         if result.expires_at < now:
             raise HTTPException(400, "Expired token")
-        print (result.token)
 
         return {"message": "Password reset token is valid"}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("Error: %s", e)
         raise HTTPException(
@@ -230,7 +246,7 @@ async def reset_password(
     user_repo: UsersRepo = Depends(get_repository(UsersRepo)),
 ):
     try:
-        logger.info("Resetting password token: %s", payload.token)
+        logger.info("Resetting password")
         result = await user_repo.get_reset_password_token(token=payload.token)
         if not result or result.expires_at < datetime.now(timezone.utc):
             raise HTTPException(400, "Invalid or expired token")
@@ -245,9 +261,12 @@ async def reset_password(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
+        principal_cache.invalidate(user_id)
         await user_repo.delete_reset_password_token(token=payload.token)
 
         return {"message": "Password updated successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("Error: %s", e)
         raise HTTPException(
@@ -278,7 +297,7 @@ async def update_user_password(
                 detail="User not found"
             )
 
-        if not AuthPassword().verify_password(user.old_password, get_user.hashed_password):
+        if not await AuthPassword().verify_password(user.old_password, get_user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials"
@@ -292,6 +311,8 @@ async def update_user_password(
                 detail="User not found"
             )
 
+        principal_cache.invalidate(user_id)
+
         return UserResponse(**updated_pass.model_dump())
     except HTTPException:
         raise
@@ -324,6 +345,8 @@ async def update_user(
                 detail="User not found"
             )
 
+        principal_cache.invalidate(user_id)
+
         return UserResponse(**updated_user.model_dump())
     except HTTPException:
         raise
@@ -344,7 +367,7 @@ async def login(
         logger.info("Logging in user email: %s", data.username)
         user = await user_repo.get_user_by_email(email=data.username)
 
-        if not user or not AuthPassword().verify_password(data.password, user.hashed_password):
+        if not user or not await AuthPassword().verify_password(data.password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials"
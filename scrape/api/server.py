@@ -6,10 +6,17 @@ from starlette.responses import JSONResponse
 from fastapi import FastAPI, Request
 from scrape.core import configs
 from scrape.core import tasks
-from scrape.core.logger import logger
+from scrape.core.logger import get_logger
+from scrape.api.middleware import MetricsMiddleware
 from scrape.api.routes.health_route import router as health_router
+from scrape.api.routes.metrics_route import router as metrics_router
 from scrape.api.routes.scrapers.routes import router as scrapers_router
 from scrape.api.routes.products.routes import router as products_router
+from scrape.api.routes.scrape_tasks.routes import router as scrape_tasks_router
+from scrape.api.routes.analytics.routes import router as analytics_router
+from scrape.db.scrape_slots import ScrapeSlotTimeout
+
+logger = get_logger(__name__)
 
 BASE_PATH = "/v1/scraper"
 
@@ -38,13 +45,17 @@ def get_application():
     )
 
     fast_api.add_middleware(SessionMiddleware, secret_key=configs.SECRET_KEY)
+    fast_api.add_middleware(MetricsMiddleware)
 
     fast_api.add_event_handler("startup", tasks.create_start_app_handler(fast_api))
     fast_api.add_event_handler("shutdown", tasks.create_stop_app_handler(fast_api))
 
+    fast_api.include_router(metrics_router)
     fast_api.include_router(health_router, prefix=BASE_PATH)
     fast_api.include_router(scrapers_router, prefix=BASE_PATH)
     fast_api.include_router(products_router, prefix=BASE_PATH)
+    fast_api.include_router(scrape_tasks_router, prefix=BASE_PATH)
+    fast_api.include_router(analytics_router, prefix=BASE_PATH)
 
     return fast_api
 
@@ -59,14 +70,30 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     return JSONResponse(status_code=status_code, content=detail)
 
 
+@app.exception_handler(ScrapeSlotTimeout)
+async def scrape_slot_timeout_handler(request: Request, exc: ScrapeSlotTimeout):
+    logger.warning(f"{exc}, url path: {request.url.path}")
+    return JSONResponse(
+        status_code=503,
+        content=f"Too many {exc.retailer} scrapes in progress, try again later",
+        headers={"Retry-After": "60"},
+    )
+
+
 def main():
     logger.info("Starting E-commerce Product Price Tracker Application API Platform...")
+    workers = configs.WEB_CONCURRENCY
+    if workers > 1 and not configs.METRICS_DIR:
+        logger.warning("WEB_CONCURRENCY > 1 without METRICS_DIR, /metrics only shows one worker")
+    # Each worker has its own principal cache; a user change reaches the
+    # others only when their entry expires, after PRINCIPAL_CACHE_TTL_SECS
     uvicorn.run(
         "scrape.api.server:app",
         host="0.0.0.0",
         port=configs.PORT,
-        reload=False if configs.ENV.startswith("deployment") else True,
-        workers=1
+        # uvicorn ignores `workers` when reloading
+        reload=workers == 1 and not configs.ENV.startswith("deployment"),
+        workers=workers
     )
 
 
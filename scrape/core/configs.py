@@ -22,3 +22,49 @@ AWS_REGION = config("AWS_REGION", cast=str, default="us-east-1")
 SES_SENDER = config("SES_SENDER", cast=str, default="sender@development.com")
 AWS_ACCESS_KEY_ID = config("AWS_ACCESS_KEY_ID", cast=Secret, default="development")
 AWS_SECRET_ACCESS_KEY = config("AWS_SECRET_ACCESS_KEY", cast=Secret, default="development")
+ALERT_INDEX_VERIFY_SECS = config("ALERT_INDEX_VERIFY_SECS", cast=int, default=300)
+NOTIFICATION_PROVIDER = config("NOTIFICATION_PROVIDER", cast=str, default="ses")
+OUTBOX_POLL_SECS = config("OUTBOX_POLL_SECS", cast=float, default=2.0)
+OUTBOX_BATCH_SIZE = config("OUTBOX_BATCH_SIZE", cast=int, default=100)
+OUTBOX_CONCURRENCY = config("OUTBOX_CONCURRENCY", cast=int, default=8)
+OUTBOX_MAX_ATTEMPTS = config("OUTBOX_MAX_ATTEMPTS", cast=int, default=5)
+OUTBOX_LEASE_SECS = config("OUTBOX_LEASE_SECS", cast=int, default=120)
+SES_SENDS_PER_SEC = config("SES_SENDS_PER_SEC", cast=float, default=14.0)
+SENDGRID_REQUESTS_PER_SEC = config("SENDGRID_REQUESTS_PER_SEC", cast=float, default=5.0)
+PRINCIPAL_CACHE_TTL_SECS = config("PRINCIPAL_CACHE_TTL_SECS", cast=float, default=30.0)
+PRINCIPAL_CACHE_MAX_SIZE = config("PRINCIPAL_CACHE_MAX_SIZE", cast=int, default=10000)
+TOKEN_CACHE_MAX_SIZE = config("TOKEN_CACHE_MAX_SIZE", cast=int, default=50000)
+BCRYPT_ROUNDS = config("BCRYPT_ROUNDS", cast=int, default=12)
+PASSWORD_HASH_WORKERS = config("PASSWORD_HASH_WORKERS", cast=int, default=2)
+PASSWORD_HASH_MAX_PENDING = config("PASSWORD_HASH_MAX_PENDING", cast=int, default=32)
+LOG_LEVEL = config("LOG_LEVEL", cast=str, default="INFO")
+LOG_LEVELS = config("LOG_LEVELS", cast=str, default="")
+LOG_FORMAT = config("LOG_FORMAT", cast=str, default="json")
+LOG_SAMPLING = config("LOG_SAMPLING", cast=str, default="")
+METRICS_DIR = config("METRICS_DIR", cast=str, default="")
+METRICS_FLUSH_SECS = config("METRICS_FLUSH_SECS", cast=float, default=5.0)
+SLOW_QUERY_MS = config("SLOW_QUERY_MS", cast=float, default=200.0)
+SLOW_QUERY_EXPLAIN_RATE = config("SLOW_QUERY_EXPLAIN_RATE", cast=float, default=0.0)
+DB_POOL_MIN_SIZE = config("DB_POOL_MIN_SIZE", cast=int, default=2)
+DB_POOL_MAX_SIZE = config("DB_POOL_MAX_SIZE", cast=int, default=10)
+DB_POOL_MAX_QUERIES = config("DB_POOL_MAX_QUERIES", cast=int, default=50000)
+DB_POOL_MAX_INACTIVE_SECS = config("DB_POOL_MAX_INACTIVE_SECS", cast=float, default=300.0)
+DB_STATEMENT_CACHE_SIZE = config("DB_STATEMENT_CACHE_SIZE", cast=int, default=256)
+DB_COMMAND_TIMEOUT = config("DB_COMMAND_TIMEOUT", cast=float, default=60.0)
+DATABASE_REPLICA_URLS = config("DATABASE_REPLICA_URLS", cast=CommaSeparatedStrings, default="")
+REPLICA_MAX_LAG_SECS = config("REPLICA_MAX_LAG_SECS", cast=float, default=5.0)
+REPLICA_LAG_CHECK_SECS = config("REPLICA_LAG_CHECK_SECS", cast=float, default=2.0)
+WEB_CONCURRENCY = config("WEB_CONCURRENCY", cast=int, default=1)
+SCRAPE_CONCURRENCY = config("SCRAPE_CONCURRENCY", cast=CommaSeparatedStrings, default="amazon=2,jumia=2")
+SCRAPE_DEFAULT_CONCURRENCY = config("SCRAPE_DEFAULT_CONCURRENCY", cast=int, default=1)
+SCRAPE_SLOT_TIMEOUT_SECS = config("SCRAPE_SLOT_TIMEOUT_SECS", cast=float, default=300.0)
+SCRAPE_SLOT_POLL_SECS = config("SCRAPE_SLOT_POLL_SECS", cast=float, default=1.0)
+EXPORT_CHUNK_ROWS = config("EXPORT_CHUNK_ROWS", cast=int, default=5000)
+SNAPSHOT_DIR = config("SNAPSHOT_DIR", cast=str, default="snapshots/price_history")
+SNAPSHOT_ROW_GROUP_ROWS = config("SNAPSHOT_ROW_GROUP_ROWS", cast=int, default=131072)
+SNAPSHOT_SETTLE_SECS = config("SNAPSHOT_SETTLE_SECS", cast=float, default=300.0)
+SNAPSHOT_COMPRESSION = config("SNAPSHOT_COMPRESSION", cast=str, default="zstd")
+MATCH_NUM_PERM = config("MATCH_NUM_PERM", cast=int, default=80)
+MATCH_BANDS = config("MATCH_BANDS", cast=int, default=16)
+MATCH_MIN_SIMILARITY = config("MATCH_MIN_SIMILARITY", cast=float, default=0.6)
+MATCH_MAX_BUCKET = config("MATCH_MAX_BUCKET", cast=int, default=100)
@@ -1,15 +1,142 @@
 """
 Centralized logging layer for the application
+
+Records are handed to a queue on the calling thread and formatted and
+written by a single listener thread, so request handlers never wait on
+stderr. Levels can be set per module and high-volume messages sampled.
 """
 
+import atexit
+import json
 import logging
+import queue
+from collections import OrderedDict
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict
+from scrape.core.configs import LOG_LEVEL, LOG_LEVELS, LOG_FORMAT, LOG_SAMPLING
 
-class LogHandler:
-    logger = logging.getLogger("E-commerce-Product-Tracker")
-    logger.setLevel(logging.DEBUG)
+APP_LOGGER = "scrape"
+
+# Message templates the sampling filter keeps a count for
+SAMPLED_MESSAGES_MAX = 10_000
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+def _parse_levels(spec: str) -> Dict[str, str]:
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps one in N records below WARNING for the configured logger prefixes,
+    counted per message template so rare messages are not starved by
+    frequent ones. Only the most recently seen `max_messages` templates
+    keep a count; messages built with f-strings are all distinct, and
+    would otherwise grow the table without bound.
+    """
+
+    def __init__(self, rates: Dict[str, int], max_messages: int = SAMPLED_MESSAGES_MAX) -> None:
+        super().__init__()
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+        self.max_messages = max_messages
+        self.counters: "OrderedDict[tuple, int]" = OrderedDict()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        for prefix, rate in self.rates:
+            if record.name.startswith(prefix):
+                if rate <= 1:
+                    return True
+                key = (record.name, record.msg)
+                count = self.counters.pop(key, 0) + 1
+                self.counters[key] = count
+                if len(self.counters) > self.max_messages:
+                    self.counters.popitem(last=False)
+                return count % rate == 1
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Interpolates the message on the caller's thread (arguments may be
+    mutated after the call returns) but leaves all formatting to the
+    listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _stream_handler() -> logging.Handler:
     handler = logging.StreamHandler()
-    formatter = logging.Formatter('%(levelname)s:     %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    if LOG_FORMAT == "json":
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(levelname)s:     %(message)s'))
+    return handler
+
+
+def _queue_handler(log_queue: queue.SimpleQueue) -> QueueHandler:
+    handler = DeferredQueueHandler(log_queue)
+    rates = {name: int(rate) for name, rate in _parse_levels(LOG_SAMPLING).items()}
+    if rates:
+        handler.addFilter(SamplingFilter(rates))
+    return handler
+
+
+class LogHandler:
+    logger = logging.getLogger(APP_LOGGER)
+    logger.setLevel(LOG_LEVEL.upper())
+    logger.propagate = False
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _queue_handler(log_queue)
+    logger.addHandler(queue_handler)
+
+    listener = QueueListener(log_queue, _stream_handler(), respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+
+for _name, _level in _parse_levels(LOG_LEVELS).items():
+    logging.getLogger(_name).setLevel(_level)
 
 logger = LogHandler.logger
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Module logger under the application logger, e.g. get_logger(__name__)."""
+    if name != APP_LOGGER and not name.startswith(APP_LOGGER + "."):
+        name = f"{APP_LOGGER}.{name}"
+    return logging.getLogger(name)
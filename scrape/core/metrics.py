@@ -0,0 +1,376 @@
+"""
+In-process metrics registry rendered in the Prometheus text format
+
+Every worker keeps its own counters in plain dicts; recording a value is a
+dict update under a lock. With several uvicorn workers each one also
+flushes a snapshot to METRICS_DIR every METRICS_FLUSH_SECS, and whichever
+worker answers /metrics merges its live values with the other workers'
+snapshots.
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from scrape.core.configs import METRICS_DIR, METRICS_FLUSH_SECS
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SCRAPE_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# A worker that has not flushed for this long is treated as gone: its
+# counters are kept (they are cumulative) but its gauges are dropped.
+STALE_AFTER_SECS = METRICS_FLUSH_SECS * 6
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def snapshot(self) -> dict:
+        return {
+            "type": self.kind,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "samples": [[list(key), child.value()] for key, child in list(self._children.items())],
+        }
+
+
+class _CounterChild:
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self, lock: threading.Lock) -> None:
+        self._value = 0.0
+        self._lock = lock
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def value(self) -> float:
+        return self._value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild(self._lock)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+
+class Gauge(_Metric):
+    """
+    Either set directly or computed at collection time from a callback
+    returning {label values: value}.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._callbacks: List[Callable[[], Dict[Tuple[str, ...], float]]] = []
+
+    def _new_child(self):
+        return _GaugeChild(self._lock)
+
+    def set_function(self, callback: Callable[[], Dict[Tuple[str, ...], float]]) -> None:
+        self._callbacks.append(callback)
+
+    def snapshot(self) -> dict:
+        snapshot = super().snapshot()
+        for callback in self._callbacks:
+            try:
+                for key, value in callback().items():
+                    snapshot["samples"].append([list(key), value])
+            except Exception:
+                continue
+        return snapshot
+
+
+class _HistogramChild:
+    __slots__ = ("_buckets", "_counts", "_sum", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...], lock: threading.Lock) -> None:
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = lock
+
+    def observe(self, amount: float) -> None:
+        index = bisect_left(self._buckets, amount)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += amount
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def value(self) -> list:
+        return [list(self._counts), self._sum]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets, self._lock)
+
+    def snapshot(self) -> dict:
+        snapshot = super().snapshot()
+        snapshot["buckets"] = list(self.buckets)
+        return snapshot
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    # Multi-worker support
+
+    def _snapshot_path(self, pid: int) -> str:
+        return os.path.join(METRICS_DIR, f"metrics_{pid}.json")
+
+    def flush(self, final: bool = False) -> None:
+        """
+        Atomically writes this worker's snapshot. A final flush (on
+        shutdown) leaves out gauges, which only make sense while the
+        worker is alive.
+        """
+        if not METRICS_DIR:
+            return
+        snapshot = self.snapshot()
+        if final:
+            snapshot = {n: m for n, m in snapshot.items() if m["type"] != "gauge"}
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = self._snapshot_path(os.getpid())
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp, path)
+
+    def _worker_snapshots(self) -> Iterable[dict]:
+        own = self._snapshot_path(os.getpid())
+        now = time.time()
+        for entry in os.scandir(METRICS_DIR):
+            if not entry.name.endswith(".json") or entry.path == own:
+                continue
+            try:
+                with open(entry.path, encoding="utf-8") as f:
+                    snapshot = json.load(f)
+                stale = now - entry.stat().st_mtime > STALE_AFTER_SECS
+            except (OSError, ValueError):
+                continue
+            if stale:
+                snapshot = {n: m for n, m in snapshot.items() if m["type"] != "gauge"}
+            yield snapshot
+
+    def collect(self) -> Dict[str, dict]:
+        """This worker's live values merged with every other worker's snapshot."""
+        merged = self.snapshot()
+        if not METRICS_DIR or not os.path.isdir(METRICS_DIR):
+            return merged
+
+        for snapshot in self._worker_snapshots():
+            for name, metric in snapshot.items():
+                target = merged.setdefault(name, {**metric, "samples": []})
+                if target["type"] != metric["type"]:
+                    continue
+                samples = {tuple(key): value for key, value in target["samples"]}
+                for key, value in metric["samples"]:
+                    key = tuple(key)
+                    current = samples.get(key)
+                    if current is None:
+                        samples[key] = value
+                    elif metric["type"] == "histogram":
+                        counts = [a + b for a, b in zip(current[0], value[0])]
+                        samples[key] = [counts, current[1] + value[1]]
+                    else:
+                        samples[key] = current + value
+                target["samples"] = [[list(key), value] for key, value in samples.items()]
+        return merged
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name, metric in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {_escape(metric['help'])}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            labelnames = metric["labelnames"]
+            for key, value in metric["samples"]:
+                if metric["type"] != "histogram":
+                    lines.append(f"{name}{_labels(labelnames, key)} {_number(value)}")
+                    continue
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip(metric["buckets"] + ["+Inf"], counts):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else _number(bound)
+                    lines.append(
+                        f"{name}_bucket{_labels(labelnames, key, ('le', le))} {cumulative}"
+                    )
+                lines.append(f"{name}_sum{_labels(labelnames, key)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labelnames, key)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: Optional[tuple] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+registry = Registry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "API request latency by route",
+    ("method", "route", "status"),
+)
+SCRAPE_STAGE_SECONDS = registry.histogram(
+    "scrape_stage_duration_seconds", "Time spent in each scrape stage",
+    ("scraper", "stage"), buckets=SCRAPE_BUCKETS,
+)
+SCRAPE_PAGES_FETCHED = registry.counter(
+    "scrape_pages_fetched_total", "Pages loaded by the scrapers", ("scraper",)
+)
+SCRAPE_CAPTCHA_HITS = registry.counter(
+    "scrape_captcha_hits_total", "CAPTCHA or bot-check pages encountered", ("scraper",)
+)
+SCRAPE_PROXY_FAILURES = registry.counter(
+    "scrape_proxy_failures_total", "Proxies blacklisted after a failed attempt", ("scraper",)
+)
+SCRAPE_ITEMS_REJECTED = registry.counter(
+    "scrape_items_rejected_total", "Scraped items dropped by normalization", ("reason",)
+)
+SCRAPE_FIRST_RESULT_SECONDS = registry.histogram(
+    "scrape_first_result_seconds", "Time from a streaming scrape's start to its first stored product",
+    ("scraper",), buckets=SCRAPE_BUCKETS,
+)
+SCRAPE_QUEUE_DEPTH = registry.gauge(
+    "scrape_queue_depth", "Scrape requests waiting on the concurrency limit", ("scraper",)
+)
+SCRAPE_IN_PROGRESS = registry.gauge(
+    "scrape_in_progress", "Scrapes currently holding a concurrency slot", ("scraper",)
+)
+DB_POOL_IN_USE = registry.gauge(
+    "db_pool_connections_in_use", "Database pool connections checked out"
+)
+DB_POOL_SIZE = registry.gauge(
+    "db_pool_connections", "Database pool connections open"
+)
+DB_POOL_WAITING = registry.gauge(
+    "db_pool_waiting", "Tasks waiting for a database pool connection"
+)
+
+DB_QUERY_SECONDS = registry.histogram(
+    "db_query_duration_seconds", "Repository query latency by SQL constant", ("query",)
+)
+DB_QUERY_ROWS = registry.histogram(
+    "db_query_rows", "Rows returned by repository queries", ("query",),
+    buckets=(0, 1, 5, 10, 50, 100, 500, 1000, 5000),
+)
+DB_SLOW_QUERIES = registry.counter(
+    "db_slow_queries_total", "Queries slower than SLOW_QUERY_MS", ("query",)
+)
+DB_REPLICA_LAG = registry.gauge(
+    "db_replica_lag_seconds", "Replication lag per read replica, -1 when unreachable or not streaming", ("replica",)
+)
+
+
+def watch_database_pool(database) -> None:
+    """Reads the asyncpg pool behind a `databases.Database` on each collection."""
+
+    def pool():
+        return getattr(getattr(database, "_backend", None), "_pool", None)
+
+    def in_use():
+        p = pool()
+        return {(): p.get_size() - p.get_idle_size()} if p else {}
+
+    def size():
+        p = pool()
+        return {(): p.get_size()} if p else {}
+
+    def waiting():
+        p = pool()
+        getters = getattr(getattr(p, "_queue", None), "_getters", None)
+        return {(): len(getters)} if getters is not None else {}
+
+    DB_POOL_IN_USE.set_function(in_use)
+    DB_POOL_SIZE.set_function(size)
+    DB_POOL_WAITING.set_function(waiting)
+
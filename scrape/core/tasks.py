@@ -1,6 +1,39 @@
+import asyncio
 from typing import Callable
 from fastapi import FastAPI
-from scrape.db.tasks import connect_to_db, close_db_connection
+from scrape.core.configs import ALERT_INDEX_VERIFY_SECS, METRICS_DIR, METRICS_FLUSH_SECS
+from scrape.core.logger import get_logger
+from scrape.core.metrics import registry, watch_database_pool
+from scrape.db.tasks import (
+    connect_to_db, close_db_connection, connect_to_replicas, close_replica_connections,
+    create_scrape_limiter, close_scrape_limiter, primary_url
+)
+from scrape.db.repositories.alert.alert import AlertRepository
+from scrape.services.alerts.alert_index import alert_index
+from scrape.services.alerts.alert_listener import AlertIndexListener
+from scrape.services.email.outbox_dispatcher import OutboxDispatcher
+
+logger = get_logger(__name__)
+
+
+async def verify_alert_index(app: FastAPI) -> None:
+    while True:
+        await asyncio.sleep(ALERT_INDEX_VERIFY_SECS)
+        try:
+            await alert_index.verify(AlertRepository(app.state._db).get_untriggered_alerts)
+        except Exception as e:
+            logger.error("Alert index verification failed")
+            logger.error(e)
+
+
+async def flush_metrics() -> None:
+    while True:
+        await asyncio.sleep(METRICS_FLUSH_SECS)
+        try:
+            await asyncio.to_thread(registry.flush)
+        except Exception as e:
+            logger.error("Could not flush metrics snapshot")
+            logger.error(e)
 
 
 def create_start_app_handler(
@@ -8,10 +41,41 @@ def create_start_app_handler(
 ) -> Callable:
     async def start_app() -> None:
         await connect_to_db(app)
+        await connect_to_replicas(app)
+        create_scrape_limiter(app)
+        watch_database_pool(app.state._db)
+        # Loads the index once it listens for other workers' changes
+        app.state._alert_listener_task = asyncio.create_task(AlertIndexListener(
+            primary_url(), AlertRepository(app.state._db).get_untriggered_alerts
+        ).run())
+        app.state._alert_index_task = asyncio.create_task(verify_alert_index(app))
+        app.state._outbox_task = asyncio.create_task(OutboxDispatcher(app.state._db).run())
+        if app.state._replicas.replicas:
+            app.state._replica_lag_task = asyncio.create_task(app.state._replicas.monitor())
+        if METRICS_DIR:
+            app.state._metrics_task = asyncio.create_task(flush_metrics())
     return start_app
 
 
 def create_stop_app_handler(app: FastAPI) -> Callable:
     async def stop_app() -> None:
+        for name in (
+            "_alert_listener_task", "_alert_index_task", "_outbox_task", "_metrics_task",
+            "_replica_lag_task"
+        ):
+            task = getattr(app.state, name, None)
+            if task:
+                task.cancel()
+        listener = getattr(app.state, "_alert_listener_task", None)
+        if listener:
+            # Lets it close its connection
+            await asyncio.gather(listener, return_exceptions=True)
+        try:
+            registry.flush(final=True)
+        except Exception as e:
+            logger.error("Could not write final metrics snapshot")
+            logger.error(e)
+        await close_scrape_limiter(app)
+        await close_replica_connections(app)
         await close_db_connection(app)
     return stop_app
@@ -7,6 +7,7 @@ from databases import Database
 from fastapi import Depends
 from starlette.requests import Request
 from scrape.db.repositories.base import BaseRepository
+from scrape.db.scrape_slots import ScrapeLimiter
 
 
 def get_database(request: Request) -> Database:
@@ -18,3 +19,27 @@ def get_repository(repo_type: Type[BaseRepository]) -> Callable:
         return repo_type(db)
 
     return get_repo
+
+
+def get_scrape_limiter(request: Request) -> ScrapeLimiter:
+    return request.app.state._scrape_limiter
+
+
+def get_replica_database(request: Request) -> Database:
+    """A healthy read replica, or the primary when there is none."""
+    router = getattr(request.app.state, "_replicas", None)
+    return (router and router.pick()) or request.app.state._db
+
+
+def get_read_repository(repo_type: Type[BaseRepository]) -> Callable:
+    """
+    Like `get_repository`, but the repository's `@read_only` methods run
+    on a replica. Writes always go to the primary.
+    """
+    def get_repo(
+        db: Database = Depends(get_database),
+        read_db: Database = Depends(get_replica_database)
+    ) -> Type[BaseRepository]:
+        return repo_type(db, read_db)
+
+    return get_repo
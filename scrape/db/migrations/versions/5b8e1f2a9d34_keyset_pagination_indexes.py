@@ -0,0 +1,54 @@
+"""keyset pagination indexes
+
+Revision ID: 5b8e1f2a9d34
+Revises: c4a2c0e156a5
+Create Date: 2026-10-19 09:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e1f2a9d34'
+down_revision: Union[str, Sequence[str], None] = 'c4a2c0e156a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def add_scrape_tasks_timestamps() -> None:
+    op.add_column(
+        "scrape_tasks",
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.add_column(
+        "scrape_tasks",
+        sa.Column("updated_at", sa.TIMESTAMP(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def create_keyset_indexes() -> None:
+    op.execute("CREATE INDEX ix_products_created_at_id ON products (created_at DESC, id DESC)")
+    op.execute("CREATE INDEX ix_users_created_at_id ON users (created_at DESC, id DESC)")
+    op.execute("CREATE INDEX ix_alerts_user_created_at_id ON alerts (user_id, created_at DESC, id DESC)")
+    op.execute(
+        "CREATE INDEX ix_scrape_tasks_user_created_at_id ON scrape_tasks (user_id, created_at DESC, id DESC)"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    add_scrape_tasks_timestamps()
+    create_keyset_indexes()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_scrape_tasks_user_created_at_id", table_name="scrape_tasks")
+    op.drop_index("ix_alerts_user_created_at_id", table_name="alerts")
+    op.drop_index("ix_users_created_at_id", table_name="users")
+    op.drop_index("ix_products_created_at_id", table_name="products")
+    op.drop_column("scrape_tasks", "updated_at")
+    op.drop_column("scrape_tasks", "created_at")
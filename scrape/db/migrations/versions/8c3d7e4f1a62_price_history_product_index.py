@@ -0,0 +1,34 @@
+"""price history product index
+
+Revision ID: 8c3d7e4f1a62
+Revises: 5b8e1f2a9d34
+Create Date: 2026-10-19 10:02:17.551093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3d7e4f1a62'
+down_revision: Union[str, Sequence[str], None] = '5b8e1f2a9d34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE INDEX ix_price_history_product_created_at
+            ON price_history (product_id, created_at)
+            INCLUDE (price);
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_price_history_product_created_at", table_name="price_history")
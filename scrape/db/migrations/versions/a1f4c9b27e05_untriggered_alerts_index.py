@@ -0,0 +1,34 @@
+"""untriggered alerts index
+
+Revision ID: a1f4c9b27e05
+Revises: 8c3d7e4f1a62
+Create Date: 2026-10-19 10:41:55.018342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1f4c9b27e05'
+down_revision: Union[str, Sequence[str], None] = '8c3d7e4f1a62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE INDEX ix_alerts_untriggered_product_target
+            ON alerts (product_id, target_price)
+            WHERE is_triggered = FALSE;
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_alerts_untriggered_product_target", table_name="alerts")
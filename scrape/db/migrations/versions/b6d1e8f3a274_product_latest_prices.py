@@ -0,0 +1,85 @@
+"""product latest prices
+
+Revision ID: b6d1e8f3a274
+Revises: f5a8d2c61b37
+Create Date: 2026-10-19 14:27:51.305118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d1e8f3a274'
+down_revision: Union[str, Sequence[str], None] = 'f5a8d2c61b37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def create_product_latest_prices_table() -> None:
+    op.create_table(
+        "product_latest_prices",
+        sa.Column(
+            "product_id", postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+        ),
+        sa.Column("current_price", sa.Numeric(precision=10, scale=2), nullable=False),
+        # The price before the most recent change, not the previous scrape
+        sa.Column("previous_price", sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column(
+            "change_pct", sa.Numeric,
+            sa.Computed(
+                "CASE WHEN previous_price > 0 "
+                "THEN 100 * (current_price - previous_price) / previous_price END",
+                persisted=True,
+            ),
+        ),
+        sa.Column("last_seen_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("price_changed_at", sa.TIMESTAMP(timezone=True), nullable=False),
+    )
+
+
+def backfill_product_latest_prices() -> None:
+    op.execute(
+        """
+        INSERT INTO product_latest_prices (
+            product_id, current_price, previous_price, last_seen_at, price_changed_at
+        )
+        SELECT
+            latest.product_id,
+            latest.price,
+            previous.price,
+            latest.created_at,
+            (
+                SELECT MIN(created_at) FROM price_history
+                WHERE product_id = latest.product_id
+                AND created_at > COALESCE(previous.created_at, '-infinity')
+            )
+        FROM (
+            SELECT DISTINCT ON (product_id) product_id, price, created_at
+            FROM price_history
+            ORDER BY product_id, created_at DESC
+        ) latest
+        LEFT JOIN LATERAL (
+            SELECT price, created_at FROM price_history
+            WHERE product_id = latest.product_id
+            AND price <> latest.price
+            ORDER BY created_at DESC
+            LIMIT 1
+        ) previous ON TRUE;
+        """
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_product_latest_prices_table()
+    backfill_product_latest_prices()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("product_latest_prices")
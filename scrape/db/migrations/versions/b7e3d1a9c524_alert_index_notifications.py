@@ -0,0 +1,71 @@
+"""alert index notifications
+
+Revision ID: b7e3d1a9c524
+Revises: e2a7c4f9b318
+Create Date: 2026-10-19 11:24:37.209518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3d1a9c524'
+down_revision: Union[str, Sequence[str], None] = 'e2a7c4f9b318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def create_notify_alert_index_trigger() -> None:
+    # Every worker keeps its own alert index; each change to the set of
+    # untriggered thresholds is broadcast to all of them on commit.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_alert_index()
+            RETURNS TRIGGER AS
+        $$
+        BEGIN
+            IF TG_OP = 'UPDATE'
+                AND OLD.is_triggered = NEW.is_triggered
+                AND OLD.product_id = NEW.product_id
+                AND OLD.target_price = NEW.target_price THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') AND NOT OLD.is_triggered THEN
+                PERFORM pg_notify('alert_index', json_build_object(
+                    'op', 'remove', 'id', OLD.id, 'product_id', OLD.product_id
+                )::text);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NOT NEW.is_triggered THEN
+                PERFORM pg_notify('alert_index', json_build_object(
+                    'op', 'add', 'id', NEW.id, 'product_id', NEW.product_id,
+                    'target_price', NEW.target_price
+                )::text);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ language 'plpgsql';
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER notify_alert_index
+            AFTER INSERT OR UPDATE OR DELETE
+            ON alerts
+            FOR EACH ROW
+            EXECUTE PROCEDURE notify_alert_index();
+        """
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_notify_alert_index_trigger()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS notify_alert_index ON alerts")
+    op.execute("DROP FUNCTION IF EXISTS notify_alert_index")
@@ -0,0 +1,107 @@
+"""skip empty version bumps
+
+Revision ID: c3d8f2a6e157
+Revises: b7e3d1a9c524
+Create Date: 2026-10-19 12:02:41.377905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d8f2a6e157'
+down_revision: Union[str, Sequence[str], None] = 'b7e3d1a9c524'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def create_bump_table_version_triggers() -> None:
+    # Statement triggers fire even when no row changed (an insert that hit
+    # ON CONFLICT DO NOTHING, an update matching nothing); the transition
+    # table tells those apart. A trigger can only have one for a single
+    # event, hence one trigger per event, all naming it changed_rows.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_table_version()
+            RETURNS TRIGGER AS
+        $$
+        BEGIN
+            -- Nested: the condition is planned whole, and TRUNCATE
+            -- triggers have no transition table
+            IF TG_OP <> 'TRUNCATE' THEN
+                IF NOT EXISTS (SELECT 1 FROM changed_rows) THEN
+                    RETURN NULL;
+                END IF;
+            END IF;
+            INSERT INTO table_versions (table_name, version, updated_at)
+            VALUES (TG_TABLE_NAME, 1, now())
+            ON CONFLICT (table_name) DO UPDATE
+                SET version = table_versions.version + 1,
+                    updated_at = now();
+            RETURN NULL;
+        END;
+        $$ language 'plpgsql';
+        """
+    )
+    op.execute("DROP TRIGGER IF EXISTS bump_products_version ON products")
+    for event, transition in (
+        ("INSERT", "NEW TABLE"), ("UPDATE", "NEW TABLE"), ("DELETE", "OLD TABLE")
+    ):
+        op.execute(
+            f"""
+            CREATE TRIGGER bump_products_version_{event.lower()}
+                AFTER {event}
+                ON products
+                REFERENCING {transition} AS changed_rows
+                FOR EACH STATEMENT
+                EXECUTE PROCEDURE bump_table_version();
+            """
+        )
+    op.execute(
+        """
+        CREATE TRIGGER bump_products_version_truncate
+            AFTER TRUNCATE
+            ON products
+            FOR EACH STATEMENT
+            EXECUTE PROCEDURE bump_table_version();
+        """
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_bump_table_version_triggers()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for event in ("insert", "update", "delete", "truncate"):
+        op.execute(f"DROP TRIGGER IF EXISTS bump_products_version_{event} ON products")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_table_version()
+            RETURNS TRIGGER AS
+        $$
+        BEGIN
+            INSERT INTO table_versions (table_name, version, updated_at)
+            VALUES (TG_TABLE_NAME, 1, now())
+            ON CONFLICT (table_name) DO UPDATE
+                SET version = table_versions.version + 1,
+                    updated_at = now();
+            RETURN NULL;
+        END;
+        $$ language 'plpgsql';
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER bump_products_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE
+            ON products
+            FOR EACH STATEMENT
+            EXECUTE PROCEDURE bump_table_version();
+        """
+    )
@@ -0,0 +1,52 @@
+"""product search indexes
+
+Revision ID: c8e2f4a9b153
+Revises: b6d1e8f3a274
+Create Date: 2026-10-19 15:03:12.774290
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e2f4a9b153'
+down_revision: Union[str, Sequence[str], None] = 'b6d1e8f3a274'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def add_search_vector_column() -> None:
+    # Stored, so matching never re-parses names; rewrites the table once
+    op.execute(
+        """
+        ALTER TABLE products ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(name, '')), 'A')
+                || setweight(to_tsvector('english', coalesce(category, '')), 'B')
+            ) STORED;
+        """
+    )
+
+
+def create_search_indexes() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE INDEX ix_products_search_vector ON products USING GIN (search_vector)")
+    op.execute("CREATE INDEX ix_products_name_trgm ON products USING GIN (name gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_products_category_trgm ON products USING GIN (category gin_trgm_ops)")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    add_search_vector_column()
+    create_search_indexes()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_products_category_trgm", table_name="products")
+    op.drop_index("ix_products_name_trgm", table_name="products")
+    op.drop_index("ix_products_search_vector", table_name="products")
+    op.drop_column("products", "search_vector")
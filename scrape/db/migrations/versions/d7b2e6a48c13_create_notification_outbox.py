@@ -0,0 +1,68 @@
+"""create notification outbox
+
+Revision ID: d7b2e6a48c13
+Revises: a1f4c9b27e05
+Create Date: 2026-10-19 11:20:08.731246
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7b2e6a48c13'
+down_revision: Union[str, Sequence[str], None] = 'a1f4c9b27e05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def create_notification_outbox_table() -> None:
+    op.create_table(
+        "notification_outbox",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, server_default=sa.text("gen_random_uuid()")),
+        sa.Column("provider", sa.String(50), nullable=False),
+        sa.Column("recipient", sa.String(255), nullable=False),
+        sa.Column("subject", sa.String(500), nullable=False),
+        sa.Column("body_text", sa.Text, nullable=False),
+        sa.Column("body_html", sa.Text, nullable=True),
+        sa.Column("status", sa.String(20), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("next_attempt_at", sa.TIMESTAMP(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("locked_until", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text, nullable=True),
+        sa.Column("sent_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+    op.execute(
+        """
+        CREATE INDEX ix_notification_outbox_due
+            ON notification_outbox (next_attempt_at)
+            WHERE status IN ('pending', 'sending');
+        """
+    )
+
+    op.execute(
+        """
+        CREATE TRIGGER update_notification_outbox_modtime
+            BEFORE UPDATE
+            ON notification_outbox
+            FOR EACH ROW
+            EXECUTE PROCEDURE update_updated_at_column();
+        """
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_notification_outbox_table()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_notification_outbox_due", table_name="notification_outbox")
+    op.drop_table("notification_outbox")
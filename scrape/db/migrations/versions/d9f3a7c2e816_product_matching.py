@@ -0,0 +1,75 @@
+"""product matching
+
+Revision ID: d9f3a7c2e816
+Revises: c8e2f4a9b153
+Create Date: 2026-10-19 15:41:07.218863
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9f3a7c2e816'
+down_revision: Union[str, Sequence[str], None] = 'c8e2f4a9b153'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def create_product_signatures_table() -> None:
+    op.create_table(
+        "product_signatures",
+        sa.Column(
+            "product_id", postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+        ),
+        sa.Column("retailer_id", postgresql.UUID(as_uuid=True), nullable=False),
+        # One LSH bucket key per band; products sharing any key are candidates
+        sa.Column("band_keys", postgresql.ARRAY(sa.BigInteger), nullable=False),
+        sa.Column("signature", sa.LargeBinary, nullable=False),
+        # Tokens with digits, which a match must not contradict
+        sa.Column("specs", postgresql.ARRAY(sa.Text), nullable=False),
+        sa.Column(
+            "computed_at", sa.TIMESTAMP(timezone=True),
+            server_default=sa.func.now(), nullable=False
+        ),
+    )
+    op.create_index(
+        "ix_product_signatures_band_keys", "product_signatures", ["band_keys"],
+        postgresql_using="gin"
+    )
+
+
+def create_product_matches_table() -> None:
+    op.create_table(
+        "product_matches",
+        sa.Column(
+            "product_id", postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+        ),
+        sa.Column("cluster_id", postgresql.UUID(as_uuid=True), nullable=False),
+        # Best estimated similarity to another member of the cluster
+        sa.Column("similarity", sa.REAL, nullable=False),
+        sa.Column(
+            "matched_at", sa.TIMESTAMP(timezone=True),
+            server_default=sa.func.now(), nullable=False
+        ),
+    )
+    op.create_index("ix_product_matches_cluster_id", "product_matches", ["cluster_id"])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_product_signatures_table()
+    create_product_matches_table()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_product_matches_cluster_id", table_name="product_matches")
+    op.drop_table("product_matches")
+    op.drop_index("ix_product_signatures_band_keys", table_name="product_signatures")
+    op.drop_table("product_signatures")
@@ -0,0 +1,152 @@
+"""product external ids
+
+Revision ID: e2a7c4f9b318
+Revises: d9f3a7c2e816
+Create Date: 2026-10-19 16:52:33.604127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a7c4f9b318'
+down_revision: Union[str, Sequence[str], None] = 'd9f3a7c2e816'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def backfill_external_ids() -> None:
+    # scrape.services.wrangling.identity.product_key, in SQL. No "(?:" groups:
+    # the colon would be read as a bind parameter.
+    op.execute(
+        r"""
+        UPDATE products p
+        SET external_id = COALESCE(
+            CASE
+                WHEN k.host ~ '(^|\.)amazon\.[a-z.]+$' THEN upper((regexp_match(
+                    k.base, '(?i)/(dp|gp/product|gp/aw/d|exec/obidos/asin|o/asin)/([a-z0-9]{10})(/|$)'
+                ))[2])
+                WHEN k.host ~ '(^|\.)jumia\.[a-z.]+$' THEN (regexp_match(k.base, '-([0-9]+)\.html$'))[1]
+            END,
+            k.base
+        )
+        FROM (
+            SELECT id, base, lower(split_part(base, '/', 3)) AS host
+            FROM (
+                SELECT id, split_part(split_part(btrim(url, E' \t\r\n'), '#', 1), '?', 1) AS base
+                FROM products
+            ) stripped
+        ) k
+        WHERE k.id = p.id;
+        """
+    )
+
+
+def merge_duplicate_products() -> None:
+    # The oldest listing of each (retailer, key) survives and takes over the
+    # others' price history and alerts; deleting the rest cascades to their
+    # summaries, signatures and matches.
+    op.execute(
+        """
+        CREATE TEMP TABLE product_merges AS
+        SELECT id AS duplicate_id, survivor_id
+        FROM (
+            SELECT id, first_value(id) OVER (
+                PARTITION BY retailer_id, external_id ORDER BY created_at, id
+            ) AS survivor_id
+            FROM products
+        ) ranked
+        WHERE id <> survivor_id;
+        """
+    )
+    op.execute(
+        """
+        UPDATE price_history ph SET product_id = m.survivor_id
+        FROM product_merges m WHERE ph.product_id = m.duplicate_id;
+        """
+    )
+    op.execute(
+        """
+        UPDATE alerts a SET product_id = m.survivor_id
+        FROM product_merges m WHERE a.product_id = m.duplicate_id;
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM products p USING product_merges m WHERE p.id = m.duplicate_id;
+        """
+    )
+
+    # Survivors' summaries and prices, from the merged history
+    op.execute(
+        """
+        DELETE FROM product_latest_prices
+        WHERE product_id IN (SELECT survivor_id FROM product_merges);
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO product_latest_prices (
+            product_id, current_price, previous_price, last_seen_at, price_changed_at
+        )
+        SELECT
+            latest.product_id,
+            latest.price,
+            previous.price,
+            latest.created_at,
+            (
+                SELECT MIN(created_at) FROM price_history
+                WHERE product_id = latest.product_id
+                AND created_at > COALESCE(previous.created_at, '-infinity')
+            )
+        FROM (
+            SELECT DISTINCT ON (product_id) product_id, price, created_at
+            FROM price_history
+            WHERE product_id IN (SELECT survivor_id FROM product_merges)
+            ORDER BY product_id, created_at DESC
+        ) latest
+        LEFT JOIN LATERAL (
+            SELECT price, created_at FROM price_history
+            WHERE product_id = latest.product_id
+            AND price <> latest.price
+            ORDER BY created_at DESC
+            LIMIT 1
+        ) previous ON TRUE;
+        """
+    )
+    op.execute(
+        """
+        UPDATE products p SET price = l.current_price
+        FROM product_latest_prices l
+        WHERE l.product_id = p.id
+        AND p.id IN (SELECT survivor_id FROM product_merges)
+        AND p.price IS DISTINCT FROM l.current_price;
+        """
+    )
+    op.execute("DROP TABLE product_merges")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("products", sa.Column("external_id", sa.String(500), nullable=True))
+    backfill_external_ids()
+    merge_duplicate_products()
+    op.alter_column("products", "external_id", nullable=False)
+    # Key first so lookups by URL, which know the key but not the retailer,
+    # use it too; ON CONFLICT infers it from the column set either way.
+    op.create_index(
+        "ix_products_external_id_retailer_id", "products", ["external_id", "retailer_id"],
+        unique=True
+    )
+    # URLs are no longer the identity; nothing looks products up by them
+    op.drop_index("ix_products_url", table_name="products")
+
+
+def downgrade() -> None:
+    """Downgrade schema. Merged products stay merged."""
+    op.create_index("ix_products_url", "products", ["url"], unique=True)
+    op.drop_index("ix_products_external_id_retailer_id", table_name="products")
+    op.drop_column("products", "external_id")
@@ -0,0 +1,66 @@
+"""scrape task timings
+
+Revision ID: e3c9a5b17d42
+Revises: d7b2e6a48c13
+Create Date: 2026-10-19 12:05:37.418920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3c9a5b17d42'
+down_revision: Union[str, Sequence[str], None] = 'd7b2e6a48c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def add_scrape_task_timing_columns() -> None:
+    # Scrapes are started by unauthenticated endpoints as well
+    op.alter_column("scrape_tasks", "user_id", nullable=True)
+
+    op.add_column(
+        "scrape_tasks",
+        sa.Column("retailer_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("retailers.id"), nullable=True),
+    )
+    op.add_column("scrape_tasks", sa.Column("query", sa.Text, nullable=True))
+    op.add_column(
+        "scrape_tasks",
+        sa.Column("phases", postgresql.JSONB, server_default=sa.text("'[]'::jsonb"), nullable=False),
+    )
+    op.add_column(
+        "scrape_tasks",
+        sa.Column("phase_totals", postgresql.JSONB, server_default=sa.text("'{}'::jsonb"), nullable=False),
+    )
+    op.add_column("scrape_tasks", sa.Column("pages", sa.Integer, server_default="0", nullable=False))
+    op.add_column("scrape_tasks", sa.Column("bytes_downloaded", sa.BigInteger, server_default="0", nullable=False))
+    op.add_column("scrape_tasks", sa.Column("retries", sa.Integer, server_default="0", nullable=False))
+    op.add_column("scrape_tasks", sa.Column("captchas", sa.Integer, server_default="0", nullable=False))
+    op.add_column("scrape_tasks", sa.Column("proxy", sa.String(255), nullable=True))
+    op.add_column("scrape_tasks", sa.Column("browser_seconds", sa.Float, server_default="0", nullable=False))
+    op.add_column("scrape_tasks", sa.Column("db_round_trips", sa.Integer, server_default="0", nullable=False))
+
+
+def create_scrape_task_cost_index() -> None:
+    op.execute("CREATE INDEX ix_scrape_tasks_started_at_source ON scrape_tasks (started_at, source)")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    add_scrape_task_timing_columns()
+    create_scrape_task_cost_index()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_scrape_tasks_started_at_source", table_name="scrape_tasks")
+    for column in (
+        "db_round_trips", "browser_seconds", "proxy", "captchas", "retries",
+        "bytes_downloaded", "pages", "phase_totals", "phases", "query", "retailer_id",
+    ):
+        op.drop_column("scrape_tasks", column)
+    op.alter_column("scrape_tasks", "user_id", nullable=False)
@@ -0,0 +1,70 @@
+"""table versions
+
+Revision ID: f5a8d2c61b37
+Revises: e3c9a5b17d42
+Create Date: 2026-10-19 13:12:08.640715
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5a8d2c61b37'
+down_revision: Union[str, Sequence[str], None] = 'e3c9a5b17d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def create_table_versions_table() -> None:
+    op.create_table(
+        "table_versions",
+        sa.Column("table_name", sa.String(63), primary_key=True),
+        sa.Column("version", sa.BigInteger, server_default="0", nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def create_bump_table_version_trigger() -> None:
+    # Statement level, so a batch insert bumps the version once
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_table_version()
+            RETURNS TRIGGER AS
+        $$
+        BEGIN
+            INSERT INTO table_versions (table_name, version, updated_at)
+            VALUES (TG_TABLE_NAME, 1, now())
+            ON CONFLICT (table_name) DO UPDATE
+                SET version = table_versions.version + 1,
+                    updated_at = now();
+            RETURN NULL;
+        END;
+        $$ language 'plpgsql';
+        """
+    )
+    op.execute("INSERT INTO table_versions (table_name) VALUES ('products')")
+    op.execute(
+        """
+        CREATE TRIGGER bump_products_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE
+            ON products
+            FOR EACH STATEMENT
+            EXECUTE PROCEDURE bump_table_version();
+        """
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_table_versions_table()
+    create_bump_table_version_trigger()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS bump_products_version ON products")
+    op.execute("DROP FUNCTION IF EXISTS bump_table_version")
+    op.drop_table("table_versions")
@@ -0,0 +1,74 @@
+"""
+Keyset (cursor) pagination helpers shared by the list repositories
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Optional, Sequence, Tuple
+from uuid import UUID
+
+
+class TotalMode(str, Enum):
+    EXACT = "exact"
+    ESTIMATE = "estimate"
+    NONE = "none"
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    raw = json.dumps([created_at.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+
+def cursor_values(cursor: Optional[str]) -> dict:
+    """
+    Query values for the `(created_at, id) < (:cursor_created_at, :cursor_id)`
+    predicate; an empty dict means "first page".
+    """
+    if not cursor:
+        return {}
+    created_at, row_id = decode_cursor(cursor)
+    return {"cursor_created_at": created_at, "cursor_id": row_id}
+
+
+def split_page(rows: Sequence, limit: int) -> Tuple[list, Optional[str]]:
+    """
+    Rows are fetched with `LIMIT :limit + 1`; the extra row only tells us
+    whether another page exists.
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(last["created_at"], last["id"])
+
+
+def encode_rank_cursor(score: float, row_id: UUID) -> str:
+    """Cursor for lists ordered by `(score DESC, id DESC)`."""
+    raw = json.dumps([score, str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return float(score), UUID(row_id)
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
@@ -0,0 +1,45 @@
+"""
+Per-task accounting of database round trips
+
+asyncpg calls the query logger installed on every pool connection once per
+statement; the callback runs in a copy of the issuing task's context, so
+the counter bound with `count_queries()` only sees that task's queries.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from asyncpg import Connection
+from asyncpg.connection import LoggedQuery
+
+
+class QueryCounter:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+
+
+_counter: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+
+
+@contextmanager
+def count_queries(counter: QueryCounter):
+    token = _counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _counter.reset(token)
+
+
+def _on_query(record: LoggedQuery) -> None:
+    counter = _counter.get()
+    if counter is not None:
+        counter.count += 1
+        counter.seconds += record.elapsed
+
+
+async def init_connection(connection: Connection) -> None:
+    """Pool `init` hook, runs once for every new connection."""
+    connection.add_query_logger(_on_query)
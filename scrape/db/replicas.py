@@ -0,0 +1,113 @@
+"""
+Read-replica routing
+
+Replicas are polled for replication lag in the background; reads marked
+`@read_only` on a repository built with `get_read_repository` go to a
+healthy replica in round-robin order and fall back to the primary when
+none is streaming within REPLICA_MAX_LAG_SECS.
+"""
+
+import asyncio
+import functools
+from contextvars import ContextVar
+from itertools import count
+from typing import List, Optional
+from databases import Database
+from scrape.core.configs import REPLICA_MAX_LAG_SECS, REPLICA_LAG_CHECK_SECS
+from scrape.core.logger import get_logger
+from scrape.core.metrics import DB_REPLICA_LAG
+
+logger = get_logger(__name__)
+
+# Zero on the primary and on a replica that has replayed everything it
+# received, otherwise the age of the last replayed transaction. An idle
+# primary therefore does not make a caught-up replica look stale. NULL
+# when the replica is not streaming: received and replayed then stay equal
+# however far behind it falls. Seeing the receiver's status needs
+# pg_read_all_stats; without it the replica reads as not streaming.
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming'
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END AS lag
+"""
+
+_read_only: ContextVar[bool] = ContextVar("read_only", default=False)
+
+
+def read_only(method):
+    """Marks a repository coroutine as safe to serve from a replica."""
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+
+    return wrapper
+
+
+def in_read_only() -> bool:
+    return _read_only.get()
+
+
+class Replica:
+    def __init__(self, name: str, database: Database) -> None:
+        self.name = name
+        self.database = database
+        self.lag: Optional[float] = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.lag is not None and self.lag <= REPLICA_MAX_LAG_SECS
+
+
+class ReplicaRouter:
+    def __init__(self, replicas: List[Replica]) -> None:
+        self.replicas = replicas
+        self._next = count()
+
+    def pick(self) -> Optional[Database]:
+        healthy = [r for r in self.replicas if r.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)].database
+
+    async def check_lag(self) -> None:
+        for replica in self.replicas:
+            try:
+                lag = await replica.database.fetch_val(REPLICA_LAG_QUERY)
+                if lag is None and replica.lag is not None:
+                    logger.warning("Replica %s not streaming, reads fall back", replica.name)
+                replica.lag = float(lag) if lag is not None else None
+            except Exception as e:
+                if replica.lag is not None:
+                    logger.warning("Replica %s unreachable, reads fall back: %s", replica.name, e)
+                replica.lag = None
+            DB_REPLICA_LAG.labels(replica.name).set(
+                replica.lag if replica.lag is not None else -1
+            )
+
+    async def monitor(self) -> None:
+        while True:
+            try:
+                await self.check_lag()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Replica lag check failed")
+                logger.error(e)
+            await asyncio.sleep(REPLICA_LAG_CHECK_SECS)
+
+    async def disconnect(self) -> None:
+        for replica in self.replicas:
+            try:
+                await replica.database.disconnect()
+            except Exception as e:
+                logger.error("Replica %s disconnect error: %s", replica.name, e)
@@ -1,7 +1,13 @@
-from typing import Optional
+from decimal import Decimal
+from typing import Optional, List, Tuple
 from uuid import UUID
-from scrape.core.logger import logger
+from scrape.core.logger import get_logger
+from scrape.db.pagination import TotalMode, InvalidCursorError, cursor_values, split_page
 from scrape.db.repositories.base import BaseRepository
+from scrape.db.replicas import read_only
+from scrape.models.alerts.alert import Alert, AlertList, TriggeredAlert
+
+logger = get_logger(__name__)
 
 CREATE_ALERT_QUERY = """
     INSERT INTO alerts (
@@ -20,7 +26,15 @@ CREATE_ALERT_QUERY = """
 GET_ALERTS_QUERY = """
     SELECT * FROM alerts
     WHERE user_id = :user_id
-    ORDER BY created_at DESC
+    ORDER BY created_at DESC, id DESC
+    LIMIT :limit
+"""
+
+GET_ALERTS_AFTER_CURSOR_QUERY = """
+    SELECT * FROM alerts
+    WHERE user_id = :user_id
+    AND (created_at, id) < (:cursor_created_at, :cursor_id)
+    ORDER BY created_at DESC, id DESC
     LIMIT :limit
 """
 
@@ -29,6 +43,44 @@ GET_ALERTS_COUNT_QUERY = """
     WHERE user_id = :user_id
 """
 
+ESTIMATE_ALERTS_COUNT_QUERY = """
+    SELECT 1 FROM alerts
+    WHERE user_id = :user_id
+"""
+
+GET_UNTRIGGERED_ALERTS_QUERY = """
+    SELECT id, product_id, target_price FROM alerts
+    WHERE is_triggered = FALSE
+"""
+
+TRIGGER_ALERTS_QUERY = """
+    WITH new_prices AS (
+        SELECT product_id, MIN(price) AS price
+        FROM unnest(
+            CAST(:product_ids AS uuid[]),
+            CAST(:prices AS numeric[])
+        ) AS p(product_id, price)
+        GROUP BY product_id
+    )
+    UPDATE alerts AS a
+    SET is_triggered = TRUE
+    FROM new_prices AS np, users AS u, products AS pr
+    WHERE a.product_id = np.product_id
+    AND a.is_triggered = FALSE
+    AND np.price <= a.target_price
+    AND u.id = a.user_id
+    AND pr.id = a.product_id
+    RETURNING
+        a.id,
+        a.user_id,
+        a.product_id,
+        a.target_price,
+        np.price AS triggered_price,
+        u.email,
+        pr.name AS product_name,
+        pr.url AS product_url
+"""
+
 DELETE_ALERT_BY_ID_QUERY = """
     DELETE FROM alerts
     WHERE id = :id AND user_id = :user_id
@@ -38,39 +90,53 @@ DELETE_ALERT_BY_ID_QUERY = """
 
 class AlertRepository(BaseRepository):
     async def create_alert(self, alert: dict) -> dict:
-        logger.info("Creating alert: %s", alert)
+        logger.debug("Creating alert for product: %s", alert["product_id"])
         try:
-            created_alert = await self.db.fetch_one(
+            created_alert = await self.fetch_one(
                 CREATE_ALERT_QUERY,
                 values=alert
             )
 
             if not created_alert:
-                logger.warning("Alert not created: %s", alert)
+                logger.warning("Alert not created for product: %s", alert["product_id"])
                 return None
 
             return created_alert
         except Exception as e:
             logger.exception(
-                "Error creating alert: %s. Exception: %s",
-                alert, e
+                "Error creating alert for product: %s. Exception: %s",
+                alert["product_id"], e
             )
             raise e
 
-    async def get_alerts(self, user_id: UUID, limit: int) -> list:
-        logger.info("Getting alerts for user: %s", user_id)
+    @read_only
+    async def get_alerts(
+        self, user_id: UUID, limit: int, cursor: Optional[str] = None,
+        total: TotalMode = TotalMode.NONE
+    ) -> AlertList:
+        logger.debug("Getting alerts for user: %s", user_id)
         try:
-            values = {"user_id": user_id, "limit": limit}
-            alerts = await self.db.fetch_all(GET_ALERTS_QUERY, values=values)
+            values = cursor_values(cursor)
+            query = GET_ALERTS_AFTER_CURSOR_QUERY if values else GET_ALERTS_QUERY
+            values.update({"user_id": user_id, "limit": limit + 1})
+            alerts = await self.fetch_all(query, values=values)
+            alerts, next_cursor = split_page(alerts, limit)
 
-            count = await self.db.fetch_one(GET_ALERTS_COUNT_QUERY, values={"user_id": user_id})
-            count = count[0] if count else 0
+            count = await self.count_total(
+                total, GET_ALERTS_COUNT_QUERY, ESTIMATE_ALERTS_COUNT_QUERY,
+                values={"user_id": user_id}
+            )
 
             if len(alerts) == 0:
                 logger.warning("No alerts found for user: %s", user_id)
-                return [], count
 
-            return alerts, count
+            return AlertList(
+                alerts=[Alert(**alert) for alert in alerts],
+                total=count,
+                next_cursor=next_cursor
+            )
+        except InvalidCursorError:
+            raise
         except Exception as e:
             logger.exception(
                 "Error getting alerts for user: %s. Exception: %s",
@@ -79,9 +145,9 @@ class AlertRepository(BaseRepository):
             raise e
 
     async def delete_alert_by_id(self, alert_id: UUID, user_id: UUID) -> Optional[dict]:
-        logger.info("Deleting alert by ID: %s", alert_id)
+        logger.debug("Deleting alert by ID: %s", alert_id)
         try:
-            alert = await self.db.fetch_one(
+            alert = await self.fetch_one(
                 DELETE_ALERT_BY_ID_QUERY,
                 values={"id": alert_id, "user_id": user_id}
             )
@@ -97,3 +163,36 @@ class AlertRepository(BaseRepository):
                 alert_id, e
             )
             raise e
+
+    async def get_untriggered_alerts(self) -> list:
+        logger.debug("Getting untriggered alerts")
+        try:
+            return await self.fetch_all(GET_UNTRIGGERED_ALERTS_QUERY)
+        except Exception as e:
+            logger.exception("Error getting untriggered alerts. Exception: %s", e)
+            raise e
+
+    async def trigger_alerts(self, prices: List[Tuple[UUID, float]]) -> List[TriggeredAlert]:
+        """
+        Evaluate a whole ingestion batch in one statement: the new prices are
+        joined against untriggered alerts for just those products, and every
+        alert they cross is flipped and returned together.
+        """
+        if not prices:
+            return []
+
+        logger.debug("Evaluating alerts for %s new prices", len(prices))
+        try:
+            product_ids, new_prices = zip(*prices)
+            triggered = await self.fetch_all(
+                TRIGGER_ALERTS_QUERY,
+                values={
+                    "product_ids": list(product_ids),
+                    "prices": [Decimal(str(price)) for price in new_prices],
+                }
+            )
+
+            return [TriggeredAlert(**alert) for alert in triggered]
+        except Exception as e:
+            logger.exception("Error evaluating alerts. Exception: %s", e)
+            raise e
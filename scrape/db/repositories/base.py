@@ -1,5 +1,219 @@
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
 from databases import Database
+from scrape.core.configs import SLOW_QUERY_MS, SLOW_QUERY_EXPLAIN_RATE
+from scrape.core.logger import get_logger
+from scrape.core.metrics import DB_QUERY_SECONDS, DB_QUERY_ROWS, DB_SLOW_QUERIES
+from scrape.db.pagination import TotalMode
+from scrape.db.replicas import in_read_only
+
+logger = get_logger(__name__)
+
+# Strong references to in-flight EXPLAIN tasks
+_explain_tasks: set = set()
+
+
+def _shape(value) -> str:
+    if isinstance(value, (str, bytes, list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def _describe(values):
+    """
+    Parameter types and lengths, never the values: the same statement can
+    carry a password hash, a reset link or an email body.
+    """
+    if isinstance(values, dict):
+        return {k: _shape(v) for k, v in values.items()}
+    if values:
+        return [_shape(v) for v in values]
+    return values
+
 
 class BaseRepository:
-    def __init__(self, db: Database = None) -> None:
+    # SQL text -> name of the module-level constant holding it
+    _query_names: Dict[str, str] = {}
+    # Plans show parameter values in their conditions; repositories whose
+    # queries take secrets or personal data turn sampling off
+    explain_slow_queries: bool = True
+
+    def __init__(self, db: Database = None, read_db: Database = None) -> None:
         self.db = db
+        # Serves reads inside `@read_only` methods; the primary unless the
+        # repository was built with `get_read_repository`.
+        self.read_db = read_db or db
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        module = sys.modules.get(cls.__module__)
+        cls._query_names = {
+            value: name for name, value in vars(module).items()
+            if name.endswith("_QUERY") and isinstance(value, str)
+        }
+
+    def _query_name(self, query: str) -> str:
+        return self._query_names.get(query, "adhoc")
+
+    @property
+    def _reader(self) -> Database:
+        return self.read_db if in_read_only() else self.db
+
+    # Instrumented execution: every repository query goes through these so
+    # latency, row counts and slow statements are tagged with the constant
+    # that issued them.
+
+    async def fetch_one(self, query: str, values: Optional[dict] = None, name: Optional[str] = None):
+        start = time.perf_counter()
+        row = await self._reader.fetch_one(query, values=values)
+        self._observe(name or self._query_name(query), query, values, start, 1 if row else 0)
+        return row
+
+    async def fetch_all(
+        self, query: str, values: Optional[dict] = None, name: Optional[str] = None
+    ) -> List[Any]:
+        start = time.perf_counter()
+        rows = await self._reader.fetch_all(query, values=values)
+        self._observe(name or self._query_name(query), query, values, start, len(rows))
+        return rows
+
+    async def execute(self, query: str, values: Optional[dict] = None, name: Optional[str] = None):
+        start = time.perf_counter()
+        result = await self.db.execute(query, values=values)
+        self._observe(name or self._query_name(query), query, values, start)
+        return result
+
+    async def fetch_one_prepared(self, query: str, *args, name: Optional[str] = None):
+        """
+        Fast path for hot single-row queries written with positional `$n`
+        parameters: runs straight on the task's asyncpg connection, skipping
+        the SQLAlchemy compile `databases` does on every call. asyncpg keeps
+        the statement prepared in its per-connection cache, so only the
+        first call on each connection pays for parsing and planning.
+        """
+        start = time.perf_counter()
+        async with self._reader.connection() as connection:
+            row = await connection.raw_connection.fetchrow(query, *args)
+        self._observe(name or self._query_name(query), query, args, start, 1 if row else 0)
+        return row
+
+    async def fetch_all_prepared(self, query: str, *args, name: Optional[str] = None) -> List[Any]:
+        """`fetch_one_prepared` for queries returning many rows."""
+        start = time.perf_counter()
+        async with self._reader.connection() as connection:
+            rows = await connection.raw_connection.fetch(query, *args)
+        self._observe(name or self._query_name(query), query, args, start, len(rows))
+        return rows
+
+    async def execute_prepared(self, query: str, *args, name: Optional[str] = None) -> str:
+        """Write counterpart of `fetch_one_prepared`; always on the primary."""
+        start = time.perf_counter()
+        async with self.db.connection() as connection:
+            status = await connection.raw_connection.execute(query, *args)
+        self._observe(name or self._query_name(query), query, args, start)
+        return status
+
+    async def stream_chunks(
+        self, query: str, *args, chunk_size: int
+    ) -> AsyncIterator[List[Any]]:
+        """
+        Yields the result of a positional-parameter query `chunk_size` rows
+        at a time from a server-side cursor, so memory stays flat however
+        many rows there are. The cursor runs on `read_db` in a read-only
+        repeatable-read transaction: one consistent snapshot, rolled back
+        and released as soon as the consumer stops iterating.
+
+        Not timed by `_observe`: the elapsed time would mostly be the
+        consumer's, and every large export would log as a slow query.
+        """
+        async with self.read_db.connection() as connection:
+            raw = connection.raw_connection
+            async with raw.transaction(isolation="repeatable_read", readonly=True):
+                cursor = await raw.cursor(query, *args)
+                while True:
+                    chunk = await cursor.fetch(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+
+    def _observe(
+        self, name: str, query: str, values,
+        start: float, rows: Optional[int] = None
+    ) -> None:
+        elapsed = time.perf_counter() - start
+        DB_QUERY_SECONDS.labels(name).observe(elapsed)
+        if rows is not None:
+            DB_QUERY_ROWS.labels(name).observe(rows)
+
+        if elapsed * 1000 < SLOW_QUERY_MS:
+            return
+
+        DB_SLOW_QUERIES.labels(name).inc()
+        logger.warning(
+            "Slow query %s took %.1f ms", name, elapsed * 1000,
+            extra={"query": name, "duration_ms": round(elapsed * 1000, 1),
+                   "rows": rows, "params": _describe(values)}
+        )
+        if (
+            self.explain_slow_queries and SLOW_QUERY_EXPLAIN_RATE
+            and random.random() < SLOW_QUERY_EXPLAIN_RATE
+        ):
+            task = asyncio.create_task(self._explain(name, query, values))
+            _explain_tasks.add(task)
+            task.add_done_callback(_explain_tasks.discard)
+
+    async def _explain(self, name: str, query: str, values) -> None:
+        """
+        EXPLAIN ANALYZE runs the statement again, so only plain SELECTs are
+        sampled. Runs in its own task, and so on its own pool connection,
+        after the caller has already returned.
+        """
+        if not query.lstrip().upper().startswith("SELECT"):
+            return
+        explain = f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}"
+        try:
+            if isinstance(values, tuple):
+                async with self.db.connection() as connection:
+                    plan = await connection.raw_connection.fetchval(explain, *values)
+            else:
+                rows = await self.db.fetch_all(explain, values=values)
+                plan = rows[0][0] if rows else None
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            logger.warning(
+                "Plan for slow query %s", name,
+                extra={"query": name, "plan": plan}
+            )
+        except Exception as e:
+            logger.error("Could not explain slow query %s: %s", name, e)
+
+    async def count_total(
+        self, total: TotalMode, count_query: str,
+        estimate_query: str, values: Optional[dict] = None
+    ) -> Optional[int]:
+        """
+        `exact` runs the COUNT(*) query, `estimate` reads the planner's row
+        estimate for `estimate_query` without touching the table, `none`
+        skips counting altogether.
+        """
+        if total == TotalMode.EXACT:
+            count = await self.fetch_one(count_query, values=values)
+            return count[0] if count else 0
+
+        if total == TotalMode.ESTIMATE:
+            plan = await self.fetch_one(
+                f"EXPLAIN (FORMAT JSON) {estimate_query}", values=values,
+                name=self._query_name(estimate_query)
+            )
+            if not plan:
+                return None
+            plan = plan[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+
+        return None
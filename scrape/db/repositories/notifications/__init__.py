@@ -0,0 +1 @@
+from scrape.db.repositories.notifications.outbox import NotificationOutboxRepository as NotificationOutboxRepository
\ No newline at end of file
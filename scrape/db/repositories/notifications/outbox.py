@@ -0,0 +1,136 @@
+from typing import List
+from uuid import UUID
+from scrape.core.logger import get_logger
+from scrape.db.repositories.base import BaseRepository
+from scrape.models.notifications.notification import Notification, NotificationCreate
+
+logger = get_logger(__name__)
+
+ENQUEUE_NOTIFICATIONS_QUERY = """
+    INSERT INTO notification_outbox (
+        provider,
+        recipient,
+        subject,
+        body_text,
+        body_html
+    )
+    SELECT * FROM unnest(
+        CAST(:providers AS varchar[]),
+        CAST(:recipients AS varchar[]),
+        CAST(:subjects AS varchar[]),
+        CAST(:bodies_text AS text[]),
+        CAST(:bodies_html AS text[])
+    )
+"""
+
+CLAIM_NOTIFICATIONS_QUERY = """
+    UPDATE notification_outbox
+    SET status = 'sending',
+        attempts = attempts + 1,
+        locked_until = now() + make_interval(secs => :lease_seconds)
+    WHERE id IN (
+        SELECT id FROM notification_outbox
+        WHERE (status = 'pending' AND next_attempt_at <= now())
+        OR (status = 'sending' AND locked_until < now())
+        ORDER BY next_attempt_at
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING *
+"""
+
+MARK_NOTIFICATIONS_SENT_QUERY = """
+    UPDATE notification_outbox
+    SET status = 'sent',
+        sent_at = now(),
+        locked_until = NULL,
+        last_error = NULL
+    WHERE id = ANY(CAST(:ids AS uuid[]))
+"""
+
+MARK_NOTIFICATIONS_FAILED_QUERY = """
+    UPDATE notification_outbox AS n
+    SET status = f.status,
+        next_attempt_at = now() + make_interval(secs => f.delay),
+        last_error = f.error,
+        locked_until = NULL
+    FROM unnest(
+        CAST(:ids AS uuid[]),
+        CAST(:statuses AS varchar[]),
+        CAST(:delays AS float8[]),
+        CAST(:errors AS text[])
+    ) AS f(id, status, delay, error)
+    WHERE n.id = f.id
+"""
+
+
+class NotificationOutboxRepository(BaseRepository):
+    explain_slow_queries = False
+
+    async def enqueue(self, notifications: List[NotificationCreate]) -> None:
+        if not notifications:
+            return
+
+        logger.debug("Queueing %s notifications", len(notifications))
+        try:
+            await self.execute(
+                ENQUEUE_NOTIFICATIONS_QUERY,
+                values={
+                    "providers": [n.provider.value for n in notifications],
+                    "recipients": [n.recipient for n in notifications],
+                    "subjects": [n.subject for n in notifications],
+                    "bodies_text": [n.body_text for n in notifications],
+                    "bodies_html": [n.body_html for n in notifications],
+                }
+            )
+        except Exception as e:
+            logger.exception("Error queueing notifications. Exception: %s", e)
+            raise e
+
+    async def claim_batch(self, limit: int, lease_seconds: int) -> List[Notification]:
+        """
+        Lease up to `limit` due notifications. SKIP LOCKED lets several
+        dispatchers drain the outbox without handing out a row twice, and an
+        expired lease makes a row claimable again after a crash mid-send.
+        """
+        try:
+            rows = await self.fetch_all(
+                CLAIM_NOTIFICATIONS_QUERY,
+                values={"limit": limit, "lease_seconds": lease_seconds}
+            )
+            return [Notification(**row) for row in rows]
+        except Exception as e:
+            logger.exception("Error claiming notifications. Exception: %s", e)
+            raise e
+
+    async def mark_sent(self, ids: List[UUID]) -> None:
+        if not ids:
+            return
+
+        try:
+            await self.execute(MARK_NOTIFICATIONS_SENT_QUERY, values={"ids": ids})
+        except Exception as e:
+            logger.exception("Error marking notifications sent. Exception: %s", e)
+            raise e
+
+    async def mark_failed(self, failures: List[dict]) -> None:
+        """
+        `failures` holds `id`, `status` ("pending" to retry or "failed"),
+        `delay` in seconds before the next attempt and `error`.
+        """
+        if not failures:
+            return
+
+        try:
+            await self.execute(
+                MARK_NOTIFICATIONS_FAILED_QUERY,
+                values={
+                    "ids": [f["id"] for f in failures],
+                    "statuses": [f["status"] for f in failures],
+                    "delays": [float(f["delay"]) for f in failures],
+                    "errors": [f["error"] for f in failures],
+                }
+            )
+        except Exception as e:
+            logger.exception("Error marking notifications failed. Exception: %s", e)
+            raise e
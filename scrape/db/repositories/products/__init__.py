@@ -1,2 +1,3 @@
 from scrape.db.repositories.products.product import ProductRepository as ProductRepository
-from scrape.db.repositories.products.price_history import PriceHistoryRepository as PriceHistoryRepository
\ No newline at end of file
+from scrape.db.repositories.products.price_history import PriceHistoryRepository as PriceHistoryRepository
+from scrape.db.repositories.products.product_match import ProductMatchRepository as ProductMatchRepository
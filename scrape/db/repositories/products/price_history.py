@@ -1,15 +1,23 @@
-from typing import Optional
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Optional, List, Tuple
 from uuid import UUID
-from scrape.core.logger import logger
+from scrape.core.logger import get_logger
 from scrape.db.repositories.base import BaseRepository
+from scrape.db.replicas import read_only
+from scrape.models.products.price_history import (
+    PricePoint, PriceDrop, PriceStats, PriceStatsOrder, LatestPrice
+)
 
+logger = get_logger(__name__)
+
+# Positional parameters: runs through the prepared fast path
 CREATE_PRICE_HISTORY_QUERY = """
     INSERT INTO price_history (
         product_id,
         price
     ) VALUES (
-        :product_id,
-        :price
+        $1,
+        $2
     ) RETURNING *
 """
 
@@ -20,9 +28,185 @@ GET_PRICE_HISTORY_QUERY = """
     LIMIT :limit
 """
 
-GET_PRICE_HISTORY_COUNT_QUERY = """
-    SELECT COUNT(*) FROM price_history
+GET_PRICE_HISTORY_BUCKETS_QUERY = """
+    SELECT
+        date_bin(make_interval(secs => :bucket_seconds), created_at, :start) AS bucket,
+        AVG(price)::float AS price,
+        MIN(price)::float AS min_price,
+        MAX(price)::float AS max_price,
+        COUNT(*) AS observations
+    FROM price_history
     WHERE product_id = :product_id
+    AND created_at >= :start
+    AND created_at < :end
+    GROUP BY bucket
+    ORDER BY bucket
+    LIMIT :limit
+"""
+
+# Index-only scan on ix_price_history_product_created_at; NULL bounds are open
+EXPORT_PRICE_HISTORY_QUERY = """
+    SELECT product_id, price, created_at
+    FROM price_history
+    WHERE product_id = $1
+    AND ($2::timestamptz IS NULL OR created_at >= $2)
+    AND ($3::timestamptz IS NULL OR created_at < $3)
+    ORDER BY created_at
+"""
+
+# One statement per ingestion batch. Older observations never overwrite
+# newer ones, and previous_price only moves when the price actually changes.
+UPSERT_LATEST_PRICES_QUERY = """
+    INSERT INTO product_latest_prices AS l (
+        product_id, current_price, last_seen_at, price_changed_at
+    )
+    SELECT product_id, price, observed_at, observed_at
+    FROM unnest($1::uuid[], $2::numeric[], $3::timestamptz[]) AS t(product_id, price, observed_at)
+    ON CONFLICT (product_id) DO UPDATE SET
+        previous_price = CASE
+            WHEN EXCLUDED.current_price <> l.current_price THEN l.current_price
+            ELSE l.previous_price
+        END,
+        price_changed_at = CASE
+            WHEN EXCLUDED.current_price <> l.current_price THEN EXCLUDED.last_seen_at
+            ELSE l.price_changed_at
+        END,
+        current_price = EXCLUDED.current_price,
+        last_seen_at = EXCLUDED.last_seen_at
+    WHERE EXCLUDED.last_seen_at >= l.last_seen_at
+"""
+
+GET_LATEST_PRICES_QUERY = """
+    SELECT
+        product_id,
+        current_price::float AS current_price,
+        previous_price::float AS previous_price,
+        change_pct::float AS change_pct,
+        last_seen_at,
+        price_changed_at
+    FROM product_latest_prices
+    WHERE product_id = ANY($1::uuid[])
+"""
+
+# Two index probes per product on ix_price_history_product_created_at: the
+# first observation inside the window and the latest one overall
+GET_PRICE_DROPS_QUERY = """
+    SELECT
+        p.id AS product_id,
+        p.name,
+        p.url,
+        p.retailer_id,
+        r.name AS retailer_name,
+        first_obs.price::float AS start_price,
+        first_obs.created_at AS start_at,
+        last_obs.price::float AS current_price,
+        last_obs.created_at AS current_at,
+        (last_obs.price - first_obs.price)::float AS change,
+        (100 * (last_obs.price - first_obs.price) / first_obs.price)::float AS change_pct
+    FROM products p
+    JOIN retailers r ON r.id = p.retailer_id
+    CROSS JOIN LATERAL (
+        SELECT price, created_at FROM price_history
+        WHERE product_id = p.id AND created_at >= $1
+        ORDER BY created_at
+        LIMIT 1
+    ) first_obs
+    CROSS JOIN LATERAL (
+        SELECT price, created_at FROM price_history
+        WHERE product_id = p.id
+        ORDER BY created_at DESC
+        LIMIT 1
+    ) last_obs
+    WHERE ($2::uuid IS NULL OR p.retailer_id = $2)
+    AND first_obs.price > 0
+    AND last_obs.price < first_obs.price
+    ORDER BY change_pct, p.id
+    LIMIT $3
+"""
+
+# Per product, from the (product_id, created_at) index: the all-time
+# statistics aggregate its whole history, and only the window's rows go
+# through LAG. The window's range scan starts one row early, at the last
+# observation before it, so the first change in the window is measured
+# too; the rows come in index order, so LAG needs no sort.
+_PRICE_STATS_QUERY = """
+    WITH latest AS (
+        SELECT p.id AS product_id, p.name, p.retailer_id, last_obs.price AS current_price
+        FROM products p
+        CROSS JOIN LATERAL (
+            SELECT price FROM price_history
+            WHERE product_id = p.id
+            ORDER BY created_at DESC
+            LIMIT 1
+        ) last_obs
+        WHERE ($2::uuid IS NULL OR p.retailer_id = $2)
+    )
+    SELECT
+        l.product_id,
+        l.name,
+        l.retailer_id,
+        l.current_price::float AS current_price,
+        t.all_time_low::float AS all_time_low,
+        t.all_time_high::float AS all_time_high,
+        t.observations,
+        (100.0 * t.at_or_below / t.observations)::float AS current_percentile,
+        v.volatility
+    FROM latest l
+    CROSS JOIN LATERAL (
+        SELECT
+            MIN(price) AS all_time_low,
+            MAX(price) AS all_time_high,
+            COUNT(*) AS observations,
+            COUNT(*) FILTER (WHERE price <= l.current_price) AS at_or_below
+        FROM price_history
+        WHERE product_id = l.product_id
+    ) t
+    CROSS JOIN LATERAL (
+        SELECT STDDEV_SAMP(LN(CASE
+            WHEN created_at >= $1 AND price > 0 AND previous_price > 0
+            THEN price::float / previous_price::float
+        END)) AS volatility
+        FROM (
+            SELECT
+                price,
+                created_at,
+                LAG(price) OVER (ORDER BY created_at) AS previous_price
+            FROM price_history
+            WHERE product_id = l.product_id
+            AND created_at >= COALESCE((
+                SELECT MAX(created_at) FROM price_history
+                WHERE product_id = l.product_id AND created_at < $1
+            ), $1)
+        ) changes
+    ) v
+    ORDER BY {order}
+    LIMIT $3
+"""
+
+GET_PRICE_STATS_BY_VOLATILITY_QUERY = _PRICE_STATS_QUERY.format(
+    order="volatility DESC NULLS LAST, l.product_id"
+)
+
+# Products trading closest to their all-time low first
+GET_PRICE_STATS_BY_PERCENTILE_QUERY = _PRICE_STATS_QUERY.format(
+    order="current_percentile, l.product_id"
+)
+
+# Feeds the Parquet snapshots; (after, until] so consecutive runs neither
+# skip nor repeat rows
+SNAPSHOT_PRICE_HISTORY_QUERY = """
+    SELECT
+        ph.id,
+        ph.product_id,
+        p.retailer_id,
+        p.category,
+        ph.price,
+        ph.created_at
+    FROM price_history ph
+    JOIN products p ON p.id = ph.product_id
+    WHERE ph.created_at > $1
+    AND ph.created_at <= $2
+    ORDER BY ph.created_at, ph.id
 """
 
 DELETE_PRICE_HISTORY_QUERY = """
@@ -34,11 +218,10 @@ DELETE_PRICE_HISTORY_QUERY = """
 
 class PriceHistoryRepository(BaseRepository):
     async def create_price_history(self, product_id: UUID, price: float) -> Optional[dict]:
-        logger.info("Creating price history for product: %s", product_id)
+        logger.debug("Creating price history for product: %s", product_id)
         try:
-            price_history = await self.db.fetch_one(
-                CREATE_PRICE_HISTORY_QUERY,
-                values={"product_id": product_id, "price": price}
+            price_history = await self.fetch_one_prepared(
+                CREATE_PRICE_HISTORY_QUERY, product_id, price
             )
 
             if not price_history:
@@ -53,25 +236,20 @@ class PriceHistoryRepository(BaseRepository):
             )
             raise e
 
+    @read_only
     async def get_price_history(self, product_id: UUID, limit: int) -> Optional[list]:
-        logger.info("Getting price history for product: %s", product_id)
+        logger.debug("Getting price history for product: %s", product_id)
         try:
-            price_history = await self.db.fetch_all(
+            price_history = await self.fetch_all(
                 GET_PRICE_HISTORY_QUERY,
                 values={"product_id": product_id, "limit": limit}
             )
 
-            count = await self.db.fetch_one(
-                GET_PRICE_HISTORY_COUNT_QUERY,
-                values={"product_id": product_id}
-            )
-            count = count[0] if count else 0
-
             if not price_history:
                 logger.warning("Price history not found for product: %s", product_id)
                 return None
 
-            return price_history, count
+            return price_history
         except Exception as e:
             logger.exception(
                 "Error getting price history for product: %s. Exception: %s",
@@ -79,10 +257,145 @@ class PriceHistoryRepository(BaseRepository):
             )
             raise e
 
+    @read_only
+    async def get_price_history_buckets(
+        self, product_id: UUID, start: datetime, end: datetime,
+        bucket_seconds: int, limit: int
+    ) -> List[PricePoint]:
+        logger.debug("Getting bucketed price history for product: %s", product_id)
+        try:
+            buckets = await self.fetch_all(
+                GET_PRICE_HISTORY_BUCKETS_QUERY,
+                values={
+                    "product_id": product_id,
+                    "start": start,
+                    "end": end,
+                    "bucket_seconds": bucket_seconds,
+                    "limit": limit,
+                }
+            )
+
+            return [
+                PricePoint(
+                    timestamp=bucket["bucket"],
+                    price=bucket["price"],
+                    min_price=bucket["min_price"],
+                    max_price=bucket["max_price"],
+                    observations=bucket["observations"],
+                )
+                for bucket in buckets
+            ]
+        except Exception as e:
+            logger.exception(
+                "Error getting bucketed price history for product: %s. Exception: %s",
+                product_id, e
+            )
+            raise e
+
+    async def record_latest_prices(self, observations: Iterable[Tuple[UUID, float, datetime]]) -> None:
+        """Folds (product_id, price, observed_at) into product_latest_prices."""
+        logger.debug("Recording latest prices")
+        try:
+            # A product may appear twice in one batch; one upsert can only
+            # touch each row once, so keep its newest observation.
+            latest = {}
+            for product_id, price, observed_at in observations:
+                if product_id not in latest or observed_at >= latest[product_id][1]:
+                    latest[product_id] = (price, observed_at)
+            if not latest:
+                return
+
+            await self.execute_prepared(
+                UPSERT_LATEST_PRICES_QUERY,
+                list(latest),
+                [price for price, _ in latest.values()],
+                [observed_at for _, observed_at in latest.values()],
+            )
+        except Exception as e:
+            logger.exception("Error recording latest prices. Exception: %s", e)
+            raise e
+
+    @read_only
+    async def get_latest_prices(self, product_ids: List[UUID]) -> List[LatestPrice]:
+        logger.debug("Getting latest prices for %s products", len(product_ids))
+        try:
+            rows = await self.fetch_all_prepared(GET_LATEST_PRICES_QUERY, product_ids)
+            return [LatestPrice(**row) for row in rows]
+        except Exception as e:
+            logger.exception("Error getting latest prices. Exception: %s", e)
+            raise e
+
+    @read_only
+    async def get_price_drops(
+        self, since: datetime, limit: int, retailer_id: Optional[UUID] = None
+    ) -> List[PriceDrop]:
+        logger.debug("Getting price drops since: %s", since)
+        try:
+            drops = await self.fetch_all_prepared(
+                GET_PRICE_DROPS_QUERY, since, retailer_id, limit
+            )
+            return [PriceDrop(**drop) for drop in drops]
+        except Exception as e:
+            logger.exception("Error getting price drops since: %s. Exception: %s", since, e)
+            raise e
+
+    @read_only
+    async def get_price_stats(
+        self, since: datetime, limit: int, order: PriceStatsOrder,
+        retailer_id: Optional[UUID] = None
+    ) -> List[PriceStats]:
+        logger.debug("Getting price stats ordered by: %s", order.value)
+        try:
+            query = (
+                GET_PRICE_STATS_BY_PERCENTILE_QUERY if order == PriceStatsOrder.PERCENTILE
+                else GET_PRICE_STATS_BY_VOLATILITY_QUERY
+            )
+            stats = await self.fetch_all_prepared(query, since, retailer_id, limit)
+            return [PriceStats(**row) for row in stats]
+        except Exception as e:
+            logger.exception(
+                "Error getting price stats ordered by: %s. Exception: %s",
+                order.value, e
+            )
+            raise e
+
+    async def export_price_history(
+        self, product_id: UUID, start: Optional[datetime],
+        end: Optional[datetime], chunk_size: int
+    ) -> AsyncIterator[list]:
+        logger.debug("Exporting price history for product: %s", product_id)
+        try:
+            async for chunk in self.stream_chunks(
+                EXPORT_PRICE_HISTORY_QUERY, product_id, start, end, chunk_size=chunk_size
+            ):
+                yield chunk
+        except Exception as e:
+            logger.exception(
+                "Error exporting price history for product: %s. Exception: %s",
+                product_id, e
+            )
+            raise e
+
+    async def snapshot_price_history(
+        self, after: datetime, until: datetime, chunk_size: int
+    ) -> AsyncIterator[list]:
+        logger.debug("Reading price history snapshot rows: %s - %s", after, until)
+        try:
+            async for chunk in self.stream_chunks(
+                SNAPSHOT_PRICE_HISTORY_QUERY, after, until, chunk_size=chunk_size
+            ):
+                yield chunk
+        except Exception as e:
+            logger.exception(
+                "Error reading price history snapshot rows: %s - %s. Exception: %s",
+                after, until, e
+            )
+            raise e
+
     async def delete_price_history(self, product_id: UUID) -> Optional[dict]:
-        logger.info("Deleting price history for product: %s", product_id)
+        logger.debug("Deleting price history for product: %s", product_id)
         try:
-            price_history = await self.db.fetch_one(
+            price_history = await self.fetch_one(
                 DELETE_PRICE_HISTORY_QUERY,
                 values={"product_id": product_id}
             )
@@ -1,73 +1,169 @@
-from typing import Optional
+from datetime import datetime
+from decimal import Decimal
+from typing import AsyncIterator, Optional
 from uuid import UUID
 from asyncpg import UniqueViolationError
 from databases import Database
 from fastapi import HTTPException, status
-from scrape.core.logger import logger
+from scrape.core.logger import get_logger
+from scrape.db.pagination import (
+    TotalMode, InvalidCursorError, cursor_values, split_page, decode_rank_cursor, encode_rank_cursor
+)
 from scrape.db.repositories.base import BaseRepository
-from scrape.models.products.product import ProductCreate, Product, ProductList
+from scrape.db.replicas import read_only
+from scrape.models.products.product import (
+    ProductCreate, Product, ProductList, ProductSearchHit, ProductSearchPage
+)
+from scrape.services.wrangling.identity import product_host, product_key
 
+logger = get_logger(__name__)
 
-CREATE_PRODUCT_QUERY = """
+# Explicit so the stored search_vector never leaves the database
+PRODUCT_COLUMNS = "id, name, url, price, category, retailer_id, created_at, updated_at"
+
+CREATE_PRODUCT_QUERY = f"""
     INSERT INTO products (
         name,
         url,
         price,
         category,
-        retailer_id
+        retailer_id,
+        external_id
     ) VALUES (
         :name,
         :url,
         :price,
         :category,
-        :retailer_id
-    ) RETURNING *
+        :retailer_id,
+        :external_id
+    ) RETURNING {PRODUCT_COLUMNS}
+"""
+
+# Ingestion's fallback when the key lookup finds nothing: insert unless a
+# concurrent scrape has just added the key, else the existing row. The
+# outer SELECT reads the statement's snapshot, so exactly one branch
+# returns a row unless a concurrent insert races it. Not run for products
+# already stored, since it writes even when it inserts nothing.
+GET_OR_CREATE_PRODUCT_QUERY = f"""
+    WITH inserted AS (
+        INSERT INTO products (name, url, price, category, retailer_id, external_id)
+        VALUES ($1, $2, $3, $4, $5, $6)
+        ON CONFLICT (external_id, retailer_id) DO NOTHING
+        RETURNING {PRODUCT_COLUMNS}
+    )
+    SELECT {PRODUCT_COLUMNS} FROM inserted
+    UNION ALL
+    SELECT {PRODUCT_COLUMNS} FROM products WHERE external_id = $6 AND retailer_id = $5
+    LIMIT 1
+"""
+
+GET_PRODUCTS_QUERY = f"""
+    SELECT {PRODUCT_COLUMNS} FROM products
+    ORDER BY created_at DESC, id DESC
+    LIMIT :limit
 """
 
-GET_PRODUCTS_QUERY = """
-    SELECT * FROM products
-    ORDER BY created_at DESC
+GET_PRODUCTS_AFTER_CURSOR_QUERY = f"""
+    SELECT {PRODUCT_COLUMNS} FROM products
+    WHERE (created_at, id) < (:cursor_created_at, :cursor_id)
+    ORDER BY created_at DESC, id DESC
     LIMIT :limit
-    OFFSET :offset
 """
 
 GET_PRODUCTS_COUNT_QUERY = """
     SELECT COUNT(*) FROM products
 """
 
-GET_PRODUCT_BY_ID_QUERY = """
-    SELECT * FROM products WHERE id = :id
+ESTIMATE_PRODUCTS_COUNT_QUERY = """
+    SELECT 1 FROM products
+"""
+
+# Positional parameters: these run through the prepared fast path
+GET_PRODUCT_BY_ID_QUERY = f"""
+    SELECT {PRODUCT_COLUMNS} FROM products WHERE id = $1
+"""
+
+GET_PRODUCT_BY_KEY_QUERY = f"""
+    SELECT {PRODUCT_COLUMNS} FROM products WHERE external_id = $1 AND retailer_id = $2
+"""
+
+# By the URL's canonical key; the host keeps marketplaces sharing an ASIN apart
+GET_PRODUCT_BY_URL_QUERY = f"""
+    SELECT {PRODUCT_COLUMNS} FROM products
+    WHERE external_id = $1 AND lower(split_part(url, '/', 3)) = $2
+    LIMIT 1
+"""
+
+# Validators for conditional GETs: the row's updated_at for one product,
+# the table's change counter (bumped by a statement trigger) for lists
+GET_PRODUCT_UPDATED_AT_BY_ID_QUERY = """
+    SELECT updated_at FROM products WHERE id = $1
+"""
+
+GET_PRODUCT_UPDATED_AT_BY_URL_QUERY = """
+    SELECT updated_at FROM products
+    WHERE external_id = $1 AND lower(split_part(url, '/', 3)) = $2
+    LIMIT 1
+"""
+
+GET_PRODUCTS_VERSION_QUERY = """
+    SELECT version, updated_at FROM table_versions WHERE table_name = 'products'
+"""
+
+# Walks ix_products_created_at_id backwards, so there is no sort to spill
+EXPORT_PRODUCTS_QUERY = """
+    SELECT id, name, url, price, category, retailer_id, created_at, updated_at
+    FROM products
+    ORDER BY created_at, id
 """
 
-GET_PRODUCT_BY_URL_QUERY = """
-    SELECT * FROM products WHERE url = :url
+# Full-text rank (name weighted over category) plus the best trigram
+# similarity, so misspellings still match. The three predicates are each
+# backed by a GIN index and combine as a BitmapOr. Cast to real so the
+# score round-trips through the cursor exactly.
+SEARCH_PRODUCTS_QUERY = f"""
+    SELECT * FROM (
+        SELECT {PRODUCT_COLUMNS},
+            (
+                ts_rank_cd(search_vector, query)
+                + GREATEST(similarity(name, $1), similarity(COALESCE(category, ''), $1))
+            )::real AS score
+        FROM products, websearch_to_tsquery('english', $1) AS query
+        WHERE (search_vector @@ query OR name % $1 OR category % $1)
+        AND ($2::uuid IS NULL OR retailer_id = $2)
+        AND ($3::numeric IS NULL OR price >= $3)
+        AND ($4::numeric IS NULL OR price <= $4)
+    ) hits
+    WHERE $5::real IS NULL OR (score, id) < ($5, $6::uuid)
+    ORDER BY score DESC, id DESC
+    LIMIT $7
 """
 
-DELETE_PRODUCT_BY_ID_QUERY = """
+DELETE_PRODUCT_BY_ID_QUERY = f"""
     DELETE FROM products WHERE id = :id
-    RETURNING *
+    RETURNING {PRODUCT_COLUMNS}
 """
 
 
 class ProductRepository(BaseRepository):
-    def __init__(self, db: Database):
-        super().__init__(db)
-        logger.info("ProductRepository initialized.")
+    def __init__(self, db: Database, read_db: Database = None):
+        super().__init__(db, read_db)
+        logger.debug("ProductRepository initialized.")
 
     async def create_product(self, product_data: ProductCreate) -> Optional[Product]:
-        logger.info("Creating product: %s", product_data.name)
+        logger.debug("Creating product: %s", product_data.name)
         try:
             values = product_data.model_dump()
-            existed = await self.db.fetch_one(
-                GET_PRODUCT_BY_URL_QUERY,
-                values={"url": product_data.url}
+            values["external_id"] = product_data.external_id or product_key(product_data.url)
+            existed = await self.fetch_one_prepared(
+                GET_PRODUCT_BY_KEY_QUERY, values["external_id"], product_data.retailer_id
             )
 
             if existed:
                 logger.warning("Product already exists: %s", product_data.name)
                 return None
 
-            product = await self.db.fetch_one(CREATE_PRODUCT_QUERY, values=values)
+            product = await self.fetch_one(CREATE_PRODUCT_QUERY, values=values)
 
             if not product:
                 logger.warning("Product not created: %s", product_data.name)
@@ -86,33 +182,111 @@ class ProductRepository(BaseRepository):
             )
             raise e
 
-    async def get_products(self, limit: int, offset: int) -> ProductList:
-        logger.info("Getting products")
+    async def get_or_create_product(self, product_data: ProductCreate) -> Optional[Product]:
+        logger.debug("Getting or creating product: %s", product_data.name)
         try:
-            values = {"limit": limit, "offset": offset}
-            products = await self.db.fetch_all(GET_PRODUCTS_QUERY, values=values)
+            price = product_data.price
+            external_id = product_data.external_id or product_key(product_data.url)
+            # Nearly every product of a scrape is already stored
+            product = await self.fetch_one_prepared(
+                GET_PRODUCT_BY_KEY_QUERY, external_id, product_data.retailer_id
+            )
+            if not product:
+                product = await self.fetch_one_prepared(
+                    GET_OR_CREATE_PRODUCT_QUERY,
+                    product_data.name, product_data.url,
+                    Decimal(str(price)) if price is not None else None,
+                    product_data.category, product_data.retailer_id, external_id
+                )
+
+            if not product:
+                logger.warning("Product neither created nor found: %s", product_data.name)
+                return None
+
+            return Product(**product)
+        except Exception as e:
+            logger.exception(
+                "Error getting or creating product: %s. Exception: %s",
+                product_data.name, e
+            )
+            raise e
+
+    @read_only
+    async def get_product_rows(
+        self, limit: int, cursor: Optional[str] = None,
+        total: TotalMode = TotalMode.NONE
+    ) -> dict:
+        """
+        One page as raw records, for callers that encode rows directly
+        instead of going through the Product model.
+        """
+        logger.debug("Getting product rows")
+        try:
+            values = cursor_values(cursor)
+            query = GET_PRODUCTS_AFTER_CURSOR_QUERY if values else GET_PRODUCTS_QUERY
+            values["limit"] = limit + 1
+            products = await self.fetch_all(query, values=values)
+            products, next_cursor = split_page(products, limit)
 
             if len(products) == 0:
                 logger.warning("No products found")
-                return ProductList(products=[], total=0)
 
-            total = await self.db.fetch_one(GET_PRODUCTS_COUNT_QUERY)
-            total = total[0] if total else 0
+            count = await self.count_total(
+                total, GET_PRODUCTS_COUNT_QUERY, ESTIMATE_PRODUCTS_COUNT_QUERY
+            )
+
+            return {"products": products, "total": count, "next_cursor": next_cursor}
+        except InvalidCursorError:
+            raise
+        except Exception as e:
+            logger.exception("Error getting product rows. Exception: %s", e)
+            raise e
 
-            products = [Product(**product) for product in products]
+    async def get_products(
+        self, limit: int, cursor: Optional[str] = None,
+        total: TotalMode = TotalMode.NONE
+    ) -> ProductList:
+        logger.debug("Getting products")
+        page = await self.get_product_rows(limit=limit, cursor=cursor, total=total)
+        return ProductList(
+            products=[Product(**product) for product in page["products"]],
+            total=page["total"], next_cursor=page["next_cursor"]
+        )
 
-            return ProductList(products=products, total=total)
+    @read_only
+    async def search_products(
+        self, q: str, limit: int, cursor: Optional[str] = None,
+        retailer_id: Optional[UUID] = None,
+        min_price: Optional[Decimal] = None, max_price: Optional[Decimal] = None
+    ) -> ProductSearchPage:
+        logger.debug("Searching products: %s", q)
+        try:
+            after_score, after_id = decode_rank_cursor(cursor) if cursor else (None, None)
+            rows = await self.fetch_all_prepared(
+                SEARCH_PRODUCTS_QUERY, q, retailer_id, min_price, max_price,
+                after_score, after_id, limit + 1
+            )
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_rank_cursor(rows[-1]["score"], rows[-1]["id"])
+
+            return ProductSearchPage(
+                products=[ProductSearchHit(**row) for row in rows],
+                next_cursor=next_cursor
+            )
+        except InvalidCursorError:
+            raise
         except Exception as e:
-            logger.exception("Error getting products. Exception: %s", e)
+            logger.exception("Error searching products: %s. Exception: %s", q, e)
             raise e
 
+    @read_only
     async def get_product_by_id(self, product_id: UUID) -> Optional[Product]:
-        logger.info("Getting product by ID: %s", product_id)
+        logger.debug("Getting product by ID: %s", product_id)
         try:
-            product = await self.db.fetch_one(
-                GET_PRODUCT_BY_ID_QUERY,
-                values={"id": product_id}
-            )
+            product = await self.fetch_one_prepared(GET_PRODUCT_BY_ID_QUERY, product_id)
 
             if not product:
                 logger.warning("Product not found by ID: %s", product_id)
@@ -127,11 +301,10 @@ class ProductRepository(BaseRepository):
             raise e
 
     async def get_product_by_url(self, product_url: str) -> Optional[Product]:
-        logger.info("Getting product by URL: %s", product_url)
+        logger.debug("Getting product by URL: %s", product_url)
         try:
-            product = await self.db.fetch_one(
-                GET_PRODUCT_BY_URL_QUERY,
-                values={"url": product_url}
+            product = await self.fetch_one_prepared(
+                GET_PRODUCT_BY_URL_QUERY, product_key(product_url), product_host(product_url)
             )
 
             if not product:
@@ -146,10 +319,49 @@ class ProductRepository(BaseRepository):
             )
             raise e
 
+    @read_only
+    async def get_product_updated_at(
+        self, product_id: Optional[UUID] = None, product_url: Optional[str] = None
+    ) -> Optional[datetime]:
+        logger.debug("Getting product version: %s", product_id or product_url)
+        try:
+            if product_id is not None:
+                row = await self.fetch_one_prepared(GET_PRODUCT_UPDATED_AT_BY_ID_QUERY, product_id)
+            else:
+                row = await self.fetch_one_prepared(
+                    GET_PRODUCT_UPDATED_AT_BY_URL_QUERY, product_key(product_url), product_host(product_url)
+                )
+            return row["updated_at"] if row else None
+        except Exception as e:
+            logger.exception(
+                "Error getting product version: %s. Exception: %s",
+                product_id or product_url, e
+            )
+            raise e
+
+    @read_only
+    async def get_products_version(self) -> Optional[dict]:
+        logger.debug("Getting products table version")
+        try:
+            row = await self.fetch_one_prepared(GET_PRODUCTS_VERSION_QUERY)
+            return dict(row) if row else None
+        except Exception as e:
+            logger.exception("Error getting products table version. Exception: %s", e)
+            raise e
+
+    async def export_products(self, chunk_size: int) -> AsyncIterator[list]:
+        logger.debug("Exporting products")
+        try:
+            async for chunk in self.stream_chunks(EXPORT_PRODUCTS_QUERY, chunk_size=chunk_size):
+                yield chunk
+        except Exception as e:
+            logger.exception("Error exporting products. Exception: %s", e)
+            raise e
+
     async def delete_product_by_id(self, product_id: UUID) -> Optional[Product]:
-        logger.info("Deleting product by ID: %s", product_id)
+        logger.debug("Deleting product by ID: %s", product_id)
         try:
-            product = await self.db.fetch_one(
+            product = await self.fetch_one(
                 DELETE_PRODUCT_BY_ID_QUERY,
                 values={"id": product_id}
             )
@@ -0,0 +1,190 @@
+from typing import AsyncIterator, Dict, Iterable, List, Sequence, Tuple
+from uuid import UUID
+from databases import Database
+from scrape.core.logger import get_logger
+from scrape.db.repositories.base import BaseRepository
+from scrape.db.replicas import read_only
+from scrape.models.products.product_match import ProductMatch
+
+logger = get_logger(__name__)
+
+SIGNATURE_COLUMNS = ("product_id", "retailer_id", "band_keys", "signature", "specs")
+MATCH_COLUMNS = ("product_id", "cluster_id", "similarity")
+
+GET_ALL_PRODUCT_NAMES_QUERY = """
+    SELECT id, name, retailer_id FROM products
+"""
+
+# New products, and products renamed since their signature was computed
+GET_PENDING_PRODUCT_NAMES_QUERY = """
+    SELECT p.id, p.name, p.retailer_id
+    FROM products p
+    LEFT JOIN product_signatures s ON s.product_id = p.id
+    WHERE s.product_id IS NULL OR s.computed_at < p.updated_at
+"""
+
+# Signatures go through COPY into a transaction-scoped stage: arrays of
+# arrays do not unnest into rows
+CREATE_SIGNATURES_STAGE_QUERY = """
+    CREATE TEMPORARY TABLE product_signatures_stage
+    (LIKE product_signatures INCLUDING DEFAULTS) ON COMMIT DROP
+"""
+
+UPSERT_SIGNATURES_QUERY = """
+    INSERT INTO product_signatures (product_id, retailer_id, band_keys, signature, specs)
+    SELECT product_id, retailer_id, band_keys, signature, specs FROM product_signatures_stage
+    ON CONFLICT (product_id) DO UPDATE SET
+        retailer_id = EXCLUDED.retailer_id,
+        band_keys = EXCLUDED.band_keys,
+        signature = EXCLUDED.signature,
+        specs = EXCLUDED.specs,
+        computed_at = now()
+"""
+
+# ix_product_signatures_band_keys: one bitmap scan for a whole batch
+GET_CANDIDATES_QUERY = """
+    SELECT product_id, retailer_id, band_keys, signature, specs
+    FROM product_signatures
+    WHERE band_keys && $1::bigint[]
+"""
+
+GET_CLUSTER_IDS_QUERY = """
+    SELECT product_id, cluster_id FROM product_matches
+    WHERE product_id = ANY($1::uuid[])
+"""
+
+MERGE_CLUSTERS_QUERY = """
+    UPDATE product_matches SET cluster_id = $1
+    WHERE cluster_id = ANY($2::uuid[])
+"""
+
+UPSERT_MATCHES_QUERY = """
+    INSERT INTO product_matches AS m (product_id, cluster_id, similarity)
+    SELECT * FROM unnest($1::uuid[], $2::uuid[], $3::real[])
+    ON CONFLICT (product_id) DO UPDATE SET
+        cluster_id = EXCLUDED.cluster_id,
+        similarity = GREATEST(m.similarity, EXCLUDED.similarity),
+        matched_at = now()
+"""
+
+# DELETE rather than TRUNCATE, which would block readers until commit
+DELETE_MATCHES_QUERY = """
+    DELETE FROM product_matches
+"""
+
+GET_MATCHES_QUERY = """
+    SELECT p.id, p.name, p.url, p.price, p.category, p.retailer_id, p.created_at, p.updated_at,
+        m.cluster_id, m.similarity
+    FROM product_matches own
+    JOIN product_matches m ON m.cluster_id = own.cluster_id AND m.product_id <> own.product_id
+    JOIN products p ON p.id = m.product_id
+    WHERE own.product_id = $1
+    ORDER BY m.similarity DESC, p.id
+    LIMIT $2
+"""
+
+
+class ProductMatchRepository(BaseRepository):
+    def __init__(self, db: Database, read_db: Database = None):
+        super().__init__(db, read_db)
+        logger.debug("ProductMatchRepository initialized.")
+
+    async def stream_product_names(self, full: bool, chunk_size: int) -> AsyncIterator[list]:
+        """Every product if `full`, otherwise those without a current signature."""
+        logger.debug("Streaming product names, full: %s", full)
+        query = GET_ALL_PRODUCT_NAMES_QUERY if full else GET_PENDING_PRODUCT_NAMES_QUERY
+        try:
+            async for chunk in self.stream_chunks(query, chunk_size=chunk_size):
+                yield chunk
+        except Exception as e:
+            logger.exception("Error streaming product names. Exception: %s", e)
+            raise e
+
+    async def save_signatures(self, records: Iterable[Tuple[UUID, UUID, List[int], bytes, List[str]]]) -> None:
+        logger.debug("Saving product signatures")
+        try:
+            async with self.db.connection() as connection:
+                raw = connection.raw_connection
+                async with raw.transaction():
+                    await raw.execute(CREATE_SIGNATURES_STAGE_QUERY)
+                    await raw.copy_records_to_table(
+                        "product_signatures_stage", records=records, columns=SIGNATURE_COLUMNS
+                    )
+                    await raw.execute(UPSERT_SIGNATURES_QUERY)
+        except Exception as e:
+            logger.exception("Error saving product signatures. Exception: %s", e)
+            raise e
+
+    async def get_candidates(self, band_keys: Sequence[int]) -> list:
+        """
+        Products sharing at least one bucket key. Runs on the primary, so
+        signatures saved a moment ago are among them.
+        """
+        logger.debug("Getting match candidates for %s band keys", len(band_keys))
+        try:
+            return await self.fetch_all_prepared(GET_CANDIDATES_QUERY, list(band_keys))
+        except Exception as e:
+            logger.exception("Error getting match candidates. Exception: %s", e)
+            raise e
+
+    async def get_cluster_ids(self, product_ids: Sequence[UUID]) -> Dict[UUID, UUID]:
+        logger.debug("Getting cluster IDs for %s products", len(product_ids))
+        try:
+            rows = await self.fetch_all_prepared(GET_CLUSTER_IDS_QUERY, list(product_ids))
+            return {row["product_id"]: row["cluster_id"] for row in rows}
+        except Exception as e:
+            logger.exception("Error getting cluster IDs. Exception: %s", e)
+            raise e
+
+    async def save_matches(
+        self, matches: Sequence[Tuple[UUID, UUID, float]],
+        merges: Dict[UUID, List[UUID]]
+    ) -> None:
+        """
+        Upserts (product_id, cluster_id, similarity) rows after moving every
+        member of the clusters in `merges` values to the cluster in its key.
+        """
+        logger.debug("Saving %s product matches", len(matches))
+        try:
+            async with self.db.connection() as connection:
+                async with connection.raw_connection.transaction():
+                    for cluster_id, merged in merges.items():
+                        await self.execute_prepared(MERGE_CLUSTERS_QUERY, cluster_id, merged)
+                    if matches:
+                        await self.execute_prepared(
+                            UPSERT_MATCHES_QUERY,
+                            [product_id for product_id, _, _ in matches],
+                            [cluster_id for _, cluster_id, _ in matches],
+                            [similarity for _, _, similarity in matches],
+                        )
+        except Exception as e:
+            logger.exception("Error saving product matches. Exception: %s", e)
+            raise e
+
+    async def replace_matches(self, matches: Iterable[Tuple[UUID, UUID, float]]) -> None:
+        """Swaps in a full rebuild; readers see the old clusters until commit."""
+        logger.debug("Replacing product matches")
+        try:
+            async with self.db.connection() as connection:
+                raw = connection.raw_connection
+                async with raw.transaction():
+                    await raw.execute(DELETE_MATCHES_QUERY)
+                    await raw.copy_records_to_table(
+                        "product_matches", records=matches, columns=MATCH_COLUMNS
+                    )
+        except Exception as e:
+            logger.exception("Error replacing product matches. Exception: %s", e)
+            raise e
+
+    @read_only
+    async def get_matches(self, product_id: UUID, limit: int) -> List[ProductMatch]:
+        logger.debug("Getting matches for product: %s", product_id)
+        try:
+            rows = await self.fetch_all_prepared(GET_MATCHES_QUERY, product_id, limit)
+            return [ProductMatch(**row) for row in rows]
+        except Exception as e:
+            logger.exception(
+                "Error getting matches for product: %s. Exception: %s",
+                product_id, e
+            )
+            raise e
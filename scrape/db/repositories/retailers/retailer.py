@@ -1,8 +1,10 @@
 from typing import Optional
 from uuid import UUID
-from scrape.core.logger import logger
+from scrape.core.logger import get_logger
 from scrape.db.repositories.base import BaseRepository
 
+logger = get_logger(__name__)
+
 CREATE_RETAILER_QUERY = """
     INSERT INTO retailers (
         name,
@@ -47,9 +49,9 @@ UPDATE_RETAILER_QUERY = """
 
 class RetailerRepository(BaseRepository):
     async def get_retailer_by_url(self, url: str) -> Optional[dict]:
-        logger.info("Getting retailer by URL: %s", url)
+        logger.debug("Getting retailer by URL: %s", url)
         try:
-            retailer = await self.db.fetch_one(
+            retailer = await self.fetch_one(
                 GET_RETAILER_BY_URL_QUERY,
                 values={"url": url}
             )
@@ -67,9 +69,9 @@ class RetailerRepository(BaseRepository):
             raise e
 
     async def get_retailer_by_id(self, retailer_id: UUID) -> Optional[dict]:
-        logger.info("Getting retailer by ID: %s", retailer_id)
+        logger.debug("Getting retailer by ID: %s", retailer_id)
         try:
-            retailer = await self.db.fetch_one(
+            retailer = await self.fetch_one(
                 GET_RETAILER_BY_ID_QUERY,
                 values={"id": retailer_id}
             )
@@ -87,42 +89,42 @@ class RetailerRepository(BaseRepository):
             raise e
 
     async def create_retailer(self, retailer: dict) -> dict:
-        logger.info("Creating retailer: %s", retailer)
+        logger.debug("Creating retailer: %s", retailer.get("name"))
         try:
-            created_retailer = await self.db.fetch_one(
+            created_retailer = await self.fetch_one(
                 CREATE_RETAILER_QUERY,
                 values=retailer
             )
 
             if not created_retailer:
-                logger.warning("Retailer not created: %s", retailer)
+                logger.warning("Retailer not created: %s", retailer.get("name"))
                 return None
 
             return created_retailer
         except Exception as e:
             logger.exception(
                 "Error creating retailer: %s. Exception: %s",
-                retailer, e
+                retailer.get("name"), e
             )
             raise e
 
     async def update_retailer(self, retailer: dict) -> dict:
-        logger.info("Updating retailer: %s", retailer)
+        logger.debug("Updating retailer: %s", retailer.get("id"))
         try:
-            updated_retailer = await self.db.fetch_one(
+            updated_retailer = await self.fetch_one(
                 UPDATE_RETAILER_QUERY,
                 values=retailer
             )
 
             if not updated_retailer:
-                logger.warning("Retailer not updated: %s", retailer)
+                logger.warning("Retailer not updated: %s", retailer.get("id"))
                 return None
 
             return updated_retailer
         except Exception as e:
             logger.exception(
                 "Error updating retailer: %s. Exception: %s",
-                retailer, e
+                retailer.get("id"), e
             )
             raise e
 
@@ -1,7 +1,16 @@
-from typing import Optional
+import json
+from datetime import datetime, timezone
+from typing import List, Optional
 from uuid import UUID
-from scrape.core.logger import logger
+from scrape.core.logger import get_logger
+from scrape.db.pagination import TotalMode, InvalidCursorError, cursor_values, split_page
 from scrape.db.repositories.base import BaseRepository
+from scrape.db.replicas import read_only
+from scrape.models.scrape_tasks.scrape_task import (
+    ScrapeTask, ScrapeTaskList, ScrapeTaskTiming, ScrapeCost
+)
+
+logger = get_logger(__name__)
 
 
 CREATE_SCRAPE_TASK_QUERY = """
@@ -28,7 +37,15 @@ GET_SCRAPE_TASK_QUERY = """
 GET_SCRAPE_TASKS_QUERY = """
     SELECT * FROM scrape_tasks
     WHERE user_id = :user_id
-    ORDER BY created_at DESC
+    ORDER BY created_at DESC, id DESC
+    LIMIT :limit
+"""
+
+GET_SCRAPE_TASKS_AFTER_CURSOR_QUERY = """
+    SELECT * FROM scrape_tasks
+    WHERE user_id = :user_id
+    AND (created_at, id) < (:cursor_created_at, :cursor_id)
+    ORDER BY created_at DESC, id DESC
     LIMIT :limit
 """
 
@@ -37,6 +54,95 @@ GET_SCRAPE_TASKS_COUNT_QUERY = """
     WHERE user_id = :user_id
 """
 
+ESTIMATE_SCRAPE_TASKS_COUNT_QUERY = """
+    SELECT 1 FROM scrape_tasks
+    WHERE user_id = :user_id
+"""
+
+START_SCRAPE_TASK_QUERY = """
+    INSERT INTO scrape_tasks (
+        source,
+        status,
+        started_at,
+        retailer_id,
+        query
+    ) VALUES (
+        :source,
+        'running',
+        :started_at,
+        :retailer_id,
+        :query
+    ) RETURNING id
+"""
+
+FINISH_SCRAPE_TASK_QUERY = """
+    UPDATE scrape_tasks SET
+        status = :status,
+        finished_at = :finished_at,
+        phases = CAST(:phases AS JSONB),
+        phase_totals = CAST(:phase_totals AS JSONB),
+        pages = :pages,
+        bytes_downloaded = :bytes_downloaded,
+        retries = :retries,
+        captchas = :captchas,
+        proxy = :proxy,
+        browser_seconds = :browser_seconds,
+        db_round_trips = :db_round_trips
+    WHERE id = :id
+"""
+
+# Scrapes started by the API belong to no user and are visible to everyone
+GET_SCRAPE_TASK_TIMING_QUERY = """
+    SELECT * FROM scrape_tasks
+    WHERE id = :id AND (user_id = :user_id OR user_id IS NULL)
+"""
+
+# Per source and day; phase averages are taken over every finished task in
+# the group, so a phase a task never entered counts as zero for it. Groups
+# with no phases at all (tasks finished before phase_totals was recorded)
+# get an empty object rather than NULL.
+GET_SCRAPE_COSTS_QUERY = """
+    WITH finished AS (
+        SELECT * FROM scrape_tasks
+        WHERE started_at >= :since
+        AND finished_at IS NOT NULL
+        AND (CAST(:source AS TEXT) IS NULL OR source = :source)
+    ),
+    totals AS (
+        SELECT
+            source,
+            CAST(date_trunc('day', started_at) AS DATE) AS day,
+            COUNT(*) AS tasks,
+            COUNT(*) FILTER (WHERE status = 'failed') AS failed,
+            AVG(EXTRACT(EPOCH FROM finished_at - started_at)) AS avg_seconds,
+            AVG(pages) AS avg_pages,
+            AVG(bytes_downloaded) AS avg_bytes,
+            AVG(retries) AS avg_retries,
+            AVG(browser_seconds) AS avg_browser_seconds,
+            AVG(db_round_trips) AS avg_db_round_trips
+        FROM finished
+        GROUP BY 1, 2
+    ),
+    phases AS (
+        SELECT
+            f.source,
+            CAST(date_trunc('day', f.started_at) AS DATE) AS day,
+            p.key AS phase,
+            SUM(CAST(p.value AS DOUBLE PRECISION)) AS ms
+        FROM finished f, jsonb_each_text(f.phase_totals) AS p
+        GROUP BY 1, 2, 3
+    )
+    SELECT
+        t.*,
+        COALESCE((
+            SELECT jsonb_object_agg(p.phase, round(CAST(p.ms / t.tasks AS NUMERIC), 1))
+            FROM phases p
+            WHERE p.source = t.source AND p.day = t.day
+        ), CAST('{}' AS JSONB)) AS avg_phase_ms
+    FROM totals t
+    ORDER BY t.day DESC, t.source
+"""
+
 DELETE_SCRAPE_TASK_QUERY = """
     DELETE FROM scrape_tasks
     WHERE id = :id AND user_id = :user_id
@@ -45,23 +151,23 @@ DELETE_SCRAPE_TASK_QUERY = """
 
 class ScrapeTaskRepository(BaseRepository):
     async def create_scrape_task(self, scrape_task: dict):
-        logger.info("Creating scrape task: %s", scrape_task)
+        logger.debug("Creating scrape task: %s", scrape_task.get("source"))
         try:
-            return await self.db.fetch_one(
+            return await self.fetch_one(
                 CREATE_SCRAPE_TASK_QUERY,
                 values=scrape_task
             )
         except Exception as e:
             logger.exception(
                 "Error creating scrape task: %s. Exception: %s",
-                scrape_task, e
+                scrape_task.get("source"), e
             )
             raise e
 
     async def get_scrape_task_by_id(self, scrape_task_id: UUID, user_id: UUID):
-        logger.info("Getting scrape task by ID: %s", scrape_task_id)
+        logger.debug("Getting scrape task by ID: %s", scrape_task_id)
         try:
-            task = await self.db.fetch_one(
+            task = await self.fetch_one(
                 GET_SCRAPE_TASK_QUERY,
                 values={"id": scrape_task_id, "user_id": user_id}
             )
@@ -78,20 +184,31 @@ class ScrapeTaskRepository(BaseRepository):
             )
             raise e
 
-    async def get_scrape_tasks(self, limit: int, user_id: UUID):
-        logger.info("Getting scrape tasks")
+    @read_only
+    async def get_scrape_tasks(
+        self, limit: int, user_id: UUID, cursor: Optional[str] = None,
+        total: TotalMode = TotalMode.NONE
+    ) -> ScrapeTaskList:
+        logger.debug("Getting scrape tasks")
         try:
-            tasks = await self.db.fetch_all(
-                GET_SCRAPE_TASKS_QUERY,
-                values={"limit": limit, "user_id": user_id}
-            )
+            values = cursor_values(cursor)
+            query = GET_SCRAPE_TASKS_AFTER_CURSOR_QUERY if values else GET_SCRAPE_TASKS_QUERY
+            values.update({"limit": limit + 1, "user_id": user_id})
+            tasks = await self.fetch_all(query, values=values)
+            tasks, next_cursor = split_page(tasks, limit)
 
-            count = await self.db.fetch_one(
-                GET_SCRAPE_TASKS_COUNT_QUERY, values={"user_id": user_id}
+            count = await self.count_total(
+                total, GET_SCRAPE_TASKS_COUNT_QUERY, ESTIMATE_SCRAPE_TASKS_COUNT_QUERY,
+                values={"user_id": user_id}
             )
-            count = count[0] if count else 0
 
-            return tasks, count
+            return ScrapeTaskList(
+                tasks=[ScrapeTask(**task) for task in tasks],
+                total=count,
+                next_cursor=next_cursor
+            )
+        except InvalidCursorError:
+            raise
         except Exception as e:
             logger.exception(
                 "Error getting scrape tasks. Exception: %s",
@@ -100,9 +217,9 @@ class ScrapeTaskRepository(BaseRepository):
             raise e
 
     async def delete_scrape_task(self, scrape_task_id: UUID, user_id: UUID):
-        logger.info("Deleting scrape task by ID: %s", scrape_task_id)
+        logger.debug("Deleting scrape task by ID: %s", scrape_task_id)
         try:
-            deleted = await self.db.execute(
+            deleted = await self.execute(
                 DELETE_SCRAPE_TASK_QUERY,
                 values={"id": scrape_task_id, "user_id": user_id}
             )
@@ -118,3 +235,92 @@ class ScrapeTaskRepository(BaseRepository):
                 scrape_task_id, e
             )
             raise e
+
+    async def start_scrape_task(
+        self, source: str, retailer_id: Optional[UUID], query: Optional[str]
+    ):
+        logger.debug("Starting scrape task: %s", source)
+        try:
+            return await self.fetch_one(
+                START_SCRAPE_TASK_QUERY,
+                values={
+                    "source": source,
+                    "started_at": datetime.now(timezone.utc),
+                    "retailer_id": retailer_id,
+                    "query": query,
+                }
+            )
+        except Exception as e:
+            logger.exception(
+                "Error starting scrape task: %s. Exception: %s",
+                source, e
+            )
+            raise e
+
+    async def finish_scrape_task(self, scrape_task_id: UUID, status: str, stats) -> None:
+        """`stats` is the scrape's ScrapeStats."""
+        logger.debug("Finishing scrape task: %s", scrape_task_id)
+        try:
+            values = stats.as_values()
+            values.update({
+                "id": scrape_task_id,
+                "status": status,
+                "finished_at": datetime.now(timezone.utc),
+                "phases": json.dumps(values["phases"]),
+                "phase_totals": json.dumps(values["phase_totals"]),
+            })
+            await self.execute(FINISH_SCRAPE_TASK_QUERY, values=values)
+        except Exception as e:
+            logger.exception(
+                "Error finishing scrape task: %s. Exception: %s",
+                scrape_task_id, e
+            )
+            raise e
+
+    @read_only
+    async def get_scrape_task_timing(
+        self, scrape_task_id: UUID, user_id: UUID
+    ) -> Optional[ScrapeTaskTiming]:
+        logger.debug("Getting scrape task timing: %s", scrape_task_id)
+        try:
+            task = await self.fetch_one(
+                GET_SCRAPE_TASK_TIMING_QUERY,
+                values={"id": scrape_task_id, "user_id": user_id}
+            )
+
+            if not task:
+                logger.warning("Scrape task not found by ID: %s", scrape_task_id)
+                return None
+
+            return ScrapeTaskTiming(**task)
+        except Exception as e:
+            logger.exception(
+                "Error getting scrape task timing: %s. Exception: %s",
+                scrape_task_id, e
+            )
+            raise e
+
+    @read_only
+    async def get_scrape_costs(
+        self, since: datetime, source: Optional[str] = None
+    ) -> List[ScrapeCost]:
+        logger.debug("Getting scrape costs since: %s", since)
+        try:
+            rows = await self.fetch_all(
+                GET_SCRAPE_COSTS_QUERY,
+                values={"since": since, "source": source}
+            )
+
+            costs = []
+            for row in rows:
+                cost = ScrapeCost(**row)
+                if cost.avg_phase_ms:
+                    cost.dominant_phase = max(cost.avg_phase_ms, key=cost.avg_phase_ms.get)
+                costs.append(cost)
+            return costs
+        except Exception as e:
+            logger.exception(
+                "Error getting scrape costs. Exception: %s",
+                e
+            )
+            raise e
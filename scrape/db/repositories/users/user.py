@@ -1,12 +1,19 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional
 from uuid import UUID
 from asyncpg import UniqueViolationError
 from databases import Database
 from fastapi import HTTPException, status
-from scrape.core.logger import logger
+from scrape.core.logger import get_logger
+from scrape.db.pagination import TotalMode, InvalidCursorError, cursor_values, split_page
 from scrape.db.repositories.base import BaseRepository
-from scrape.models.users.user import UserInDB, User, UserPasswordUpdateRequest, UserUpdateRequest
+from scrape.db.replicas import read_only
+from scrape.models.users.user import (
+    UserInDB, User, UserList, UserResponse,
+    UserPasswordUpdateRequest, UserUpdateRequest
+)
+
+logger = get_logger(__name__)
 
 CREATE_USER_QUERY = """
     INSERT INTO users (
@@ -31,21 +38,33 @@ GET_USER_QUERY = """
     WHERE id = :id
 """
 
+# Positional parameters: runs through the prepared fast path
 GET_USER_BY_EMAIL_QUERY = """
     SELECT * FROM users
-    WHERE email = :email
+    WHERE email = $1
 """
 
 GET_ALL_USERS_QUERY = """
     SELECT * FROM users
+    ORDER BY created_at DESC, id DESC
+    LIMIT :limit
+"""
+
+GET_ALL_USERS_AFTER_CURSOR_QUERY = """
+    SELECT * FROM users
+    WHERE (created_at, id) < (:cursor_created_at, :cursor_id)
+    ORDER BY created_at DESC, id DESC
     LIMIT :limit
-    OFFSET :offset
 """
 
 COUNT_ALL_USERS_QUERY = """
     SELECT COUNT(*) FROM users
 """
 
+ESTIMATE_ALL_USERS_QUERY = """
+    SELECT 1 FROM users
+"""
+
 DELETE_USER_QUERY = """
     DELETE FROM users
     WHERE id = :id
@@ -69,19 +88,18 @@ UPDATE_USER_PASSWORD_QUERY = """
 
 
 class UserRepository(BaseRepository):
-    def __init__(self, db: Database):
-        super().__init__(db)
+    explain_slow_queries = False
+
+    def __init__(self, db: Database, read_db: Database = None):
+        super().__init__(db, read_db)
         from scrape.services.auth.auth_service import AuthPassword
         self.auth_password = AuthPassword()
-        logger.info("User Repository initialized")
+        logger.debug("User Repository initialized")
 
     async def get_user_by_email(self, email: str) -> Optional[UserInDB]:
-        logger.info("Getting user by email: %s", email)
+        logger.debug("Getting user by email: %s", email)
         try:
-            user = await self.db.fetch_one(
-                GET_USER_BY_EMAIL_QUERY,
-                values={"email": email}
-            )
+            user = await self.fetch_one_prepared(GET_USER_BY_EMAIL_QUERY, email)
 
             if not user:
                 logger.warning("User not found by email: %s", email)
@@ -96,19 +114,19 @@ class UserRepository(BaseRepository):
             raise e
 
     async def create_user(self, user: User) -> Optional[UserInDB]:
-        logger.info("Creating user: %s", user)
+        logger.debug("Creating user: %s", user.email)
         try:
             values = user.model_dump(exclude={"password"})
             values["email"] = user.email.lower()
-            hashed_password = self.auth_password.hash_password(user.password)
+            hashed_password = await self.auth_password.hash_password(user.password)
             values["hashed_password"] = hashed_password
-            created_user = await self.db.fetch_one(
+            created_user = await self.fetch_one(
                 CREATE_USER_QUERY,
                 values=values
             )
 
             if not created_user:
-                logger.warning("User not created: %s", user)
+                logger.warning("User not created: %s", user.email)
                 return None
 
             return UserInDB(**created_user) if created_user else created_user
@@ -120,14 +138,14 @@ class UserRepository(BaseRepository):
         except Exception as e:
             logger.exception(
                 "Error creating user: %s. Exception: %s",
-                user, e
+                user.email, e
             )
             raise e
 
     async def get_user_by_id(self, user_id: UUID) -> Optional[UserInDB]:
-        logger.info("Getting user by ID: %s", user_id)
+        logger.debug("Getting user by ID: %s", user_id)
         try:
-            user = await self.db.fetch_one(
+            user = await self.fetch_one(
                 GET_USER_QUERY,
                 values={"id": user_id}
             )
@@ -144,26 +162,37 @@ class UserRepository(BaseRepository):
             )
             raise e
     
-    async def get_all_users(self, limit: int, offset: int) -> List[UserInDB] | list:
+    @read_only
+    async def get_all_users(
+        self, limit: int, cursor: Optional[str] = None,
+        total: TotalMode = TotalMode.NONE
+    ) -> UserList:
         try:
-            logger.info("Getting all users")
-            values={"limit": limit, "offset": offset}
-            users = await self.db.fetch_all(GET_ALL_USERS_QUERY, values)
-            count_users = await self.db.fetch_one(COUNT_ALL_USERS_QUERY)
-            count_users = count_users["count"]
-
-            if not users:
-                return []
+            logger.debug("Getting all users")
+            values = cursor_values(cursor)
+            query = GET_ALL_USERS_AFTER_CURSOR_QUERY if values else GET_ALL_USERS_QUERY
+            values["limit"] = limit + 1
+            users = await self.fetch_all(query, values)
+            users, next_cursor = split_page(users, limit)
+            count_users = await self.count_total(
+                total, COUNT_ALL_USERS_QUERY, ESTIMATE_ALL_USERS_QUERY
+            )
 
-            return [UserInDB(**user) for user in users]
+            return UserList(
+                users=[UserResponse(**user) for user in users],
+                total=count_users,
+                next_cursor=next_cursor
+            )
+        except InvalidCursorError:
+            raise
         except Exception as e:
             logger.exception("Error: %s", e)
             raise e
 
     async def delete_user_by_id(self, user_id: UUID) -> Optional[UserInDB]:
-        logger.info("Deleting user by ID: %s", user_id)
+        logger.debug("Deleting user by ID: %s", user_id)
         try:
-            user = await self.db.fetch_one(
+            user = await self.fetch_one(
                 DELETE_USER_QUERY,
                 values={"id": user_id}
             )
@@ -182,10 +211,10 @@ class UserRepository(BaseRepository):
 
     async def update_user_by_id(self, user_id: UUID, user: UserUpdateRequest):
         try:
-            logger.info("Updating user id: %s", user_id)
+            logger.debug("Updating user id: %s", user_id)
             values = user.model_dump()
             values["id"] = user_id
-            user = await self.db.fetch_one(UPDATE_USER_QUERY, values)
+            user = await self.fetch_one(UPDATE_USER_QUERY, values)
 
             if not user:
                 return None
@@ -201,9 +230,9 @@ class UserRepository(BaseRepository):
             raise e
 
     async def reset_password_token(self, user_id: UUID, token: str, expires_at: datetime):
-        logger.info("Updating user reset password token id: %s", user_id)
+        logger.debug("Updating user reset password token id: %s", user_id)
         try:
-            token_data = await self.db.fetch_one(
+            token_data = await self.fetch_one(
                 """
                 INSERT INTO password_resets (user_id, token, expires_at) VALUES (:uid, :token, :exp)
                 RETURNING *;
@@ -218,9 +247,9 @@ class UserRepository(BaseRepository):
             raise e
 
     async def get_reset_password_token(self, token: str):
-        logger.info("Getting user reset password token: %s", token)
+        logger.debug("Getting user reset password token")
         try:
-            token_data = await self.db.fetch_one(
+            token_data = await self.fetch_one(
                 """
                 SELECT * FROM password_resets WHERE token = :token
                 """,
@@ -234,9 +263,9 @@ class UserRepository(BaseRepository):
             raise e
 
     async def delete_reset_password_token(self, token: str):
-        logger.info("Deleting user reset password token: %s", token)
+        logger.debug("Deleting user reset password token")
         try:
-            token_data = await self.db.fetch_one(
+            token_data = await self.fetch_one(
                 """
                 DELETE FROM password_resets WHERE token = :token
                 """,
@@ -251,14 +280,14 @@ class UserRepository(BaseRepository):
 
     async def update_user_password_by_id(self, user_id: UUID, user: UserPasswordUpdateRequest|str):
         try:
-            logger.info("Updating user password id: %s", user_id)
+            logger.debug("Updating user password id: %s", user_id)
             new_password = user if isinstance(user, str) else user.new_password
-            hashed_password = self.auth_password.hash_password(new_password)
+            hashed_password = await self.auth_password.hash_password(new_password)
             values = {
                 "id": user_id,
                 "hashed_password": hashed_password,
             }
-            user = await self.db.fetch_one(UPDATE_USER_PASSWORD_QUERY, values)
+            user = await self.fetch_one(UPDATE_USER_PASSWORD_QUERY, values)
 
             if not user:
                 return None
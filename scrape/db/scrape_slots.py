@@ -0,0 +1,149 @@
+"""
+Cluster-wide scrape concurrency
+
+Every retailer has a fixed number of scrape slots (SCRAPE_CONCURRENCY),
+and slot n of a retailer is the Postgres advisory lock (retailer key, n).
+All workers, on every host that shares the database, compete for the same
+locks, so browser concurrency stays capped however many API workers run.
+
+Each worker holds its locks on one dedicated connection outside the pool.
+If the worker dies, Postgres ends the session and the slots are freed.
+"""
+
+import asyncio
+import random
+import zlib
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set
+import asyncpg
+from scrape.core.configs import (
+    SCRAPE_CONCURRENCY, SCRAPE_DEFAULT_CONCURRENCY,
+    SCRAPE_SLOT_TIMEOUT_SECS, SCRAPE_SLOT_POLL_SECS
+)
+from scrape.core.logger import get_logger
+from scrape.core.metrics import SCRAPE_QUEUE_DEPTH, SCRAPE_IN_PROGRESS
+
+logger = get_logger(__name__)
+
+TRY_LOCK_SLOT_QUERY = "SELECT pg_try_advisory_lock($1, $2)"
+UNLOCK_SLOT_QUERY = "SELECT pg_advisory_unlock($1, $2)"
+
+
+class ScrapeSlotTimeout(Exception):
+    def __init__(self, retailer: str) -> None:
+        super().__init__(f"No {retailer} scrape slot free after {SCRAPE_SLOT_TIMEOUT_SECS:.0f}s")
+        self.retailer = retailer
+
+
+def parse_limits(entries) -> Dict[str, int]:
+    """`amazon=2, jumia=1` -> {"amazon": 2, "jumia": 1}"""
+    limits = {}
+    for entry in entries:
+        name, _, value = entry.partition("=")
+        if name.strip() and value.strip():
+            limits[name.strip()] = int(value)
+    return limits
+
+
+def retailer_key(retailer: str) -> int:
+    """Stable signed 32-bit key for the first half of the advisory lock."""
+    key = zlib.crc32(f"scrape:{retailer}".encode())
+    return key - (1 << 32) if key >= (1 << 31) else key
+
+
+class ScrapeLimiter:
+    def __init__(self, dsn: str, limits: Optional[Dict[str, int]] = None) -> None:
+        self._dsn = dsn
+        self.limits = parse_limits(SCRAPE_CONCURRENCY) if limits is None else limits
+        self._conn: Optional[asyncpg.Connection] = None
+        # Advisory locks are re-entrant within a session, so the worker has
+        # to remember which slots it already holds on its connection.
+        self._held: Dict[str, Set[int]] = {}
+        self._local: Dict[str, asyncio.Semaphore] = {}
+        self._lock = asyncio.Lock()
+
+    def limit(self, retailer: str) -> int:
+        return self.limits.get(retailer, SCRAPE_DEFAULT_CONCURRENCY)
+
+    async def _connection(self) -> asyncpg.Connection:
+        if self._conn is not None and not self._conn.is_closed():
+            return self._conn
+
+        lost = self._conn is not None
+        self._conn = await asyncpg.connect(self._dsn)
+        if lost:
+            # The old session's locks went with it; take back what we can
+            # for scrapes that are still running.
+            for retailer, slots in self._held.items():
+                for slot in slots:
+                    if not await self._conn.fetchval(TRY_LOCK_SLOT_QUERY, retailer_key(retailer), slot):
+                        logger.warning(
+                            "Lost %s scrape slot %s on reconnect, limit exceeded until it ends",
+                            retailer, slot
+                        )
+        return self._conn
+
+    async def _try_lock(self, retailer: str) -> Optional[int]:
+        async with self._lock:
+            conn = await self._connection()
+            held = self._held.setdefault(retailer, set())
+            for slot in range(self.limit(retailer)):
+                if slot in held:
+                    continue
+                if await conn.fetchval(TRY_LOCK_SLOT_QUERY, retailer_key(retailer), slot):
+                    held.add(slot)
+                    return slot
+        return None
+
+    async def _unlock(self, retailer: str, slot: int) -> None:
+        async with self._lock:
+            self._held[retailer].discard(slot)
+            if self._conn is None or self._conn.is_closed():
+                return
+            try:
+                await self._conn.fetchval(UNLOCK_SLOT_QUERY, retailer_key(retailer), slot)
+            except Exception as e:
+                logger.error("Could not release %s scrape slot %s: %s", retailer, slot, e)
+
+    @asynccontextmanager
+    async def slot(self, retailer: str):
+        """
+        Holds one of the retailer's slots for the duration of the block.
+        Requests first queue on a worker-local semaphore of the same size,
+        so only as many tasks as could possibly run poll Postgres.
+        Raises ScrapeSlotTimeout after SCRAPE_SLOT_TIMEOUT_SECS.
+        """
+        waiting = SCRAPE_QUEUE_DEPTH.labels(retailer)
+        holding = SCRAPE_IN_PROGRESS.labels(retailer)
+        local = self._local.setdefault(retailer, asyncio.Semaphore(self.limit(retailer)))
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + SCRAPE_SLOT_TIMEOUT_SECS
+
+        waiting.inc()
+        try:
+            try:
+                await asyncio.wait_for(local.acquire(), timeout=SCRAPE_SLOT_TIMEOUT_SECS)
+            except asyncio.TimeoutError:
+                raise ScrapeSlotTimeout(retailer)
+            try:
+                while (slot := await self._try_lock(retailer)) is None:
+                    if loop.time() >= deadline:
+                        raise ScrapeSlotTimeout(retailer)
+                    await asyncio.sleep(SCRAPE_SLOT_POLL_SECS * random.uniform(0.5, 1.5))
+            except BaseException:
+                local.release()
+                raise
+        finally:
+            waiting.dec()
+
+        holding.inc()
+        try:
+            yield slot
+        finally:
+            holding.dec()
+            await self._unlock(retailer, slot)
+            local.release()
+
+    async def close(self) -> None:
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
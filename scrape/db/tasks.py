@@ -1,17 +1,41 @@
 import os
 import asyncio
 from fastapi import FastAPI
-from databases import Database
-from scrape.core.configs import DATABASE_URL
-from scrape.core.logger import logger
+from databases import Database, DatabaseURL
+from scrape.core.configs import (
+    DATABASE_URL, DATABASE_REPLICA_URLS, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_MAX_QUERIES,
+    DB_POOL_MAX_INACTIVE_SECS, DB_STATEMENT_CACHE_SIZE, DB_COMMAND_TIMEOUT
+)
+from scrape.core.logger import get_logger
+from scrape.db.query_stats import init_connection
+from scrape.db.replicas import Replica, ReplicaRouter
+from scrape.db.scrape_slots import ScrapeLimiter
+
+logger = get_logger(__name__)
 
 MAX_RETRIES = 5
 INITIAL_DELAY = 2
 
 
+def create_database(db_url: str) -> Database:
+    return Database(
+        db_url,
+        min_size=DB_POOL_MIN_SIZE,
+        max_size=DB_POOL_MAX_SIZE,
+        max_queries=DB_POOL_MAX_QUERIES,
+        max_inactive_connection_lifetime=DB_POOL_MAX_INACTIVE_SECS,
+        statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+        command_timeout=DB_COMMAND_TIMEOUT,
+        init=init_connection,
+    )
+
+
+def primary_url() -> str:
+    return f"""{DATABASE_URL}{os.environ.get("DB_SUFFIX", "")}"""
+
+
 async def connect_to_db(app: FastAPI) -> None:
-    db_url = f"""{DATABASE_URL}{os.environ.get("DB_SUFFIX", "")}"""
-    database = Database(db_url, min_size=2, max_size=10)
+    database = create_database(primary_url())
 
     retries = 0
     delay = INITIAL_DELAY
@@ -36,6 +60,49 @@ async def connect_to_db(app: FastAPI) -> None:
                 raise e
 
 
+async def connect_to_replicas(app: FastAPI) -> None:
+    """
+    Replicas are optional: one that cannot be reached at startup is left
+    out, and reads it would have served go to the primary.
+    """
+    replicas = []
+    for i, url in enumerate(DATABASE_REPLICA_URLS):
+        db_url = f"""{url}{os.environ.get("DB_SUFFIX", "")}"""
+        name = f"{DatabaseURL(db_url).hostname}-{i}"
+        database = create_database(db_url)
+        try:
+            await database.connect()
+            replicas.append(Replica(name, database))
+            logger.info("Connected to read replica %s", name)
+        except Exception as e:
+            logger.error("Could not connect to read replica %s", name)
+            logger.error(e)
+
+    app.state._replicas = ReplicaRouter(replicas)
+    await app.state._replicas.check_lag()
+
+
+async def close_replica_connections(app: FastAPI) -> None:
+    router = getattr(app.state, "_replicas", None)
+    if router:
+        await router.disconnect()
+
+
+def create_scrape_limiter(app: FastAPI) -> None:
+    # Connects lazily on the first scrape
+    app.state._scrape_limiter = ScrapeLimiter(primary_url())
+
+
+async def close_scrape_limiter(app: FastAPI) -> None:
+    limiter = getattr(app.state, "_scrape_limiter", None)
+    if limiter:
+        try:
+            await limiter.close()
+        except Exception as e:
+            logger.error("Could not close the scrape limiter connection")
+            logger.error(e)
+
+
 async def close_db_connection(app: FastAPI) -> None:
     try:
         await app.state._db.disconnect()
@@ -0,0 +1,3 @@
+from scrape.models.alerts.alert import Alert as Alert
+from scrape.models.alerts.alert import AlertList as AlertList
+from scrape.models.alerts.alert import TriggeredAlert as TriggeredAlert
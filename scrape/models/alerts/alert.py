@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Optional, List
+from uuid import UUID
+from pydantic import BaseModel, Field
+
+
+class Alert(BaseModel):
+    id: UUID = Field(..., description="Alert ID")
+    user_id: UUID = Field(..., description="Owner of the alert")
+    product_id: UUID = Field(..., description="Tracked product")
+    target_price: float = Field(..., description="Price at or below which the alert fires")
+    is_triggered: bool = Field(..., description="Whether the alert has fired")
+    created_at: datetime = Field(..., description="Alert created at")
+    updated_at: datetime = Field(..., description="Alert updated at")
+
+
+class AlertList(BaseModel):
+    alerts: List[Alert]
+    total: Optional[int] = Field(None, description="Exact or estimated total, if requested")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page")
+
+
+class TriggeredAlert(BaseModel):
+    id: UUID = Field(..., description="Alert ID")
+    user_id: UUID = Field(..., description="Owner of the alert")
+    product_id: UUID = Field(..., description="Tracked product")
+    target_price: float = Field(..., description="Alert threshold")
+    triggered_price: float = Field(..., description="Scraped price that crossed the threshold")
+    email: str = Field(..., description="Email to notify")
+    product_name: str = Field(..., description="Product name")
+    product_url: str = Field(..., description="Product URL")
@@ -0,0 +1,3 @@
+from scrape.models.notifications.notification import NotificationProvider as NotificationProvider
+from scrape.models.notifications.notification import NotificationCreate as NotificationCreate
+from scrape.models.notifications.notification import Notification as Notification
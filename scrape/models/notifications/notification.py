@@ -0,0 +1,27 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from uuid import UUID
+from pydantic import BaseModel, Field
+
+
+class NotificationProvider(str, Enum):
+    SES = "ses"
+    SENDGRID = "sendgrid"
+
+
+class NotificationCreate(BaseModel):
+    provider: NotificationProvider = Field(..., description="Email provider used for delivery")
+    recipient: str = Field(..., description="Recipient email")
+    subject: str = Field(..., description="Email subject")
+    body_text: str = Field(..., description="Plain text body")
+    body_html: Optional[str] = Field(None, description="HTML body")
+
+
+class Notification(NotificationCreate):
+    id: UUID = Field(..., description="Notification ID")
+    status: str = Field(..., description="pending, sending, sent or failed")
+    attempts: int = Field(..., description="Delivery attempts so far")
+    next_attempt_at: datetime = Field(..., description="Earliest next delivery attempt")
+    last_error: Optional[str] = Field(None, description="Error from the last failed attempt")
+    sent_at: Optional[datetime] = Field(None, description="Delivered at")
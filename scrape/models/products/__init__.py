@@ -1,3 +1,14 @@
 from scrape.models.products.product import Product as Product
 from scrape.models.products.product import ProductCreate as ProductCreate
+from scrape.models.products.product import ScrapedProduct as ScrapedProduct
 from scrape.models.products.product import ProductList as ProductList
+from scrape.models.products.product import ProductSearchHit as ProductSearchHit
+from scrape.models.products.product import ProductSearchPage as ProductSearchPage
+from scrape.models.products.price_history import DownsampleMode as DownsampleMode
+from scrape.models.products.price_history import PricePoint as PricePoint
+from scrape.models.products.price_history import PriceHistorySeries as PriceHistorySeries
+from scrape.models.products.price_history import PriceStatsOrder as PriceStatsOrder
+from scrape.models.products.price_history import PriceDrop as PriceDrop
+from scrape.models.products.price_history import PriceStats as PriceStats
+from scrape.models.products.price_history import LatestPrice as LatestPrice
+from scrape.models.products.product_match import ProductMatch as ProductMatch
@@ -0,0 +1,75 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional, List
+from uuid import UUID
+from pydantic import BaseModel, Field
+
+
+class DownsampleMode(str, Enum):
+    BUCKET = "bucket"
+    LTTB = "lttb"
+
+
+class PriceStatsOrder(str, Enum):
+    VOLATILITY = "volatility"
+    PERCENTILE = "percentile"
+
+
+class PricePoint(BaseModel):
+    timestamp: datetime = Field(..., description="Bucket start or sample time")
+    price: float = Field(..., description="Average price in the bucket, or the sampled price")
+    min_price: Optional[float] = Field(None, description="Lowest price in the bucket")
+    max_price: Optional[float] = Field(None, description="Highest price in the bucket")
+    observations: int = Field(1, description="Number of raw rows behind this point")
+
+
+class PriceHistorySeries(BaseModel):
+    product_id: UUID = Field(..., description="Product ID")
+    start: datetime = Field(..., description="Start of the requested range")
+    end: datetime = Field(..., description="End of the requested range")
+    bucket_seconds: int = Field(..., description="Width of the SQL aggregation buckets")
+    mode: DownsampleMode = Field(..., description="Downsampling mode")
+    points: List[PricePoint]
+
+
+# Columns of a raw price history export, in output order
+PRICE_HISTORY_EXPORT_FIELDS = ("product_id", "price", "created_at")
+
+
+class PriceDrop(BaseModel):
+    product_id: UUID = Field(..., description="Product ID")
+    name: str = Field(..., description="Product name")
+    url: str = Field(..., description="Product URL")
+    retailer_id: UUID = Field(..., description="Retailer id")
+    retailer_name: str = Field(..., description="Retailer name")
+    start_price: float = Field(..., description="First price observed in the window")
+    start_at: datetime = Field(..., description="When the start price was observed")
+    current_price: float = Field(..., description="Latest observed price")
+    current_at: datetime = Field(..., description="When the latest price was observed")
+    change: float = Field(..., description="Current price minus start price")
+    change_pct: float = Field(..., description="Change relative to the start price, in percent")
+
+
+class PriceStats(BaseModel):
+    product_id: UUID = Field(..., description="Product ID")
+    name: str = Field(..., description="Product name")
+    retailer_id: UUID = Field(..., description="Retailer id")
+    current_price: float = Field(..., description="Latest observed price")
+    all_time_low: float = Field(..., description="Lowest price ever observed")
+    all_time_high: float = Field(..., description="Highest price ever observed")
+    observations: int = Field(..., description="Number of price observations")
+    current_percentile: float = Field(
+        ..., description="Share of observations at or below the current price, 0-100"
+    )
+    volatility: Optional[float] = Field(
+        None, description="Standard deviation of log price changes within the window"
+    )
+
+
+class LatestPrice(BaseModel):
+    product_id: UUID = Field(..., description="Product ID")
+    current_price: float = Field(..., description="Latest observed price")
+    previous_price: Optional[float] = Field(None, description="Price before the most recent change")
+    change_pct: Optional[float] = Field(None, description="Most recent change, in percent")
+    last_seen_at: datetime = Field(..., description="When the product was last scraped")
+    price_changed_at: datetime = Field(..., description="When the current price was first seen")
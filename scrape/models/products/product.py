@@ -8,12 +8,24 @@ class ProductBase(BaseModel):
     name: str = Field(..., description="Product name")
     url: str = Field(..., description="Product URL")
     price: Optional[float] = Field(None, description="Product price")
-    category: str = Field(..., description="Product category")
+    category: Optional[str] = Field(None, description="Product category")
     retailer_id: UUID = Field(..., description="Retailer id")
 
 
 class ProductCreate(ProductBase):
-    pass
+    external_id: Optional[str] = Field(
+        None, description="Retailer's identifier for the item (ASIN, SKU); derived from the URL if not given"
+    )
+
+
+class ScrapedProduct(BaseModel):
+    """A scraped item after normalization, before it is tied to a retailer."""
+    name: str = Field(..., description="Product name")
+    url: str = Field(..., description="Product URL")
+    external_id: str = Field(..., description="Retailer's identifier for the item (ASIN, SKU)")
+    price: Optional[float] = Field(None, description="Product price")
+    currency: Optional[str] = Field(None, description="ISO 4217 code the price was quoted in")
+    category: Optional[str] = Field(None, description="Product category")
 
 
 class Product(ProductBase):
@@ -23,6 +35,20 @@ class Product(ProductBase):
     updated_at: datetime = Field(..., description="Product updated at")
 
 
+# Columns the list fast path copies from a products row, in response order
+PRODUCT_FIELDS = tuple(Product.model_fields)
+
+
+class ProductSearchHit(Product):
+    score: float = Field(..., description="Full-text rank plus trigram similarity")
+
+
+class ProductSearchPage(BaseModel):
+    products: List[ProductSearchHit]
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page")
+
+
 class ProductList(BaseModel):
     products: List[Product]
-    total: int
\ No newline at end of file
+    total: Optional[int] = Field(None, description="Exact or estimated total, if requested")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page")
@@ -0,0 +1,8 @@
+from uuid import UUID
+from pydantic import Field
+from scrape.models.products.product import Product
+
+
+class ProductMatch(Product):
+    cluster_id: UUID = Field(..., description="Shared by every listing of the same product")
+    similarity: float = Field(..., description="Best estimated name similarity within the cluster")
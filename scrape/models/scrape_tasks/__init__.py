@@ -0,0 +1,5 @@
+from scrape.models.scrape_tasks.scrape_task import ScrapeTask as ScrapeTask
+from scrape.models.scrape_tasks.scrape_task import ScrapeTaskList as ScrapeTaskList
+from scrape.models.scrape_tasks.scrape_task import ScrapePhase as ScrapePhase
+from scrape.models.scrape_tasks.scrape_task import ScrapeTaskTiming as ScrapeTaskTiming
+from scrape.models.scrape_tasks.scrape_task import ScrapeCost as ScrapeCost
@@ -0,0 +1,68 @@
+import json
+from datetime import date, datetime
+from typing import Optional, List, Dict
+from uuid import UUID
+from pydantic import BaseModel, Field, field_validator
+
+
+class ScrapePhase(BaseModel):
+    phase: str = Field(..., description="launch, navigate, sleep, captcha, extract or persist")
+    offset_ms: float = Field(..., description="Start of the phase, relative to the scrape start")
+    duration_ms: float = Field(..., description="Time spent in the phase")
+
+
+class ScrapeTask(BaseModel):
+    id: UUID = Field(..., description="Scrape task ID")
+    source: str = Field(..., description="Retailer or scraper the task ran against")
+    status: str = Field(..., description="Task status")
+    started_at: datetime = Field(..., description="Task started at")
+    finished_at: Optional[datetime] = Field(None, description="Task finished at")
+    user_id: Optional[UUID] = Field(None, description="User who started the task")
+    retailer_id: Optional[UUID] = Field(None, description="Retailer scraped")
+    query: Optional[str] = Field(None, description="Search query or listing path")
+    created_at: datetime = Field(..., description="Task created at")
+    updated_at: datetime = Field(..., description="Task updated at")
+
+
+class ScrapeTaskTiming(ScrapeTask):
+    user_id: Optional[UUID] = Field(None, exclude=True)
+    phases: List[ScrapePhase] = Field(default_factory=list, description="Phase timeline")
+    phase_totals: Dict[str, float] = Field(default_factory=dict, description="Milliseconds per phase")
+    pages: int = Field(0, description="Pages loaded")
+    bytes_downloaded: int = Field(0, description="Bytes transferred, including subresources")
+    retries: int = Field(0, description="Attempts retried after a failure or CAPTCHA")
+    captchas: int = Field(0, description="CAPTCHA or bot-check pages hit")
+    proxy: Optional[str] = Field(None, description="Proxy used by the last attempt")
+    browser_seconds: float = Field(0, description="Wall time a browser was running")
+    db_round_trips: int = Field(0, description="Database statements issued while persisting")
+
+    @field_validator("phases", "phase_totals", mode="before")
+    @classmethod
+    def parse_jsonb(cls, value):
+        return json.loads(value) if isinstance(value, str) else value
+
+
+class ScrapeTaskList(BaseModel):
+    tasks: List[ScrapeTask]
+    total: Optional[int] = Field(None, description="Exact or estimated total, if requested")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page")
+
+
+class ScrapeCost(BaseModel):
+    source: str = Field(..., description="Scraper the tasks ran with")
+    day: date = Field(..., description="Day the tasks started")
+    tasks: int = Field(..., description="Finished tasks")
+    failed: int = Field(..., description="Tasks that failed")
+    avg_seconds: float = Field(..., description="Average task duration")
+    avg_pages: float = Field(..., description="Average pages per task")
+    avg_bytes: float = Field(..., description="Average bytes downloaded per task")
+    avg_retries: float = Field(..., description="Average retries per task")
+    avg_browser_seconds: float = Field(..., description="Average browser wall time per task")
+    avg_db_round_trips: float = Field(..., description="Average database round trips per task")
+    avg_phase_ms: Dict[str, float] = Field(default_factory=dict, description="Average milliseconds per phase")
+    dominant_phase: Optional[str] = Field(None, description="Phase with the largest average share")
+
+    @field_validator("avg_phase_ms", mode="before")
+    @classmethod
+    def parse_jsonb(cls, value):
+        return json.loads(value) if isinstance(value, str) else value
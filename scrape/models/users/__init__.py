@@ -1,6 +1,7 @@
 from scrape.models.users.user import User as User
 from scrape.models.users.user import UserInDB as UserInDB
 from scrape.models.users.user import UserResponse as UserResponse
+from scrape.models.users.user import UserList as UserList
 from scrape.models.users.token import TokenData as TokenData
 from scrape.models.users.token import AuthToken as AuthToken
 from scrape.models.users.user import ResetPasswordRequest as ResetPasswordRequest
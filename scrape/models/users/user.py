@@ -1,6 +1,6 @@
 from datetime import datetime
 from uuid import UUID
-from typing import Optional
+from typing import Optional, List
 from pydantic import BaseModel, Field, EmailStr
 
 
@@ -85,6 +85,20 @@ class UserInDB(UserResponse):
     hashed_password: str
 
 
+class UserList(BaseModel):
+    users: List[UserResponse]
+    total: Optional[int] = Field(
+        None,
+        title="Total",
+        description="Exact or estimated number of users, if requested"
+    )
+    next_cursor: Optional[str] = Field(
+        None,
+        title="Next Cursor",
+        description="Cursor for the next page"
+    )
+
+
 class UserUpdateRequest(BaseModel):
     username: Optional[str] = Field(
         ...,
@@ -0,0 +1,128 @@
+"""
+In-process index of untriggered alert thresholds, used to decide without a
+database round trip whether a scraped price can trigger any alert
+"""
+
+import asyncio
+from bisect import bisect_left
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from scrape.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+Thresholds = Dict[UUID, List[Tuple[float, UUID]]]
+
+
+def _insert(thresholds: Thresholds, product_id: UUID, entry: Tuple[float, UUID]) -> None:
+    entries = thresholds.setdefault(product_id, [])
+    i = bisect_left(entries, entry)
+    if i == len(entries) or entries[i] != entry:
+        entries.insert(i, entry)
+
+
+def _discard(thresholds: Thresholds, product_id: UUID, alert_id: UUID) -> None:
+    entries = thresholds.get(product_id)
+    if not entries:
+        return
+    for i, (_, entry_id) in enumerate(entries):
+        if entry_id == alert_id:
+            del entries[i]
+            break
+    if not entries:
+        del thresholds[product_id]
+
+
+class AlertThresholdIndex:
+    def __init__(self) -> None:
+        # product_id -> (target_price, alert_id) pairs kept sorted by price
+        self._thresholds: Thresholds = {}
+        # Changes made while a rebuild reads the table, replayed onto it
+        self._pending: Optional[list] = None
+        # One rebuild at a time: the listener's load and the periodic verify
+        # would otherwise share, and clear, each other's pending list
+        self._rebuilding = asyncio.Lock()
+        self.ready = False
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._thresholds.values())
+
+    @staticmethod
+    def _build(alerts: Iterable) -> Thresholds:
+        thresholds: Thresholds = {}
+        for alert in alerts:
+            thresholds.setdefault(alert["product_id"], []).append(
+                (float(alert["target_price"]), alert["id"])
+            )
+        for entries in thresholds.values():
+            entries.sort()
+        return thresholds
+
+    async def _rebuild(self, fetch: Callable[[], Awaitable[Iterable]]) -> Thresholds:
+        """
+        The table as `fetch` reads it, plus every add and remove made while
+        the read was in flight, which the snapshot may predate. Both are
+        idempotent, so replaying one the snapshot already has is harmless.
+        """
+        self._pending = []
+        try:
+            fresh = self._build(await fetch())
+            pending = self._pending
+        finally:
+            self._pending = None
+
+        for change, product_id, value in pending:
+            if change == "add":
+                _insert(fresh, product_id, value)
+            else:
+                _discard(fresh, product_id, value)
+        return fresh
+
+    async def load(self, fetch: Callable[[], Awaitable[Iterable]]) -> None:
+        async with self._rebuilding:
+            self._thresholds = await self._rebuild(fetch)
+        self.ready = True
+        logger.info("Alert index loaded with %s thresholds", len(self))
+
+    def add(self, product_id: UUID, alert_id: UUID, target_price: float) -> None:
+        entry = (float(target_price), alert_id)
+        if self._pending is not None:
+            self._pending.append(("add", product_id, entry))
+        _insert(self._thresholds, product_id, entry)
+
+    def remove(self, product_id: UUID, alert_id: UUID) -> None:
+        if self._pending is not None:
+            self._pending.append(("remove", product_id, alert_id))
+        _discard(self._thresholds, product_id, alert_id)
+
+    def crossed(self, product_id: UUID, price: float) -> List[UUID]:
+        """
+        Ids of the alerts whose target is at or above `price`; a bisect on
+        the product's sorted thresholds, O(log n) plus the matches.
+        """
+        entries = self._thresholds.get(product_id)
+        if not entries:
+            return []
+        start = bisect_left(entries, (float(price),))
+        return [alert_id for _, alert_id in entries[start:]]
+
+    async def verify(self, fetch: Callable[[], Awaitable[Iterable]]) -> int:
+        """
+        Compare against a fresh read of the table, replace the index with it
+        and return how many thresholds had drifted. Does not make the index
+        ready; only a load by the listener, which keeps it current, does.
+        """
+        async with self._rebuilding:
+            fresh = await self._rebuild(fetch)
+            current = {
+                (pid, entry) for pid, entries in self._thresholds.items() for entry in entries
+            }
+            expected = {(pid, entry) for pid, entries in fresh.items() for entry in entries}
+            drift = len(current ^ expected)
+            if drift:
+                logger.warning("Alert index drifted by %s thresholds, reloading", drift)
+            self._thresholds = fresh
+        return drift
+
+
+alert_index = AlertThresholdIndex()
@@ -0,0 +1,120 @@
+"""
+Keeps this worker's alert index in step with every other worker's
+
+Alerts are created and deleted through whichever worker got the request
+and triggered by whichever one ran the scrape, while each worker holds
+its own index. The `notify_alert_index` trigger on `alerts` sends every
+change to the untriggered thresholds on the `alert_index` channel at
+commit; each worker listens on one dedicated connection outside the pool
+and applies them.
+
+Notifications sent while that connection is down are lost, so from the
+moment it drops until it is back and the index reloaded, the index is
+not ready and ingestion checks every price against the database.
+"""
+
+import asyncio
+import json
+from typing import Awaitable, Callable, Iterable, Optional
+from uuid import UUID
+import asyncpg
+from scrape.core.logger import get_logger
+from scrape.services.alerts.alert_index import AlertThresholdIndex, alert_index
+
+logger = get_logger(__name__)
+
+CHANNEL = "alert_index"
+HEALTH_CHECK_SECS = 10
+RECONNECT_BASE_SECS = 1
+RECONNECT_MAX_SECS = 60
+
+
+class AlertIndexListener:
+    def __init__(
+        self,
+        dsn: str,
+        fetch: Callable[[], Awaitable[Iterable]],
+        index: AlertThresholdIndex = alert_index,
+    ) -> None:
+        self._dsn = dsn
+        self._fetch = fetch
+        self.index = index
+        self._conn: Optional[asyncpg.Connection] = None
+        self._lost = asyncio.Event()
+
+    def _apply(self, conn, pid: int, channel: str, payload: str) -> None:
+        try:
+            change = json.loads(payload)
+            product_id, alert_id = UUID(change["product_id"]), UUID(change["id"])
+            if change["op"] == "add":
+                self.index.add(product_id, alert_id, change["target_price"])
+            else:
+                self.index.remove(product_id, alert_id)
+        except Exception as e:
+            # A change the index missed; only the database can be trusted now
+            logger.error("Could not apply alert index change %s", payload)
+            logger.error(e)
+            self.index.ready = False
+            self._lost.set()
+
+    def _terminated(self, conn) -> None:
+        # Closing a connection we already replaced calls this too, as late
+        # as during the next connect; only the current one counts
+        if conn is not self._conn:
+            return
+        # Changes from here on are missed until the next load
+        self.index.ready = False
+        self._lost.set()
+        logger.warning("Alert listener connection lost, alerts go to the database")
+
+    async def _connect(self) -> None:
+        self._conn = await asyncpg.connect(self._dsn)
+        # Cleared only once the new connection is current, so a loss of the
+        # old one reported late cannot leave it set
+        self._lost.clear()
+        self._conn.add_termination_listener(self._terminated)
+        # Listening before the read, so no change can fall between the two;
+        # changes the snapshot already has are replayed harmlessly.
+        await self._conn.add_listener(CHANNEL, self._apply)
+        await self.index.load(self._fetch)
+        logger.info("Listening for alert changes")
+
+    async def _close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            try:
+                await conn.close()
+            except Exception as e:
+                logger.error("Could not close the alert listener connection")
+                logger.error(e)
+
+    async def run(self) -> None:
+        delay = RECONNECT_BASE_SECS
+        try:
+            while True:
+                try:
+                    if self._conn is None or self._conn.is_closed() or not self.index.ready:
+                        self.index.ready = False
+                        await self._close()
+                        await self._connect()
+                        delay = RECONNECT_BASE_SECS
+                    try:
+                        await asyncio.wait_for(self._lost.wait(), timeout=HEALTH_CHECK_SECS)
+                        self._lost.clear()
+                        continue
+                    except asyncio.TimeoutError:
+                        pass
+                    # Finds connections that died without the socket closing
+                    await self._conn.fetchval("SELECT 1", timeout=HEALTH_CHECK_SECS)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.index.ready = False
+                    logger.error("Alert listener disconnected, alerts go to the database")
+                    logger.error(e)
+                    await self._close()
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, RECONNECT_MAX_SECS)
+        finally:
+            self.index.ready = False
+            await self._close()
@@ -0,0 +1,72 @@
+"""
+Local reader for the price history Parquet snapshots
+
+Files are memory-mapped, and filters on retailer and time are pushed down
+to the partition directories and row-group statistics. A narrow query only
+touches the pages it needs, and no query reaches Postgres.
+
+    from scrape.services.analytics.reader import PriceHistorySnapshot
+
+    snapshot = PriceHistorySnapshot("snapshots/price_history")
+    table = snapshot.read(retailer_id=..., start=datetime(2026, 1, 1, tzinfo=timezone.utc))
+    df = table.to_pandas()
+"""
+
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence
+from uuid import UUID
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from scrape.core.configs import SNAPSHOT_DIR
+from scrape.services.analytics.snapshots import SCHEMA, read_watermark
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("retailer_id", pa.string()), ("month", pa.string())]), flavor="hive"
+)
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class PriceHistorySnapshot:
+    def __init__(self, root: str = SNAPSHOT_DIR) -> None:
+        self.root = root
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        """Rows created up to this instant are in the snapshot."""
+        return read_watermark(self.root)
+
+    def read(
+        self,
+        retailer_id: Optional[UUID] = None,
+        product_id: Optional[UUID] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pa.Table:
+        """Rows with `start <= created_at < end`; every bound is optional."""
+        filters: List[tuple] = []
+        if retailer_id is not None:
+            filters.append(("retailer_id", "=", str(retailer_id)))
+        if product_id is not None:
+            filters.append(("product_id", "=", str(product_id)))
+        if start is not None:
+            start = _utc(start)
+            filters.append(("month", ">=", start.strftime("%Y-%m")))
+            filters.append(("created_at", ">=", start))
+        if end is not None:
+            end = _utc(end)
+            filters.append(("month", "<=", end.strftime("%Y-%m")))
+            filters.append(("created_at", "<", end))
+
+        return pq.read_table(
+            self.root,
+            columns=list(columns) if columns else None,
+            filters=filters or None,
+            partitioning=PARTITIONING,
+            schema=SCHEMA.append(pa.field("retailer_id", pa.string())).append(pa.field("month", pa.string())),
+            memory_map=True,
+        )
@@ -0,0 +1,235 @@
+"""
+Parquet snapshots of price history for offline analytics
+
+Streams `price_history` joined with `products` from a read replica (the
+primary when none is configured) and writes compressed Parquet, partitioned
+hive-style by retailer and month:
+
+    SNAPSHOT_DIR/retailer_id=<uuid>/month=2026-10/part-<run>.parquet
+
+`_watermark.json` records the upper bound of the last run. Append mode (the
+default) continues from there and only adds part files. `--full` rebuilds
+everything in a staging directory and swaps it in. Rows younger than
+SNAPSHOT_SETTLE_SECS wait for the next run, so rows from transactions
+still committing are not skipped. On a replica the cut-off also moves
+back by its replication lag, so rows it has not replayed yet are not
+skipped either, and a replica not streaming from the primary is refused.
+
+    python -m scrape.services.analytics.snapshots
+    python -m scrape.services.analytics.snapshots --full
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+import pyarrow as pa
+import pyarrow.parquet as pq
+from scrape.core.configs import (
+    DATABASE_REPLICA_URLS, EXPORT_CHUNK_ROWS, SNAPSHOT_DIR, SNAPSHOT_ROW_GROUP_ROWS,
+    SNAPSHOT_SETTLE_SECS, SNAPSHOT_COMPRESSION
+)
+from scrape.core.logger import get_logger
+from scrape.db.replicas import REPLICA_LAG_QUERY
+from scrape.db.repositories.products.price_history import PriceHistoryRepository
+from scrape.db.tasks import create_database, primary_url
+
+logger = get_logger(__name__)
+
+WATERMARK_FILE = "_watermark.json"
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Partition columns (retailer_id, month) live in the directory names
+SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("product_id", pa.string()),
+    ("category", pa.string()),
+    ("price", pa.float64()),
+    ("created_at", pa.timestamp("us", tz="UTC")),
+])
+
+
+def read_watermark(root: str) -> Optional[datetime]:
+    try:
+        with open(os.path.join(root, WATERMARK_FILE)) as f:
+            return datetime.fromisoformat(json.load(f)["until"])
+    except FileNotFoundError:
+        return None
+
+
+def write_watermark(root: str, until: datetime, rows: int) -> None:
+    path = os.path.join(root, WATERMARK_FILE)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump({"until": until.isoformat(), "rows": rows}, f)
+    os.replace(f"{path}.tmp", path)
+
+
+class PartitionWriter:
+    """Buffers one partition's rows and writes them a row group at a time."""
+
+    def __init__(self, directory: str, run_id: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        # Dot-prefixed until committed, so readers skip it
+        self.pending = os.path.join(directory, f".part-{run_id}.parquet")
+        self.path = os.path.join(directory, f"part-{run_id}.parquet")
+        self.columns: Dict[str, list] = {name: [] for name in SCHEMA.names}
+        self._writer: Optional[pq.ParquetWriter] = None
+
+    def add(self, row) -> None:
+        self.columns["id"].append(str(row["id"]))
+        self.columns["product_id"].append(str(row["product_id"]))
+        self.columns["category"].append(row["category"])
+        self.columns["price"].append(float(row["price"]))
+        self.columns["created_at"].append(row["created_at"])
+        if len(self.columns["id"]) >= SNAPSHOT_ROW_GROUP_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.columns["id"]:
+            return
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.pending, SCHEMA, compression=SNAPSHOT_COMPRESSION)
+        self._writer.write_table(pa.Table.from_pydict(self.columns, schema=SCHEMA))
+        self.columns = {name: [] for name in SCHEMA.names}
+
+    def close(self) -> None:
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def commit(self) -> None:
+        if os.path.exists(self.pending):
+            os.replace(self.pending, self.path)
+
+    def discard(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self.pending):
+            os.remove(self.pending)
+
+
+class SnapshotWriter:
+    def __init__(self, root: str, run_id: str) -> None:
+        self.root = root
+        self.run_id = run_id
+        self.rows = 0
+        self._open: Dict[Tuple[str, str], PartitionWriter] = {}
+        self._closed: List[PartitionWriter] = []
+
+    def write_chunk(self, chunk: list) -> None:
+        # Rows arrive in created_at order: once a month is behind the
+        # chunk's first row its writers are done, which keeps at most one
+        # month of files open per retailer.
+        first_month = chunk[0]["created_at"].strftime("%Y-%m")
+        for key in [k for k in self._open if k[1] < first_month]:
+            writer = self._open.pop(key)
+            writer.close()
+            self._closed.append(writer)
+
+        for row in chunk:
+            key = (str(row["retailer_id"]), row["created_at"].strftime("%Y-%m"))
+            writer = self._open.get(key)
+            if writer is None:
+                directory = os.path.join(self.root, f"retailer_id={key[0]}", f"month={key[1]}")
+                writer = self._open[key] = PartitionWriter(directory, self.run_id)
+            writer.add(row)
+        self.rows += len(chunk)
+
+    def _writers(self) -> List[PartitionWriter]:
+        return self._closed + list(self._open.values())
+
+    def commit(self) -> None:
+        for writer in self._open.values():
+            writer.close()
+        for writer in self._writers():
+            writer.commit()
+
+    def discard(self) -> None:
+        for writer in self._writers():
+            writer.discard()
+
+
+async def snapshot(
+    repo: PriceHistoryRepository, root: str = SNAPSHOT_DIR, full: bool = False, lag: float = 0
+) -> int:
+    """
+    Writes the rows since the last watermark (all rows if `full`) and
+    returns their count. `lag` is how far the source is behind the primary,
+    in seconds.
+    """
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S") + f"-{uuid.uuid4().hex[:8]}"
+    until = datetime.now(timezone.utc) - timedelta(seconds=SNAPSHOT_SETTLE_SECS + lag)
+    target = f"{root}.staging-{run_id}" if full else root
+    after = EPOCH if full else (read_watermark(root) or EPOCH)
+
+    if after >= until:
+        logger.info("Price history snapshot is up to date (watermark %s)", after.isoformat())
+        return 0
+
+    os.makedirs(target, exist_ok=True)
+    writer = SnapshotWriter(target, run_id)
+    try:
+        async for chunk in repo.snapshot_price_history(after, until, chunk_size=EXPORT_CHUNK_ROWS):
+            writer.write_chunk(chunk)
+        writer.commit()
+    except BaseException:
+        writer.discard()
+        if full:
+            shutil.rmtree(target, ignore_errors=True)
+        raise
+
+    write_watermark(target, until, writer.rows)
+
+    if full:
+        retired = f"{root}.retired-{run_id}"
+        if os.path.exists(root):
+            os.replace(root, retired)
+        os.replace(target, root)
+        shutil.rmtree(retired, ignore_errors=True)
+
+    logger.info(
+        "Price history snapshot wrote %s rows (%s - %s)",
+        writer.rows, after.isoformat(), until.isoformat()
+    )
+    return writer.rows
+
+
+async def run(full: bool, root: str, dsn: Optional[str]) -> None:
+    dsn = dsn or (DATABASE_REPLICA_URLS[0] if DATABASE_REPLICA_URLS else primary_url())
+    database = create_database(dsn)
+    await database.connect()
+    try:
+        # Zero on the primary. The replica only moves forward, so the lag
+        # measured now is an upper bound for the reads that follow. A
+        # replica that is not streaming has no bound at all, and a
+        # watermark moved past rows it never received skips them for good.
+        lag = await database.fetch_val(REPLICA_LAG_QUERY)
+        if lag is None:
+            raise RuntimeError(
+                "Snapshot source is not streaming from the primary, watermark left as is"
+            )
+        lag = float(lag)
+        if lag:
+            logger.info("Snapshot source is %.1fs behind the primary, cutting off earlier", lag)
+        await snapshot(PriceHistoryRepository(database), root=root, full=full, lag=lag)
+    finally:
+        await database.disconnect()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write Parquet snapshots of price history")
+    parser.add_argument("--full", action="store_true", help="Rebuild instead of appending")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR)
+    parser.add_argument("--dsn", default=None, help="Defaults to the first read replica")
+    args = parser.parse_args()
+    asyncio.run(run(args.full, args.dir, args.dsn))
+
+
+if __name__ == "__main__":
+    main()
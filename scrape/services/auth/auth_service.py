@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 import bcrypt
 from jose import jwt, JWTError, ExpiredSignatureError
@@ -6,23 +8,58 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, OAuth2Pas
 from scrape.core.configs import ACCESS_TOKEN_EXPIRE_MINS
 from scrape.core.configs import JWT_TOKEN_ALGORITHM
 from scrape.core.configs import JWT_TOKEN_SECRET_KEY
+from scrape.core.configs import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING
 from scrape.models.users.token import TokenData
 from scrape.db.repositories.users.user import UserRepository
 from scrape.models.users.user import UserInDB, UserResponse
 from scrape.db.database import get_repository
+from scrape.services.auth.principal_cache import principal_cache, token_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/v1/scraper/users/login")
 
 security = HTTPBearer()
 
 class AuthPassword:
-    def hash_password(self, password: str) -> str:
-        salt = bcrypt.gensalt()
+    """
+    bcrypt runs in a small dedicated thread pool (it releases the GIL), so a
+    hash never stalls the event loop. At most PASSWORD_HASH_MAX_PENDING
+    operations may be queued or running; beyond that callers get a 503
+    instead of piling up behind a login flood.
+    """
+    _executor = ThreadPoolExecutor(
+        max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+    )
+    _pending = 0
+
+    @classmethod
+    async def _run(cls, fn, *args):
+        if cls._pending >= PASSWORD_HASH_MAX_PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        cls._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(cls._executor, fn, *args)
+        finally:
+            cls._pending -= 1
+
+    @staticmethod
+    def _hash(password: str) -> str:
+        salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
         return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+    @staticmethod
+    def _verify(plain_password: str, hashed_password: str) -> bool:
         return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
 
+    async def hash_password(self, password: str) -> str:
+        return await self._run(self._hash, password)
+
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self._verify, plain_password, hashed_password)
+
 
 class AppJWTBearer(HTTPBearer):
     def __init__(self, auto_error: bool = True):
@@ -54,21 +91,25 @@ class AppJWTBearer(HTTPBearer):
             expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINS)
         to_encode.update({"exp": expire})
         
-        return jwt.encode(to_encode, JWT_TOKEN_SECRET_KEY, algorithm=JWT_TOKEN_ALGORITHM)
+        return jwt.encode(to_encode, str(JWT_TOKEN_SECRET_KEY), algorithm=JWT_TOKEN_ALGORITHM)
 
     @staticmethod
     def create_refresh_token(data: dict):
         to_encode = data.copy()
         expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINS)
         to_encode.update({"exp": expire})
-        return jwt.encode(to_encode, JWT_TOKEN_SECRET_KEY, algorithm=JWT_TOKEN_ALGORITHM)
+        return jwt.encode(to_encode, str(JWT_TOKEN_SECRET_KEY), algorithm=JWT_TOKEN_ALGORITHM)
 
     @staticmethod
     def decode_token(token: str) -> TokenData | None:
+        email = token_cache.get(token)
+        if email is not None:
+            return TokenData(email=email)
+
         try:
             payload = jwt.decode(
                 token=token, 
-                key=JWT_TOKEN_SECRET_KEY,
+                key=str(JWT_TOKEN_SECRET_KEY),
                 algorithms=[JWT_TOKEN_ALGORITHM],
                 options={"verify_exp": True}
             )
@@ -77,6 +118,7 @@ class AppJWTBearer(HTTPBearer):
 
             if email is None:
                 return None
+            token_cache.set(token, email, payload["exp"])
             return TokenData(email=email)
         except ExpiredSignatureError:
             return None
@@ -97,6 +139,10 @@ async def get_current_user(
             detail="Invalid or expired token. Try to login again",
         )
 
+    cached_user = principal_cache.get(token_data.email)
+    if cached_user is not None:
+        return cached_user
+
     user = await user_repo.get_user_by_email(email=token_data.email)
 
     if user is None:
@@ -106,5 +152,7 @@ async def get_current_user(
         )
 
     user_public_data = user.model_dump(exclude={"hashed_password"})
+    user_response = UserResponse(**user_public_data)
+    principal_cache.set(token_data.email, user_response)
 
-    return UserResponse(**user_public_data)
+    return user_response
@@ -0,0 +1,91 @@
+"""
+In-process caches that keep the authentication dependency off the database:
+verified tokens are remembered until they expire and user principals for a
+short TTL. The user routes invalidate a principal when they change or
+delete the user, but only in the worker that served the request: with
+WEB_CONCURRENCY > 1 the other workers keep serving the old principal, a
+deleted user's included, for up to PRINCIPAL_CACHE_TTL_SECS.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+from uuid import UUID
+from scrape.core.configs import (
+    PRINCIPAL_CACHE_TTL_SECS, PRINCIPAL_CACHE_MAX_SIZE, TOKEN_CACHE_MAX_SIZE
+)
+from scrape.models.users.user import UserResponse
+
+
+class TokenCache:
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[str]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        subject, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[token]
+            return None
+        self._entries.move_to_end(token)
+        return subject
+
+    def set(self, token: str, subject: str, expires_at: float) -> None:
+        self._entries[token] = (subject, expires_at)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class PrincipalCache:
+    def __init__(self, ttl: float, max_size: int) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[UserResponse, float]]" = OrderedDict()
+        self._subjects_by_id: Dict[UUID, Set[str]] = {}
+
+    def get(self, subject: str) -> Optional[UserResponse]:
+        entry = self._entries.get(subject)
+        if entry is None:
+            return None
+        user, cached_at = entry
+        if time.monotonic() - cached_at > self.ttl:
+            self._discard(subject)
+            return None
+        self._entries.move_to_end(subject)
+        return user
+
+    def set(self, subject: str, user: UserResponse) -> None:
+        self._discard(subject)
+        self._entries[subject] = (user, time.monotonic())
+        self._subjects_by_id.setdefault(user.id, set()).add(subject)
+        while len(self._entries) > self.max_size:
+            self._discard(next(iter(self._entries)))
+
+    def invalidate(self, user_id: UUID) -> None:
+        for subject in self._subjects_by_id.pop(user_id, set()):
+            self._entries.pop(subject, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._subjects_by_id.clear()
+
+    def _discard(self, subject: str) -> None:
+        entry = self._entries.pop(subject, None)
+        if entry is None:
+            return
+        subjects = self._subjects_by_id.get(entry[0].id)
+        if subjects:
+            subjects.discard(subject)
+            if not subjects:
+                del self._subjects_by_id[entry[0].id]
+
+
+token_cache = TokenCache(TOKEN_CACHE_MAX_SIZE)
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_TTL_SECS, PRINCIPAL_CACHE_MAX_SIZE)
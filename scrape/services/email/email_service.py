@@ -1,13 +1,33 @@
+import asyncio
+import html
+from functools import lru_cache
+from typing import List
 import boto3
 from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
+from sendgrid.helpers.mail import Mail, Personalization, To, Substitution, Content
 from fastapi import HTTPException
 from scrape.core.configs import (
     SENDGRID_API_KEY, FROM_EMAIL, SUPPORT_EMAIL,
     AWS_REGION, SES_SENDER, AWS_ACCESS_KEY_ID,
-    AWS_SECRET_ACCESS_KEY
+    AWS_SECRET_ACCESS_KEY, NOTIFICATION_PROVIDER
 )
-from scrape.core.logger import logger
+from scrape.core.logger import get_logger
+from scrape.models.alerts.alert import TriggeredAlert
+from scrape.models.notifications.notification import NotificationCreate, NotificationProvider
+
+logger = get_logger(__name__)
+
+# SendGrid accepts at most this many personalizations per request
+SENDGRID_MAX_BATCH = 1000
+
+# Checked at import, so a misconfigured provider stops the app at startup
+# rather than failing every transaction that queues a notification
+PROVIDER = NotificationProvider(NOTIFICATION_PROVIDER)
+
+
+@lru_cache(maxsize=1)
+def get_sendgrid_client() -> SendGridAPIClient:
+    return SendGridAPIClient(str(SENDGRID_API_KEY))
 
 
 async def send_contact_email(name: str, email: str, subject: str, message: str):
@@ -32,8 +52,7 @@ async def send_contact_email(name: str, email: str, subject: str, message: str):
     )
 
     try:
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
-        response = sg.send(mail)
+        response = await asyncio.to_thread(get_sendgrid_client().send, mail)
         return {"status": "success", "code": response.status_code}
     except Exception as e:
         logger.exception("Error: %s", e)
@@ -51,7 +70,8 @@ ses_client = boto3.client(
 async def send_email_via_ses(name: str, email: str, subject: str, message: str):
     logger.info("Sending email via SES")
     try:
-        response = ses_client.send_email(
+        response = await asyncio.to_thread(
+            ses_client.send_email,
             Source=SES_SENDER,
             Destination={"ToAddresses": [SUPPORT_EMAIL]},
             Message={
@@ -72,20 +92,67 @@ async def send_email_via_ses(name: str, email: str, subject: str, message: str):
         raise HTTPException(status_code=500, detail="Failed to send email") from e
 
 
-async def reset_password_send_email(to: str, subject: str, body: str):
-    try:
-        response = ses_client.send_email(
-            Source=SES_SENDER,
-            Destination={"ToAddresses": [to]},
-            Message={
-                "Subject": {"Data": subject, "Charset": "UTF-8"},
-                "Body": {
-                    "Text": {"Data": body, "Charset": "UTF-8"},
-                    "Html": {"Data": f"<html><body>{body}</body></html>", "Charset": "UTF-8"},
-                },
-            },
+def password_reset_notification(to: str, reset_link: str) -> NotificationCreate:
+    body = "Click here to reset your password: {}"
+    body_html = body.format(html.escape(reset_link, quote=True))
+    return NotificationCreate(
+        provider=PROVIDER,
+        recipient=to,
+        subject="Password Reset Request",
+        body_text=body.format(reset_link),
+        body_html=f"<html><body>{body_html}</body></html>",
+    )
+
+
+def price_alert_notification(alert: TriggeredAlert) -> NotificationCreate:
+    return NotificationCreate(
+        provider=PROVIDER,
+        recipient=alert.email,
+        subject=f"Price alert: {alert.product_name}",
+        body_text=(
+            f"{alert.product_name} dropped to {alert.triggered_price:.2f}, "
+            f"at or below your target of {alert.target_price:.2f}.\n\n{alert.product_url}"
+        ),
+    )
+
+
+def send_notification_via_ses(notification: NotificationCreate) -> str:
+    """Blocking; the outbox dispatcher runs it in a worker thread."""
+    body = {"Text": {"Data": notification.body_text, "Charset": "UTF-8"}}
+    if notification.body_html:
+        body["Html"] = {"Data": notification.body_html, "Charset": "UTF-8"}
+
+    response = ses_client.send_email(
+        Source=SES_SENDER,
+        Destination={"ToAddresses": [notification.recipient]},
+        Message={
+            "Subject": {"Data": notification.subject, "Charset": "UTF-8"},
+            "Body": body,
+        },
+    )
+    return response["MessageId"]
+
+
+def send_notifications_via_sendgrid(notifications: List[NotificationCreate]) -> int:
+    """
+    Blocking; sends up to SENDGRID_MAX_BATCH messages in one API request,
+    one personalization each, with subject and body substituted per
+    recipient.
+    """
+    mail = Mail(from_email=FROM_EMAIL)
+    mail.add_content(Content("text/plain", "-body_text-"))
+    if any(n.body_html for n in notifications):
+        mail.add_content(Content("text/html", "-body_html-"))
+
+    for notification in notifications:
+        personalization = Personalization()
+        personalization.add_to(To(notification.recipient))
+        personalization.subject = notification.subject
+        personalization.add_substitution(Substitution("-body_text-", notification.body_text))
+        personalization.add_substitution(
+            Substitution("-body_html-", notification.body_html or notification.body_text)
         )
-        return response
-    except Exception as e:
-        logger.exception("Error sending email via SES: %s", e)
-        raise HTTPException(status_code=500, detail="Failed to send email") from e
+        mail.add_personalization(personalization)
+
+    response = get_sendgrid_client().send(mail)
+    return response.status_code
@@ -0,0 +1,137 @@
+"""
+Background delivery of the notification outbox. Requests only insert into
+`notification_outbox`; this loop drains it so email latency never shows up
+in API responses.
+"""
+
+import asyncio
+import random
+import time
+from typing import Dict, List
+from databases import Database
+from scrape.core.configs import (
+    OUTBOX_POLL_SECS, OUTBOX_BATCH_SIZE, OUTBOX_CONCURRENCY,
+    OUTBOX_MAX_ATTEMPTS, OUTBOX_LEASE_SECS,
+    SES_SENDS_PER_SEC, SENDGRID_REQUESTS_PER_SEC
+)
+from scrape.core.logger import get_logger
+from scrape.db.repositories.notifications.outbox import NotificationOutboxRepository
+from scrape.models.notifications.notification import Notification, NotificationProvider
+from scrape.services.email.email_service import (
+    SENDGRID_MAX_BATCH, send_notification_via_ses, send_notifications_via_sendgrid
+)
+
+logger = get_logger(__name__)
+
+RETRY_BASE_SECS = 30
+RETRY_MAX_SECS = 3600
+
+
+class RateLimiter:
+    """Token bucket shared by every send to one provider."""
+
+    def __init__(self, rate_per_sec: float, burst: int = 1) -> None:
+        self.rate = rate_per_sec
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def retry_delay(attempts: int) -> float:
+    delay = min(RETRY_BASE_SECS * 2 ** (attempts - 1), RETRY_MAX_SECS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class OutboxDispatcher:
+    def __init__(self, db: Database) -> None:
+        self.repo = NotificationOutboxRepository(db)
+        self.semaphore = asyncio.Semaphore(OUTBOX_CONCURRENCY)
+        self.limiters = {
+            NotificationProvider.SES: RateLimiter(SES_SENDS_PER_SEC, burst=int(SES_SENDS_PER_SEC)),
+            NotificationProvider.SENDGRID: RateLimiter(SENDGRID_REQUESTS_PER_SEC),
+        }
+
+    async def run(self) -> None:
+        while True:
+            try:
+                drained = await self.dispatch_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Notification dispatch failed")
+                logger.error(e)
+                drained = 0
+            if drained < OUTBOX_BATCH_SIZE:
+                await asyncio.sleep(OUTBOX_POLL_SECS)
+
+    async def dispatch_once(self) -> int:
+        batch = await self.repo.claim_batch(
+            limit=OUTBOX_BATCH_SIZE, lease_seconds=OUTBOX_LEASE_SECS
+        )
+        if not batch:
+            return 0
+
+        by_provider: Dict[NotificationProvider, List[Notification]] = {}
+        for notification in batch:
+            by_provider.setdefault(notification.provider, []).append(notification)
+
+        jobs = []
+        for notification in by_provider.get(NotificationProvider.SES, []):
+            jobs.append(self._send_ses(notification))
+        sendgrid = by_provider.get(NotificationProvider.SENDGRID, [])
+        for i in range(0, len(sendgrid), SENDGRID_MAX_BATCH):
+            jobs.append(self._send_sendgrid(sendgrid[i:i + SENDGRID_MAX_BATCH]))
+
+        results = await asyncio.gather(*jobs)
+
+        sent, failures = [], []
+        for delivered, failed in results:
+            sent.extend(delivered)
+            failures.extend(failed)
+
+        await self.repo.mark_sent(sent)
+        await self.repo.mark_failed(failures)
+
+        if failures:
+            logger.warning("%s notifications failed, %s sent", len(failures), len(sent))
+        return len(batch)
+
+    async def _send_ses(self, notification: Notification):
+        async with self.semaphore:
+            await self.limiters[NotificationProvider.SES].acquire()
+            try:
+                await asyncio.to_thread(send_notification_via_ses, notification)
+                return [notification.id], []
+            except Exception as e:
+                return [], [self._failure(notification, e)]
+
+    async def _send_sendgrid(self, notifications: List[Notification]):
+        async with self.semaphore:
+            await self.limiters[NotificationProvider.SENDGRID].acquire()
+            try:
+                await asyncio.to_thread(send_notifications_via_sendgrid, notifications)
+                return [n.id for n in notifications], []
+            except Exception as e:
+                return [], [self._failure(n, e) for n in notifications]
+
+    @staticmethod
+    def _failure(notification: Notification, error: Exception) -> dict:
+        final = notification.attempts >= OUTBOX_MAX_ATTEMPTS
+        return {
+            "id": notification.id,
+            "status": "failed" if final else "pending",
+            "delay": 0 if final else retry_delay(notification.attempts),
+            "error": str(error)[:1000],
+        }
@@ -0,0 +1,114 @@
+from typing import Iterable, List, Optional
+from uuid import UUID
+from scrape.core.logger import get_logger
+from scrape.db.repositories.alert.alert import AlertRepository
+from scrape.db.repositories.notifications.outbox import NotificationOutboxRepository
+from scrape.db.repositories.products.product import ProductRepository
+from scrape.db.repositories.products.price_history import PriceHistoryRepository
+from scrape.models.products.product import Product, ProductCreate, ScrapedProduct
+from scrape.services.alerts.alert_index import alert_index
+from scrape.services.email.email_service import price_alert_notification
+
+logger = get_logger(__name__)
+
+
+class ProductIngestion:
+    """
+    One scrape's products, persisted as they arrive. `add` stores a
+    product and its price right away; `finish` refreshes the latest-price
+    summaries and evaluates price alerts once for everything added.
+    """
+
+    def __init__(
+        self,
+        retailer_id: UUID,
+        product_repo: ProductRepository,
+        price_history_repo: PriceHistoryRepository,
+        alert_repo: AlertRepository,
+        outbox_repo: NotificationOutboxRepository,
+    ) -> None:
+        self.retailer_id = retailer_id
+        self.product_repo = product_repo
+        self.price_history_repo = price_history_repo
+        self.alert_repo = alert_repo
+        self.outbox_repo = outbox_repo
+        self._new_prices = []
+        self._observations = []
+
+    async def add(self, product: ScrapedProduct) -> Optional[Product]:
+        product_data = ProductCreate(
+            name=product.name, url=product.url, price=product.price,
+            category=product.category, retailer_id=self.retailer_id,
+            external_id=product.external_id
+        )
+        stored = await self.product_repo.get_or_create_product(product_data=product_data)
+
+        if not stored or product_data.price is None:
+            return stored
+
+        history = await self.price_history_repo.create_price_history(
+            product_id=stored.id,
+            price=product_data.price
+        )
+        self._new_prices.append((stored.id, product_data.price))
+        if history:
+            self._observations.append((stored.id, product_data.price, history["created_at"]))
+        return stored
+
+    async def finish(self) -> None:
+        new_prices, observations = self._new_prices, self._observations
+        self._new_prices, self._observations = [], []
+
+        await self.price_history_repo.record_latest_prices(observations)
+
+        # The index only stands in for the database while the listener keeps
+        # it in step with the other workers; otherwise every price is checked.
+        if alert_index.ready:
+            new_prices = [
+                (product_id, price) for product_id, price in new_prices
+                if alert_index.crossed(product_id, price)
+            ]
+
+        if not new_prices:
+            return
+
+        # Alerts only flip if their notifications are queued with them.
+        async with self.alert_repo.db.transaction():
+            triggered = await self.alert_repo.trigger_alerts(new_prices)
+            await self.outbox_repo.enqueue([price_alert_notification(a) for a in triggered])
+
+        # Only once the flip is committed; a rolled-back batch leaves them armed
+        for alert in triggered:
+            alert_index.remove(alert.product_id, alert.id)
+
+        if triggered:
+            logger.info("%s alerts triggered by this batch", len(triggered))
+
+
+async def ingest_products(
+    products: Iterable[ScrapedProduct],
+    retailer_id: UUID,
+    product_repo: ProductRepository,
+    price_history_repo: PriceHistoryRepository,
+    alert_repo: AlertRepository,
+    outbox_repo: NotificationOutboxRepository,
+) -> List[ScrapedProduct]:
+    """
+    Persist a batch of normalized products and their prices, refresh their
+    latest-price summaries, then evaluate price alerts once for the whole
+    batch. `products` is consumed lazily, so a normalizer generator runs
+    item by item alongside the inserts. Returns the products consumed.
+    """
+    ingestion = ProductIngestion(
+        retailer_id, product_repo, price_history_repo, alert_repo, outbox_repo
+    )
+    consumed = []
+    try:
+        for product in products:
+            consumed.append(product)
+            await ingestion.add(product)
+    finally:
+        # Also when a product fails partway: the prices stored so far still
+        # get their summaries and alert checks.
+        await ingestion.finish()
+    return consumed
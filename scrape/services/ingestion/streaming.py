@@ -0,0 +1,61 @@
+"""
+Scrape results as a stream of events
+
+`scrape_events` drives a scrape item by item: every raw item is
+normalized and stored before the next one is pulled from the scraper,
+and reported straight away instead of after the last product is
+persisted. It yields (event, data) pairs:
+
+- product: a product as stored, as soon as it is
+- progress: running counts, after every item the scraper hands over
+- error: an item the scraper could not read; the scrape goes on
+- done: the final counts
+
+A failure of the scrape itself propagates to the caller.
+"""
+
+import time
+from typing import AsyncIterable, AsyncIterator, Tuple
+from scrape.core.metrics import SCRAPE_FIRST_RESULT_SECONDS
+from scrape.services.ingestion.ingestion_service import ProductIngestion
+from scrape.services.scrapers.stats import ScrapeStats
+from scrape.services.wrangling.normalizer import ProductNormalizer
+
+
+async def scrape_events(
+    items: AsyncIterable[dict],
+    normalizer: ProductNormalizer,
+    ingestion: ProductIngestion,
+    stats: ScrapeStats,
+) -> AsyncIterator[Tuple[str, dict]]:
+    counts = {"extracted": 0, "scraped": 0, "stored": 0}
+    started = time.perf_counter()
+
+    try:
+        async for item in items:
+            counts["extracted"] += 1
+            if isinstance(item, dict) and "error" in item:
+                yield "error", {"detail": item["error"], "url": item.get("url"), "fatal": False}
+
+            product = normalizer.normalize(item)
+            if product is not None:
+                counts["scraped"] += 1
+                with stats.persist():
+                    stored = await ingestion.add(product)
+
+                if stored is not None:
+                    if not counts["stored"]:
+                        SCRAPE_FIRST_RESULT_SECONDS.labels(stats.scraper).observe(
+                            time.perf_counter() - started
+                        )
+                    counts["stored"] += 1
+                    yield "product", stored.model_dump()
+
+            yield "progress", dict(counts)
+    finally:
+        # Also when the scraper fails partway: the prices stored so far
+        # still get their summaries and alert checks.
+        with stats.persist():
+            await ingestion.finish()
+
+    yield "done", counts
@@ -0,0 +1,319 @@
+"""
+Cross-retailer product matching
+
+Groups listings of the same product from different retailers into
+clusters in `product_matches`, without comparing every pair of products:
+
+1. each name is normalized into a token set and MinHashed (minhash.py)
+2. the signature's band keys bucket products that are likely similar
+3. only pairs sharing a bucket, from different retailers, are compared
+4. pairs at or above MATCH_MIN_SIMILARITY are linked into clusters, best
+   first, unless the clusters' specs (model numbers, capacities)
+   contradict each other
+
+Buckets holding more than MATCH_MAX_BUCKET products come from generic
+names ("phone case") and are skipped: every pair in them would be compared
+and hardly any would be a real match.
+
+The default run is incremental. It signs new and renamed products and
+looks up their bucket mates in `product_signatures`. A new product joins
+its mates' clusters, and clusters it bridges are merged; specs are only
+checked against the mates themselves, not their whole clusters. `--full`
+re-signs everything and rebuilds the clusters in memory. That is the way
+to drop links that renames have made stale.
+
+    python -m scrape.services.matching.matcher
+    python -m scrape.services.matching.matcher --full
+"""
+
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, FrozenSet, Hashable, List, Optional, Set, Tuple
+from uuid import UUID
+import numpy as np
+from scrape.core.configs import (
+    DATABASE_REPLICA_URLS, EXPORT_CHUNK_ROWS, MATCH_BANDS, MATCH_MAX_BUCKET,
+    MATCH_MIN_SIMILARITY, MATCH_NUM_PERM
+)
+from scrape.core.logger import get_logger
+from scrape.db.repositories.products.product_match import ProductMatchRepository
+from scrape.db.tasks import create_database, primary_url
+from scrape.services.matching.minhash import (
+    MinHasher, compatible_specs, is_empty, name_tokens, similarity, spec_tokens
+)
+
+logger = get_logger(__name__)
+
+
+class Clusters:
+    """
+    Union-find over products, where each cluster also keeps the union of
+    its members' specs. Two clusters join only if their specs do not
+    contradict each other. Links are added best first, so a listing that
+    leaves out its capacity joins the closest variant and cannot chain
+    "A15 128GB" to "A15 256GB".
+    """
+
+    def __init__(self) -> None:
+        self.parent: Dict[Hashable, Hashable] = {}
+        self.specs: Dict[Hashable, FrozenSet[str]] = {}
+
+    def find(self, item: Hashable) -> Hashable:
+        parent = self.parent.setdefault(item, item)
+        while parent != item:
+            grandparent = self.parent[parent]
+            self.parent[item] = grandparent
+            item, parent = parent, grandparent
+        return item
+
+    def link(self, a: Hashable, a_specs: FrozenSet[str], b: Hashable, b_specs: FrozenSet[str]) -> bool:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return True
+        specs_a = self.specs.get(root_a, a_specs)
+        specs_b = self.specs.get(root_b, b_specs)
+        if not compatible_specs(specs_a, specs_b):
+            return False
+        self.parent[root_b] = root_a
+        self.specs[root_a] = specs_a | specs_b
+        self.specs.pop(root_b, None)
+        return True
+
+    def groups(self) -> List[List[Hashable]]:
+        """Clusters of two or more; products whose every link was refused are left out."""
+        members = defaultdict(list)
+        for item in self.parent:
+            members[self.find(item)].append(item)
+        return [group for group in members.values() if len(group) > 1]
+
+
+def sign(hasher: MinHasher, rows: list) -> Tuple[np.ndarray, np.ndarray, List[FrozenSet[str]]]:
+    token_sets = [name_tokens(row["name"]) for row in rows]
+    signatures = hasher.signatures(token_sets)
+    return signatures, hasher.band_keys(signatures), [spec_tokens(tokens) for tokens in token_sets]
+
+
+def signature_records(
+    rows: list, signatures: np.ndarray, keys: np.ndarray, specs: List[FrozenSet[str]]
+) -> list:
+    return [
+        (row["id"], row["retailer_id"], band_keys, signature.tobytes(), sorted(spec))
+        for row, signature, band_keys, spec in zip(rows, signatures, keys.tolist(), specs)
+    ]
+
+
+def similar_pairs(
+    pairs: np.ndarray, signatures: np.ndarray, min_similarity: float, block: int = 1 << 18
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Pairs at or above `min_similarity`, with their scores, a block at a time."""
+    kept, scores = [], []
+    for start in range(0, len(pairs), block):
+        chunk = pairs[start:start + block]
+        score = similarity(signatures[chunk[:, 0]], signatures[chunk[:, 1]])
+        keep = score >= min_similarity
+        kept.append(chunk[keep])
+        scores.append(score[keep])
+    if not kept:
+        return pairs, np.empty(0)
+    return np.concatenate(kept), np.concatenate(scores)
+
+
+def candidate_pairs(
+    keys: np.ndarray, retailers: np.ndarray, empty: np.ndarray, max_bucket: int
+) -> np.ndarray:
+    """
+    `(m, 2)` row indices, `i < j`, of products from different retailers that
+    share a bucket in at least one band. Sorting each band column groups
+    equal keys; the pairs of all buckets of one size come out of a single
+    broadcast, so the work is proportional to the pairs, not the products.
+    """
+    n = len(keys)
+    rows = np.flatnonzero(~empty)
+    found = []
+    skipped = 0
+    for band in range(keys.shape[1]):
+        order = rows[np.argsort(keys[rows, band], kind="stable")]
+        column = keys[order, band]
+        starts = np.flatnonzero(np.r_[True, column[1:] != column[:-1]])
+        sizes = np.diff(np.r_[starts, len(column)])
+        skipped += int((sizes > max_bucket).sum())
+        for size in np.unique(sizes[(sizes > 1) & (sizes <= max_bucket)]):
+            first, second = np.triu_indices(size, 1)
+            bucket_starts = starts[sizes == size][:, None]
+            i = order[bucket_starts + first].ravel()
+            j = order[bucket_starts + second].ravel()
+            keep = retailers[i] != retailers[j]
+            found.append(np.minimum(i[keep], j[keep]) * n + np.maximum(i[keep], j[keep]))
+
+    if skipped:
+        logger.info("Skipped %s buckets over %s products", skipped, max_bucket)
+    if not found:
+        return np.empty((0, 2), dtype=np.int64)
+    # Sort and drop repeats: pairs sharing several bands were found once per band
+    pairs = np.sort(np.concatenate(found))
+    pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]]
+    return np.stack([pairs // n, pairs % n], axis=1)
+
+
+async def rebuild(
+    repo: ProductMatchRepository, hasher: MinHasher,
+    min_similarity: float = MATCH_MIN_SIMILARITY, max_bucket: int = MATCH_MAX_BUCKET
+) -> int:
+    """Re-signs every product and replaces all clusters; returns the matched products."""
+    ids: List[UUID] = []
+    retailer_codes: Dict[UUID, int] = {}
+    retailers: List[int] = []
+    # Spec sets are interned: products refer to them by index
+    spec_codes: Dict[FrozenSet[str], int] = {}
+    specs: List[int] = []
+    signature_chunks: List[np.ndarray] = []
+    key_chunks: List[np.ndarray] = []
+
+    async for rows in repo.stream_product_names(full=True, chunk_size=EXPORT_CHUNK_ROWS):
+        signatures, keys, chunk_specs = sign(hasher, rows)
+        await repo.save_signatures(signature_records(rows, signatures, keys, chunk_specs))
+        for row, spec in zip(rows, chunk_specs):
+            ids.append(row["id"])
+            retailers.append(retailer_codes.setdefault(row["retailer_id"], len(retailer_codes)))
+            specs.append(spec_codes.setdefault(spec, len(spec_codes)))
+        signature_chunks.append(signatures)
+        key_chunks.append(keys)
+
+    if not ids:
+        await repo.replace_matches([])
+        return 0
+
+    signatures = np.concatenate(signature_chunks)
+    pairs = candidate_pairs(
+        np.concatenate(key_chunks), np.array(retailers), is_empty(signatures), max_bucket
+    )
+    compared = len(pairs)
+    pairs, scores = similar_pairs(pairs, signatures, min_similarity)
+    order = np.argsort(-scores, kind="stable")
+    pairs, scores = pairs[order], scores[order]
+
+    spec_sets = list(spec_codes)
+    best = np.zeros(len(ids), dtype=np.float32)
+    clusters = Clusters()
+    linked = 0
+    for (i, j), score in zip(pairs.tolist(), scores.tolist()):
+        if clusters.link(i, spec_sets[specs[i]], j, spec_sets[specs[j]]):
+            best[i] = max(best[i], score)
+            best[j] = max(best[j], score)
+            linked += 1
+    logger.info("%s candidate pairs, %s similar, %s linked", compared, len(pairs), linked)
+
+    matches = []
+    for members in clusters.groups():
+        cluster_id = min(ids[i] for i in members)
+        matches.extend((ids[i], cluster_id, float(best[i])) for i in members)
+
+    await repo.replace_matches(matches)
+    return len(matches)
+
+
+async def update(
+    repo: ProductMatchRepository, hasher: MinHasher,
+    min_similarity: float = MATCH_MIN_SIMILARITY, max_bucket: int = MATCH_MAX_BUCKET
+) -> int:
+    """Matches new and renamed products against everything signed so far."""
+    matched = 0
+    async for rows in repo.stream_product_names(full=False, chunk_size=EXPORT_CHUNK_ROWS):
+        signatures, keys, specs = sign(hasher, rows)
+        await repo.save_signatures(signature_records(rows, signatures, keys, specs))
+
+        present = np.flatnonzero(~is_empty(signatures))
+        if not len(present):
+            continue
+        candidates = await repo.get_candidates(np.unique(keys[present]).tolist())
+
+        buckets: Dict[int, List[int]] = defaultdict(list)
+        for c, candidate in enumerate(candidates):
+            for key in candidate["band_keys"]:
+                buckets[key].append(c)
+        candidate_signatures = np.frombuffer(
+            b"".join(candidate["signature"] for candidate in candidates), dtype=np.uint32
+        ).reshape(len(candidates), hasher.num_perm)
+
+        pairs: Set[Tuple[int, int]] = set()
+        for i in present.tolist():
+            row = rows[i]
+            for key in keys[i].tolist():
+                mates = buckets.get(key, ())
+                if len(mates) > max_bucket:
+                    continue
+                pairs.update(
+                    (i, c) for c in mates
+                    if candidates[c]["retailer_id"] != row["retailer_id"]
+                )
+        if not pairs:
+            continue
+
+        left, right = (np.array(side) for side in zip(*pairs))
+        scores = similarity(signatures[left], candidate_signatures[right])
+
+        best: Dict[UUID, float] = {}
+        clusters = Clusters()
+        for k in np.argsort(-scores, kind="stable").tolist():
+            i, c, score = int(left[k]), int(right[k]), float(scores[k])
+            if score < min_similarity:
+                break
+            a, b = rows[i]["id"], candidates[c]["product_id"]
+            if clusters.link(a, specs[i], b, frozenset(candidates[c]["specs"])):
+                best[a] = max(best.get(a, 0.0), score)
+                best[b] = max(best.get(b, 0.0), score)
+        if not best:
+            continue
+
+        existing = await repo.get_cluster_ids(list(best))
+        matches: List[Tuple[UUID, UUID, float]] = []
+        merges: Dict[UUID, List[UUID]] = {}
+        for members in clusters.groups():
+            joined = sorted({existing[p] for p in members if p in existing})
+            cluster_id = joined[0] if joined else min(members)
+            if len(joined) > 1:
+                merges[cluster_id] = joined[1:]
+            matches.extend((p, cluster_id, best[p]) for p in members)
+
+        await repo.save_matches(matches, merges)
+        matched += len(matches)
+
+    return matched
+
+
+async def run(full: bool, dsn: Optional[str], read_dsn: Optional[str]) -> None:
+    # Separate pools: the read stream holds its connection in a read-only
+    # transaction while signatures and matches are written
+    database = create_database(dsn or primary_url())
+    read_database = create_database(
+        read_dsn or (DATABASE_REPLICA_URLS[0] if DATABASE_REPLICA_URLS else dsn or primary_url())
+    )
+    await database.connect()
+    await read_database.connect()
+    try:
+        repo = ProductMatchRepository(database, read_database)
+        hasher = MinHasher(MATCH_NUM_PERM, MATCH_BANDS)
+        start = time.perf_counter()
+        matched = await (rebuild if full else update)(repo, hasher)
+        logger.info(
+            "Product matching (%s) matched %s products in %.1fs",
+            "full" if full else "incremental", matched, time.perf_counter() - start
+        )
+    finally:
+        await read_database.disconnect()
+        await database.disconnect()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cluster listings of the same product across retailers")
+    parser.add_argument("--full", action="store_true", help="Rebuild every cluster")
+    parser.add_argument("--dsn", default=None, help="Defaults to the primary")
+    parser.add_argument("--read-dsn", default=None, help="Defaults to the first read replica")
+    args = parser.parse_args()
+    asyncio.run(run(args.full, args.dsn, args.read_dsn))
+
+
+if __name__ == "__main__":
+    main()
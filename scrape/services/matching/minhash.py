@@ -0,0 +1,129 @@
+"""
+Name normalization, MinHash signatures and LSH band keys
+
+Two names are compared as sets of normalized tokens, and the Jaccard
+similarity of those sets is estimated by the fraction of equal MinHash
+slots. The signature is split into bands of `rows` slots, and each band
+is hashed to a single 64-bit key. Two products share a key in some band
+with probability 1 - (1 - s^rows)^bands, which is a steep S-curve around
+(1 / bands) ^ (1 / rows). Only products sharing a key are ever compared.
+"""
+
+import re
+import unicodedata
+import zlib
+from typing import FrozenSet, Iterable, List, Sequence, Set
+import numpy as np
+
+# Every slot of an empty token set
+EMPTY_SLOT = np.uint32(0xFFFFFFFF)
+
+# Listing noise that says nothing about which product it is
+STOPWORDS = frozenset({
+    "a", "an", "and", "the", "for", "with", "of", "in", "by", "to", "new",
+    "original", "genuine", "official", "latest", "edition", "version",
+})
+
+# Runs of anything but letters, digits and decimal points
+_SEPARATORS = re.compile(r"(?:[^0-9a-z.]|(?<![0-9])\.|\.(?![0-9]))+")
+_DIGIT = re.compile(r"[0-9]")
+# "128 GB" and "128GB" are the same token, so are "6.5 inch" and "6.5inch"
+_UNIT = re.compile(r"\b(\d+(?:\.\d+)?)\s+(gb|tb|mb|mah|w|mp|hz|inch|in|cm|mm|kg|g|ml|l)\b")
+
+
+def normalize_name(name: str) -> str:
+    name = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode("ascii")
+    name = _SEPARATORS.sub(" ", name.lower().replace('"', " inch "))
+    name = _UNIT.sub(r"\1\2", name)
+    return " ".join(name.split())
+
+
+def name_tokens(name: str) -> Set[str]:
+    return {token for token in normalize_name(name).split() if token not in STOPWORDS}
+
+
+def spec_tokens(tokens: Iterable[str]) -> FrozenSet[str]:
+    """
+    Tokens with a digit: model numbers, capacities, sizes. Names that share
+    most words but differ here ("Galaxy A15" and "Galaxy A16", "128GB" and
+    "256GB") are different products, however similar they look overall.
+    """
+    return frozenset(token for token in tokens if _DIGIT.search(token))
+
+
+def compatible_specs(a: FrozenSet[str], b: FrozenSet[str]) -> bool:
+    """One listing may leave specs out, but must not contradict the other."""
+    return a <= b or b <= a
+
+
+def _token_hash(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8"))
+
+
+class MinHasher:
+    """
+    Signatures of `num_perm` 32-bit slots, computed a batch at a time.
+
+    Each slot is a multiply-shift hash `(a * x + b) >> 32` of the token's
+    CRC32, with odd 64-bit `a` and wrapping arithmetic, so a whole batch is
+    a handful of numpy operations. Seeds are fixed: signatures written by
+    one run must compare with those written by the next.
+    """
+
+    def __init__(self, num_perm: int, bands: int, seed: int = 1) -> None:
+        if num_perm % bands:
+            raise ValueError(f"{num_perm} slots do not split into {bands} bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self._band_mix = rng.integers(1, 2 ** 63, size=self.rows, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        # Keeps equal slot values in different bands from sharing a key
+        self._band_salt = rng.integers(0, 2 ** 63, size=bands, dtype=np.uint64)
+
+    @property
+    def threshold(self) -> float:
+        """Similarity at which two products become candidates half of the time."""
+        return (1 / self.bands) ** (1 / self.rows)
+
+    def signatures(self, token_sets: Sequence[Iterable[str]]) -> np.ndarray:
+        """`(len(token_sets), num_perm)` uint32; empty sets get EMPTY_SLOT throughout."""
+        hashes: List[int] = []
+        lengths = np.empty(len(token_sets), dtype=np.int64)
+        for i, tokens in enumerate(token_sets):
+            before = len(hashes)
+            hashes.extend(_token_hash(token) for token in tokens)
+            lengths[i] = len(hashes) - before
+
+        signatures = np.full((len(token_sets), self.num_perm), EMPTY_SLOT, dtype=np.uint32)
+        if not hashes:
+            return signatures
+
+        x = np.array(hashes, dtype=np.uint64)[:, None]
+        with np.errstate(over="ignore"):
+            slots = ((x * self._a + self._b) >> np.uint64(32)).astype(np.uint32)
+
+        # Segment starts of the non-empty sets; empty ones own no rows,
+        # so each reduced segment is exactly one set's tokens
+        present = lengths > 0
+        starts = (np.cumsum(lengths) - lengths)[present]
+        signatures[present] = np.minimum.reduceat(slots, starts, axis=0)
+        return signatures
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """`(n, bands)` int64, one bucket key per band."""
+        banded = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        with np.errstate(over="ignore"):
+            keys = (banded * self._band_mix).sum(axis=2, dtype=np.uint64) + self._band_salt
+        return keys.view(np.int64)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity, row by row, of two stacks of signatures."""
+    return (a == b).mean(axis=-1)
+
+
+def is_empty(signatures: np.ndarray) -> np.ndarray:
+    return (signatures == EMPTY_SLOT).all(axis=-1)
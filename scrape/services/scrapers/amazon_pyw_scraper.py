@@ -2,9 +2,14 @@ import asyncio
 import random
 import time
 import urllib.parse
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 
 from playwright.async_api import async_playwright, Browser, Page, TimeoutError as PlaywrightTimeoutError
+from scrape.core.logger import get_logger
+from scrape.core.metrics import SCRAPE_PROXY_FAILURES
+from scrape.services.scrapers.stats import ScrapeStats, TRANSFER_SIZE_JS
+
+logger = get_logger(__name__)
 
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
@@ -32,6 +37,7 @@ if (_origPermQuery) {
 
 class AmazonScraper:
     BASE_URL = "https://www.amazon.com/s?k="
+    NAME = "amazon_playwright"
 
     def __init__(self, proxies: Optional[List[str]] = None, headless: bool = False,
                  max_retries: int = 3, screenshot_on_error: bool = True):
@@ -40,6 +46,27 @@ class AmazonScraper:
         self.max_retries = max_retries
         self.screenshot_on_error = screenshot_on_error
         self._bad_proxies = set()
+        self.stats = ScrapeStats(self.NAME)
+
+    def _blacklist(self, proxy: Optional[Dict]) -> None:
+        if proxy and proxy.get("server") not in self._bad_proxies:
+            self._bad_proxies.add(proxy.get("server"))
+            SCRAPE_PROXY_FAILURES.labels(self.NAME).inc()
+
+    async def _goto(self, page: Page, url: str) -> None:
+        with self.stats.phase("navigate"):
+            await page.goto(url, timeout=90000, wait_until="domcontentloaded")
+        try:
+            transferred = await page.evaluate(TRANSFER_SIZE_JS)
+        except Exception:
+            transferred = None
+        self.stats.page(transferred)
+
+    async def _pause(self, low: float, high: float, page: Optional[Page] = None) -> None:
+        with self.stats.phase("sleep"):
+            await asyncio.sleep(random.uniform(low, high))
+            if page is not None:
+                await self._human_like(page)
 
     def _pick_proxy(self) -> Optional[Dict]:
         candidates = [p for p in self.proxies if p not in self._bad_proxies]
@@ -106,11 +133,73 @@ class AmazonScraper:
 
         return None
 
+    async def _extract_links(self, page: Page, max_items: int) -> List[str]:
+        items = await page.query_selector_all("div.s-main-slot [data-component-type='s-search-result']")
+        links = []
+        for item in items[: max_items]:
+            try:
+                link_el = await item.query_selector("h2 a")
+                href = await link_el.get_attribute("href") if link_el else None
+                if href:
+                    full = urllib.parse.urljoin("https://www.amazon.com", href)
+                    links.append(full)
+            except Exception:
+                continue
+        return links
+
+    async def _extract_product(self, p: Page, link: str) -> Dict:
+        title = None
+        try:
+            t_sel = await p.query_selector("#productTitle")
+            if t_sel:
+                title = (await t_sel.inner_text()).strip()
+            else:
+                h1 = await p.query_selector("h1 span")
+                title = (await h1.inner_text()).strip() if h1 else None
+        except Exception:
+            title = None
+
+        # Raw text; parsed by the normalizer
+        price = None
+        price_selectors = [
+            ".a-price .a-offscreen",
+            "#price_inside_buybox",
+            "#priceblock_ourprice",
+            "#priceblock_dealprice",
+        ]
+        for ps in price_selectors:
+            try:
+                pe = await p.query_selector(ps)
+                if pe:
+                    txt = (await pe.inner_text()).strip()
+                    if txt:
+                        price = txt
+                        break
+            except Exception:
+                continue
+
+        category = await self._extract_category_from_product(p)
+
+        return {
+            "name": title,
+            "url": link,
+            "price": price,
+            "category": category
+        }
+
     async def scrape(self, query: str, max_items: int = 12) -> List[Dict]:
         """
         Scrape Amazon search results for `query`.
         Returns list of dicts: {name, url, price, category}
         """
+        return [product async for product in self.iter_products(query, max_items)]
+
+    async def iter_products(self, query: str, max_items: int = 12) -> AsyncIterator[Dict]:
+        """
+        `scrape`, yielding each product as soon as its page is read. An
+        attempt that fails after yielding some products is retried like any
+        other, so a product can come twice; the normalizer drops repeats.
+        """
         query_encoded = urllib.parse.quote_plus(query)
         url = f"{self.BASE_URL}{query_encoded}"
 
@@ -119,8 +208,14 @@ class AmazonScraper:
 
         while attempts < self.max_retries:
             attempts += 1
+            if attempts > 1:
+                self.stats.retries += 1
             proxy = self._pick_proxy()
-            print(f"[Attempt {attempts}/{self.max_retries}] proxy: {proxy.get('server') if proxy else 'no-proxy'}")
+            self.stats.proxy = proxy.get("server") if proxy else None
+            logger.debug(
+                "Attempt %s/%s, proxy: %s", attempts, self.max_retries,
+                proxy.get("server") if proxy else "no-proxy"
+            )
 
             try:
                 async with async_playwright() as pw:
@@ -137,68 +232,61 @@ class AmazonScraper:
                     if proxy:
                         launch_args["proxy"] = proxy
 
-                    browser: Browser = await pw.chromium.launch(**launch_args)
+                    self.stats.browser_started()
+                    with self.stats.phase("launch"):
+                        browser: Browser = await pw.chromium.launch(**launch_args)
 
-                    context = await browser.new_context(
-                        user_agent=random.choice(USER_AGENTS),
-                        viewport={"width": 1200, "height": 800},
-                        locale="en-US",
-                    )
-                    await context.add_init_script(STEALTH_JS)
+                        context = await browser.new_context(
+                            user_agent=random.choice(USER_AGENTS),
+                            viewport={"width": 1200, "height": 800},
+                            locale="en-US",
+                        )
+                        await context.add_init_script(STEALTH_JS)
 
-                    page = await context.new_page()
+                        page = await context.new_page()
                     await page.set_extra_http_headers({
                         "accept-language": "en-US,en;q=0.9",
                         "upgrade-insecure-requests": "1",
                     })
 
-                    print("navigating to:", url)
-                    await page.goto(url, timeout=90000, wait_until="domcontentloaded")
-                    await asyncio.sleep(random.uniform(1.2, 2.8))
-                    await self._human_like(page)
+                    logger.debug("Navigating to: %s", url)
+                    await self._goto(page, url)
+                    await self._pause(1.2, 2.8, page)
 
                     html = (await page.content()).lower()
                     if any(token in html for token in ("captcha", "bot check", "enter the characters", "press and hold")):
-                        print("CAPTCHA/bot-check detected on search page.")
+                        logger.warning("CAPTCHA/bot-check detected on search page")
+                        self.stats.captcha()
                         if proxy:
-                            self._bad_proxies.add(proxy.get("server"))
-                            print("blacklisting proxy:", proxy.get("server"))
-                        if self.screenshot_on_error:
-                            ts = int(time.time())
-                            try:
-                                await page.screenshot(path=f"captcha_search_{attempts}_{ts}.png", full_page=True)
-                                print("screenshot written.")
-                            except Exception:
-                                pass
-                        await context.close()
-                        await browser.close()
+                            self._blacklist(proxy)
+                            logger.warning("Blacklisting proxy: %s", proxy.get("server"))
+                        with self.stats.phase("captcha"):
+                            if self.screenshot_on_error:
+                                ts = int(time.time())
+                                try:
+                                    await page.screenshot(path=f"captcha_search_{attempts}_{ts}.png", full_page=True)
+                                    logger.debug("Screenshot written")
+                                except Exception:
+                                    pass
+                            await context.close()
+                            await browser.close()
                         last_exception = RuntimeError("CAPTCHA detected on search page")
                         continue
 
                     try:
                         await page.wait_for_selector("div.s-main-slot [data-component-type='s-search-result']", timeout=60000)
                     except PlaywrightTimeoutError:
-                        print("Timed out waiting for search results.")
+                        logger.warning("Timed out waiting for search results")
                         last_exception = PlaywrightTimeoutError("No search results")
                         await context.close()
                         await browser.close()
                         if proxy:
-                            self._bad_proxies.add(proxy.get("server"))
+                            self._blacklist(proxy)
                         continue
 
-                    items = await page.query_selector_all("div.s-main-slot [data-component-type='s-search-result']")
-                    products = []
-
-                    links = []
-                    for item in items[: max_items]:
-                        try:
-                            link_el = await item.query_selector("h2 a")
-                            href = await link_el.get_attribute("href") if link_el else None
-                            if href:
-                                full = urllib.parse.urljoin("https://www.amazon.com", href)
-                                links.append(full)
-                        except Exception:
-                            continue
+                    found = 0
+                    with self.stats.phase("extract"):
+                        links = await self._extract_links(page, max_items)
 
                     for link in links:
                         try:
@@ -207,108 +295,74 @@ class AmazonScraper:
                                 "accept-language": "en-US,en;q=0.9",
                                 "upgrade-insecure-requests": "1",
                             })
-                            await p.goto(link, timeout=90000, wait_until="domcontentloaded")
-                            await asyncio.sleep(random.uniform(1.0, 2.4))
-                            await self._human_like(p)
+                            await self._goto(p, link)
+                            await self._pause(1.0, 2.4, p)
 
                             prod_html = (await p.content()).lower()
                             if any(token in prod_html for token in ("captcha", "bot check", "enter the characters", "press and hold")):
-                                print("CAPTCHA detected on product page:", link)
+                                logger.warning("CAPTCHA detected on product page: %s", link)
+                                self.stats.captcha()
                                 if self.screenshot_on_error:
                                     ts = int(time.time())
                                     try:
-                                        await p.screenshot(path=f"captcha_product_{attempts}_{ts}.png", full_page=True)
+                                        with self.stats.phase("captcha"):
+                                            await p.screenshot(path=f"captcha_product_{attempts}_{ts}.png", full_page=True)
                                     except Exception:
                                         pass
                                 if proxy:
-                                    self._bad_proxies.add(proxy.get("server"))
+                                    self._blacklist(proxy)
                                 await p.close()
                                 raise RuntimeError("CAPTCHA on product page")
 
-                            title = None
-                            try:
-                                t_sel = await p.query_selector("#productTitle")
-                                if t_sel:
-                                    title = (await t_sel.inner_text()).strip()
-                                else:
-                                    h1 = await p.query_selector("h1 span")
-                                    title = (await h1.inner_text()).strip() if h1 else None
-                            except Exception:
-                                title = None
-
-                            price = None
-                            price_selectors = [
-                                ".a-price .a-offscreen",
-                                "#price_inside_buybox",
-                                "#priceblock_ourprice",
-                                "#priceblock_dealprice",
-                            ]
-                            for ps in price_selectors:
-                                try:
-                                    pe = await p.query_selector(ps)
-                                    if pe:
-                                        txt = (await pe.inner_text()).strip()
-                                        cleaned = txt.replace("$", "").replace(",", "").strip()
-                                        try:
-                                            price = float(re.sub(r"[^\d\.]", "", cleaned))
-                                            break
-                                        except Exception:
-                                            price = None
-                                except Exception:
-                                    continue
-
-                            category = await self._extract_category_from_product(p)
-
-                            products.append({
-                                "name": title,
-                                "url": link,
-                                "price": price,
-                                "category": category
-                            })
+                            with self.stats.phase("extract"):
+                                product = await self._extract_product(p, link)
 
                             await p.close()
-                            await asyncio.sleep(random.uniform(0.6, 1.6))
+                            found += 1
+                            yield product
+                            await self._pause(0.6, 1.6)
 
                         except Exception as e:
-                            print("Error scraping product page:", e)
+                            logger.warning("Error scraping product page: %s", e)
                             try:
                                 await p.close()
                             except Exception:
                                 pass
                             if "captcha" in str(e).lower() and proxy:
-                                self._bad_proxies.add(proxy.get("server"))
+                                self._blacklist(proxy)
                             continue
 
                     await context.close()
                     await browser.close()
 
-                    if products:
-                        print(f"Found {len(products)} products (with categories).")
-                        return products
+                    if found:
+                        logger.info("Found %s products", found)
+                        return
 
                     if proxy:
-                        self._bad_proxies.add(proxy.get("server"))
+                        self._blacklist(proxy)
                     last_exception = RuntimeError("No products found on search page")
                     continue
 
             except PlaywrightTimeoutError as e:
-                print(f"TimeoutError on attempt {attempts}: {e}")
+                logger.warning("TimeoutError on attempt %s: %s", attempts, e)
                 last_exception = e
                 if proxy:
-                    self._bad_proxies.add(proxy.get("server"))
+                    self._blacklist(proxy)
                 continue
             except Exception as e:
-                print(f"Error on attempt {attempts}: {e}")
+                logger.warning("Error on attempt %s: %s", attempts, e)
                 last_exception = e
                 if proxy:
-                    self._bad_proxies.add(proxy.get("server"))
+                    self._blacklist(proxy)
                 continue
+            finally:
+                self.stats.browser_stopped()
 
         raise RuntimeError(f"Failed to scrape after {self.max_retries} attempts. Last error: {last_exception}")
 
 
 if __name__ == "__main__":
-    import re
     async def main():
         proxies = []
 
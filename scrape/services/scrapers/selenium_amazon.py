@@ -3,7 +3,8 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import random, time, re
+import random, time
+from scrape.services.scrapers.stats import ScrapeStats, TRANSFER_SIZE_JS
 
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117 Safari/537.36",
@@ -41,8 +42,24 @@ def build_driver(headless=True, remote_url=None):
 
 
 class AmazonScraper:
+    NAME = "amazon_selenium"
+
     def __init__(self, headless=True, remote_url=None):
-        self.driver = build_driver(headless, remote_url)
+        self.stats = ScrapeStats(self.NAME)
+        self.stats.browser_started()
+        with self.stats.phase("launch"):
+            self.driver = build_driver(headless, remote_url)
+
+    def _page_loaded(self):
+        try:
+            transferred = self.driver.execute_script(f"return {TRANSFER_SIZE_JS};")
+        except Exception:
+            transferred = None
+        self.stats.page(transferred)
+
+    def _pause(self, seconds):
+        with self.stats.phase("sleep"):
+            time.sleep(seconds)
 
     def _extract_price(self):
         selectors = [
@@ -55,8 +72,8 @@ class AmazonScraper:
             try:
                 el = self.driver.find_element(By.CSS_SELECTOR, sel)
                 if el.text.strip():
-                    cleaned = re.sub(r"[^\d\.]", "", el.text)
-                    return float(cleaned)
+                    # Parsed by the normalizer
+                    return el.text.strip()
             except:
                 pass
         return None
@@ -70,14 +87,17 @@ class AmazonScraper:
             return None
 
     def scrape_search_page(self, url, limit=10):
-        self.driver.get(url)
-        time.sleep(random.uniform(1.5, 2.8))
+        with self.stats.phase("navigate"):
+            self.driver.get(url)
+        self._page_loaded()
+        self._pause(random.uniform(1.5, 2.8))
 
         self.driver.execute_script("window.scrollBy(0, 800);")
-        time.sleep(1.2)
+        self._pause(1.2)
 
-        products = self.driver.find_elements(By.CSS_SELECTOR, "h2 a.a-link-normal")[:limit]
-        links = [p.get_attribute("href") for p in products]
+        with self.stats.phase("extract"):
+            products = self.driver.find_elements(By.CSS_SELECTOR, "h2 a.a-link-normal")[:limit]
+            links = [p.get_attribute("href") for p in products]
 
         results = []
 
@@ -86,12 +106,16 @@ class AmazonScraper:
             self.driver.switch_to.window(self.driver.window_handles[-1])
 
             try:
-                title_el = WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.ID, "productTitle"))
-                )
-                title = title_el.text.strip()
-                price = self._extract_price()
-                category = self._extract_category()
+                with self.stats.phase("navigate"):
+                    title_el = WebDriverWait(self.driver, 10).until(
+                        EC.presence_of_element_located((By.ID, "productTitle"))
+                    )
+                self._page_loaded()
+
+                with self.stats.phase("extract"):
+                    title = title_el.text.strip()
+                    price = self._extract_price()
+                    category = self._extract_category()
 
                 results.append({
                     "name": title,
@@ -105,9 +129,10 @@ class AmazonScraper:
 
             self.driver.close()
             self.driver.switch_to.window(self.driver.window_handles[0])
-            time.sleep(random.uniform(1.3, 2.7))
+            self._pause(random.uniform(1.3, 2.7))
 
         return results
 
     def close(self):
         self.driver.quit()
+        self.stats.browser_stopped()
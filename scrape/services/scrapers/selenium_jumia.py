@@ -1,9 +1,10 @@
-import time, random, re, json
+import time, random, json
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from scrape.services.scrapers.stats import ScrapeStats, TRANSFER_SIZE_JS
 
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117 Safari/537.36",
@@ -44,19 +45,17 @@ def build_driver(headless=True, remote_url=None, proxy=None):
 
 
 class JumiaScraper:
-    def __init__(self, headless=True, remote_url=None, proxy=None):
-        self.driver = build_driver(headless, remote_url, proxy)
-
-    def fetch_products(self, url: str, timeout: int = 15):
-        try:
-            self.driver.get(url)
-            time.sleep(random.uniform(1.2, 2.5))
+    NAME = "jumia_selenium"
 
-            WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "article.prd"))
-            )
-
-            products = []
+    def __init__(self, headless=True, remote_url=None, proxy=None):
+        self.stats = ScrapeStats(self.NAME)
+        self.stats.proxy = proxy
+        self.stats.browser_started()
+        with self.stats.phase("launch"):
+            self.driver = build_driver(headless, remote_url, proxy)
+
+    def _extract_products(self):
+        with self.stats.phase("extract"):
             items = self.driver.find_elements(By.CSS_SELECTOR, "article.prd")
 
             try:
@@ -65,30 +64,51 @@ class JumiaScraper:
             except:
                 category = None
 
-            for item in items:
-                try:
+        # Each element read is a WebDriver round trip, so items are yielded
+        # as they are read rather than after the whole listing
+        for item in items:
+            try:
+                with self.stats.phase("extract"):
                     title = item.find_element(By.CSS_SELECTOR, "div.name").text.strip()
                     product_url = item.find_element(By.CSS_SELECTOR, "a.core").get_attribute("href")
 
+                    # Raw text, ranges included; parsed by the normalizer
                     try:
-                        price_txt = item.find_element(By.CSS_SELECTOR, "div.prc").text.strip()
-                        clean_price = re.sub(r"[^\d.]", "", price_txt.replace(",", ""))
-                        price = float(clean_price) if clean_price else None
+                        price = item.find_element(By.CSS_SELECTOR, "div.prc").text.strip()
                     except:
                         price = None
+            except Exception:
+                continue
+
+            yield {
+                "name": title,
+                "price": price,
+                "url": product_url,
+                "category": category
+            }
+
+    def iter_products(self, url: str, timeout: int = 15):
+        """`fetch_products` item by item; raises if the listing does not load."""
+        with self.stats.phase("navigate"):
+            self.driver.get(url)
+        with self.stats.phase("sleep"):
+            time.sleep(random.uniform(1.2, 2.5))
 
-                    products.append({
-                        "name": title,
-                        "price": price,
-                        "url": product_url,
-                        "category": category
-                    })
-
-                except Exception:
-                    continue
+        with self.stats.phase("navigate"):
+            WebDriverWait(self.driver, timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "article.prd"))
+            )
+        try:
+            transferred = self.driver.execute_script(f"return {TRANSFER_SIZE_JS};")
+        except Exception:
+            transferred = None
+        self.stats.page(transferred)
 
-            return products
+        yield from self._extract_products()
 
+    def fetch_products(self, url: str, timeout: int = 15):
+        try:
+            return list(self.iter_products(url, timeout))
         except Exception as e:
             return {"error": str(e), "url": url}
 
@@ -98,6 +118,7 @@ class JumiaScraper:
             self.driver.quit()
         except:
             pass
+        self.stats.browser_stopped()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,130 @@
+"""
+Phase timeline and cost counters for a single scrape
+
+Each scraper owns a ScrapeStats; the scrape routes persist it on the
+task's `scrape_tasks` row when the scrape ends, successful or not.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, List, Optional
+from uuid import UUID
+from scrape.core.logger import get_logger
+from scrape.core.metrics import SCRAPE_STAGE_SECONDS, SCRAPE_PAGES_FETCHED, SCRAPE_CAPTCHA_HITS
+from scrape.db.query_stats import QueryCounter, count_queries
+
+logger = get_logger(__name__)
+
+# Bytes transferred for the document and every subresource of the current
+# page; an expression for Playwright, prefix with "return" for Selenium.
+TRANSFER_SIZE_JS = "performance.getEntries().reduce((total, e) => total + (e.transferSize || 0), 0)"
+
+
+class ScrapeStats:
+    def __init__(self, scraper: str) -> None:
+        self.scraper = scraper
+        self._origin = time.perf_counter()
+        self.phases: List[dict] = []
+        self.phase_totals: Dict[str, float] = {}
+        self.pages = 0
+        self.bytes_downloaded = 0
+        self.retries = 0
+        self.captchas = 0
+        self.proxy: Optional[str] = None
+        self.queries = QueryCounter()
+        self._browser_seconds = 0.0
+        self._browser_started: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases.append({
+                "phase": name,
+                "offset_ms": round((start - self._origin) * 1000, 1),
+                "duration_ms": round(elapsed * 1000, 1),
+            })
+            self.phase_totals[name] = round(self.phase_totals.get(name, 0.0) + elapsed * 1000, 1)
+            SCRAPE_STAGE_SECONDS.labels(self.scraper, name).observe(elapsed)
+
+    @contextmanager
+    def persist(self):
+        """The persist phase, counting the database round trips made in it."""
+        with self.phase("persist"), count_queries(self.queries):
+            yield
+
+    def page(self, transferred: Optional[int] = None) -> None:
+        self.pages += 1
+        self.bytes_downloaded += int(transferred or 0)
+        SCRAPE_PAGES_FETCHED.labels(self.scraper).inc()
+
+    def captcha(self) -> None:
+        self.captchas += 1
+        SCRAPE_CAPTCHA_HITS.labels(self.scraper).inc()
+
+    def browser_started(self) -> None:
+        if self._browser_started is None:
+            self._browser_started = time.perf_counter()
+
+    def browser_stopped(self) -> None:
+        if self._browser_started is not None:
+            self._browser_seconds += time.perf_counter() - self._browser_started
+            self._browser_started = None
+
+    @property
+    def browser_seconds(self) -> float:
+        running = 0.0
+        if self._browser_started is not None:
+            running = time.perf_counter() - self._browser_started
+        return round(self._browser_seconds + running, 3)
+
+    def as_values(self) -> dict:
+        return {
+            "phases": self.phases,
+            "phase_totals": self.phase_totals,
+            "pages": self.pages,
+            "bytes_downloaded": self.bytes_downloaded,
+            "retries": self.retries,
+            "captchas": self.captchas,
+            "proxy": self.proxy,
+            "browser_seconds": self.browser_seconds,
+            "db_round_trips": self.queries.count,
+        }
+
+
+@asynccontextmanager
+async def record_scrape_task(
+    task_repo, stats: ScrapeStats, retailer_id: Optional[UUID], query: str
+):
+    """
+    Opens a `running` task row and, whatever happens inside the block,
+    closes it with the final status and the scrape's stats. Bookkeeping
+    failures are logged and never fail the scrape.
+    """
+    task = None
+    try:
+        task = await task_repo.start_scrape_task(
+            source=stats.scraper, retailer_id=retailer_id, query=query
+        )
+    except Exception as e:
+        logger.error("Could not record scrape task for %s", stats.scraper)
+        logger.error(e)
+
+    status = "failed"
+    try:
+        yield task
+        status = "succeeded"
+    finally:
+        if task:
+            # Query logger callbacks for the last statements are scheduled
+            # with call_soon; let them land before reading the counter.
+            await asyncio.sleep(0)
+            try:
+                await task_repo.finish_scrape_task(task["id"], status, stats)
+            except Exception as e:
+                logger.error("Could not save stats for scrape task %s", task["id"])
+                logger.error(e)
@@ -0,0 +1,47 @@
+from typing import List, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def lttb(points: Sequence[T], threshold: int, x=lambda p: p[0], y=lambda p: p[1]) -> List[T]:
+    """
+    Largest-Triangle-Three-Buckets: keeps the first and last points and, for
+    every bucket in between, the point forming the largest triangle with the
+    previously kept point and the average of the next bucket. Preserves the
+    visual shape of a series (peaks and dips) with `threshold` points.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        next_bucket = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(x(p) for p in next_bucket) / len(next_bucket)
+        avg_y = sum(y(p) for p in next_bucket) / len(next_bucket)
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = x(points[a]), y(points[a])
+
+        max_area = -1.0
+        chosen = start
+        for j in range(start, end):
+            area = abs(
+                (ax - avg_x) * (y(points[j]) - ay)
+                - (ax - x(points[j])) * (avg_y - ay)
+            )
+            if area > max_area:
+                max_area = area
+                chosen = j
+
+        sampled.append(points[chosen])
+        a = chosen
+
+    sampled.append(points[-1])
+    return sampled
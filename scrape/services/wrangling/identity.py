@@ -0,0 +1,56 @@
+"""
+Canonical product keys
+
+A listing is reachable under many URLs: Amazon adds `/ref=` segments,
+slug text and tracking parameters, and search results link the same
+item through sponsored redirects. `product_key` reduces a URL to the
+retailer's own identifier for the item, which is what `products` is
+unique on (with the retailer):
+
+- Amazon: the ASIN, "B0C7Q3M4ZK" from ".../dp/B0C7Q3M4ZK/ref=sr_1_3"
+- Jumia: the catalog number ending the product URL,
+  "289613543" from ".../infinix-hot-40i-...-289613543.html"
+- anything else: the URL without its query string and fragment
+
+The backfill in migration e2a7c4f9b318 does the same in SQL; the two
+must stay in step.
+"""
+
+import re
+
+_AMAZON_HOST = re.compile(r"(?:^|\.)amazon\.[a-z.]+$")
+_JUMIA_HOST = re.compile(r"(?:^|\.)jumia\.[a-z.]+$")
+_ASIN = re.compile(
+    r"/(?:dp|gp/product|gp/aw/d|exec/obidos/asin|o/asin)/([a-z0-9]{10})(?:/|$)",
+    re.IGNORECASE
+)
+_JUMIA_SKU = re.compile(r"-([0-9]+)\.html$")
+
+
+def _base(url: str) -> str:
+    return url.strip().split("#", 1)[0].split("?", 1)[0]
+
+
+def _host(base: str) -> str:
+    parts = base.split("/", 3)
+    return parts[2].lower() if len(parts) > 2 else ""
+
+
+def product_host(url: str) -> str:
+    """The URL's host, which tells the retailers' key spaces apart on lookup."""
+    return _host(_base(url))
+
+
+def product_key(url: str) -> str:
+    base = _base(url)
+    host = _host(base)
+    if _AMAZON_HOST.search(host):
+        asin = _ASIN.search(base)
+        if asin:
+            return asin.group(1).upper()
+    elif _JUMIA_HOST.search(host):
+        sku = _JUMIA_SKU.search(base)
+        if sku:
+            return sku.group(1)
+    return base
+
@@ -0,0 +1,198 @@
+"""
+Streaming normalization of scraped items
+
+`normalize_products` is a generator: it consumes whatever the scrapers
+yield, one item at a time, and emits validated `ScrapedProduct` records.
+Items without a usable name or URL are dropped, and so are repeats of a
+product already seen in the same stream, by its canonical key. Scraper
+error entries are dropped too. Each drop is counted by reason in
+`scrape_items_rejected_total`.
+
+Prices are parsed here rather than in each scraper. The scrapers pass on
+the text they found ("₦ 12,500", "$1,299.99", "1.299,99 €",
+"₦ 8,000 - ₦ 9,500", "2 for $10"), and `parse_price` reads it.
+"""
+
+import re
+from decimal import Decimal
+from typing import Iterable, Iterator, Optional, Tuple, Union
+from scrape.core.logger import get_logger
+from scrape.core.metrics import SCRAPE_ITEMS_REJECTED
+from scrape.models.products.product import ScrapedProduct
+from scrape.services.wrangling.identity import product_key
+
+logger = get_logger(__name__)
+
+# Column limits on products
+MAX_NAME_LENGTH = 255
+MAX_URL_LENGTH = 500
+MAX_CATEGORY_LENGTH = 255
+# numeric(10, 2)
+MAX_PRICE = 99_999_999.99
+
+CURRENCIES = {
+    "₦": "NGN", "NGN": "NGN",
+    "$": "USD", "US$": "USD", "USD": "USD",
+    "€": "EUR", "EUR": "EUR",
+    "£": "GBP", "GBP": "GBP",
+}
+
+_CURRENCY = re.compile(r"US\$|NGN|USD|EUR|GBP|[₦$€£]")
+# Digits with any grouping: "1,299.99", "1.299,99", "1 299,99", "1'299.99".
+# A plain space only groups when three digits follow, so "2 for 10" stays apart.
+_AMOUNT = re.compile(r"\d[\d.,'\u00a0\u202f]*(?:[ ]\d{3}(?!\d)[\d.,'\u00a0\u202f]*)*")
+# What follows the quantity of a multi-buy offer: "2 for $10", "3/₦5,000"
+_MULTI_BUY = re.compile(r"\s*(?:for|/)\s*", re.IGNORECASE)
+_GROUPING = re.compile(r"[ '\u00a0\u202f]")
+
+
+def _amount(raw: str) -> Optional[float]:
+    """
+    Whichever of "." and "," comes last is the decimal point when both are
+    present. A lone separator followed by exactly three digits groups
+    thousands ("₦ 12,500", "1.500 €"); prices never have three decimals.
+    """
+    raw = _GROUPING.sub("", raw).rstrip(".,")
+    dot, comma = raw.rfind("."), raw.rfind(",")
+    if dot >= 0 and comma >= 0:
+        point = "." if dot > comma else ","
+    elif dot >= 0 or comma >= 0:
+        separator = "." if dot >= 0 else ","
+        position = max(dot, comma)
+        grouped = raw.count(separator) > 1 or len(raw) - position - 1 == 3
+        point = None if grouped else separator
+    else:
+        point = None
+
+    if point is None:
+        digits = raw.replace(",", "").replace(".", "")
+    else:
+        whole, _, fraction = raw.rpartition(point)
+        digits = whole.replace(",", "").replace(".", "") + "." + fraction
+    try:
+        return float(digits)
+    except ValueError:
+        return None
+
+
+def _multi_buy_total(
+    text: str, quantity: re.Match, currency: Optional[re.Match]
+) -> Optional[float]:
+    """
+    The amount a "2 for $10" offer charges for `quantity` items, or None
+    when the text is not such an offer. The quantity is a whole number
+    with no currency before it, so unit prices like "$5/lb" are not
+    offers.
+    """
+    if not quantity.group().isdigit() or (currency and currency.start() < quantity.start()):
+        return None
+    offer = _MULTI_BUY.match(text, quantity.end())
+    if not offer:
+        return None
+    total = _AMOUNT.search(text, offer.end())
+    if not total or _CURRENCY.sub("", text[offer.end():total.start()]).strip():
+        return None
+    return _amount(total.group())
+
+
+def parse_price(
+    text: Union[str, int, float, Decimal, None]
+) -> Tuple[Optional[float], Optional[str]]:
+    """
+    (amount, ISO currency) from a price as shown on the page. A range
+    gives its lower bound, the price the listing is sold from, and a
+    multi-buy offer the price of one item, to the cent. The currency is
+    None when the text names none.
+    """
+    if text is None or isinstance(text, bool):
+        return None, None
+    if isinstance(text, (int, float, Decimal)):
+        return float(text), None
+
+    amount = _AMOUNT.search(text)
+    if not amount:
+        return None, None
+    currency = _CURRENCY.search(text)
+    total = _multi_buy_total(text, amount, currency)
+    currency = CURRENCIES[currency.group()] if currency else None
+
+    if total is not None:
+        quantity = int(amount.group())
+        return (round(total / quantity, 2) if quantity else None), currency
+    return _amount(amount.group()), currency
+
+
+def _text(value, limit: int) -> Optional[str]:
+    if not isinstance(value, str):
+        return None
+    return " ".join(value.split())[:limit] or None
+
+
+def _reject(reason: str, item) -> None:
+    SCRAPE_ITEMS_REJECTED.labels(reason).inc()
+    logger.debug("Dropped scraped item (%s): %s", reason, item)
+
+
+class ProductNormalizer:
+    """
+    `normalize_products` one item at a time, for sources that are not a
+    plain iterable (an async scraper feeding a stream). Remembers the keys
+    it has seen, so a normalizer is good for one scrape.
+    """
+
+    def __init__(self, currency: Optional[str] = None) -> None:
+        self.currency = currency
+        self._seen = set()
+
+    def normalize(self, item) -> Optional[ScrapedProduct]:
+        if not isinstance(item, dict) or "error" in item:
+            _reject("error", item)
+            return None
+
+        name = _text(item.get("name"), MAX_NAME_LENGTH)
+        if not name:
+            _reject("name", item)
+            return None
+
+        url = item.get("url")
+        url = url.strip().split("#", 1)[0].split("?", 1)[0] if isinstance(url, str) else ""
+        if not url.startswith(("https://", "http://")) or len(url) > MAX_URL_LENGTH:
+            _reject("url", item)
+            return None
+        key = product_key(url)
+        if key in self._seen:
+            _reject("duplicate", item)
+            return None
+        self._seen.add(key)
+
+        price, quoted = parse_price(item.get("price"))
+        if price is not None and not 0 <= price <= MAX_PRICE:
+            logger.debug("Dropped out-of-range price %s for %s", price, url)
+            price = None
+
+        return ScrapedProduct(
+            name=name,
+            url=url,
+            external_id=key,
+            price=price,
+            currency=(quoted or self.currency) if price is not None else None,
+            category=_text(item.get("category"), MAX_CATEGORY_LENGTH),
+        )
+
+
+def normalize_products(
+    items: Iterable[dict], currency: Optional[str] = None
+) -> Iterator[ScrapedProduct]:
+    """
+    `currency` is the retailer's, assumed when the price text names none.
+    A scraper that failed outright may hand over one error dict instead of
+    a list; it is dropped like any other error entry.
+    """
+    if isinstance(items, dict):
+        items = (items,)
+
+    normalizer = ProductNormalizer(currency)
+    for item in items:
+        product = normalizer.normalize(item)
+        if product is not None:
+            yield product